@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+
+from services.fuzzy_matcher import get_fuzzy_index
+from services.generation_jobs import get_generation_jobs
+from services.generation_leases import get_generation_leases
+from services.generation_scheduler import get_generation_scheduler
+from services.ingredient_index import get_ingredient_index
+from services.model_tiers import tier_stats
+from services.negative_cache import get_negative_cache
+from services.recipe_service import normalize_for_search
+from services.recipe_writer import get_recipe_writer
+from services.response_cache import get_recipe_cache
+from services.semantic_index import get_semantic_index
+from services.similarity_index import get_similarity_index
+from services.single_flight import get_generation_flight
+from services.static_assets import get_static_assets
+
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/stats")
+async def get_stats():
+    return {
+        "recipe_cache": get_recipe_cache().stats(),
+        "generation_flight": get_generation_flight().stats(),
+        "generation_leases": get_generation_leases().stats(),
+        "generation_scheduler": get_generation_scheduler().stats(),
+        "llm_tiers": tier_stats(),
+        "fuzzy_matcher": get_fuzzy_index().stats(),
+        "semantic_matcher": get_semantic_index().stats(),
+        "similarity_index": get_similarity_index().stats(),
+        "ingredient_index": get_ingredient_index().stats(),
+        "recipe_writer": get_recipe_writer().stats(),
+        "generation_jobs": get_generation_jobs().stats(),
+        "negative_cache": get_negative_cache().stats(),
+        "static_assets": get_static_assets().stats(),
+    }
+
+
+@router.delete("/negative-cache")
+async def purge_negative_cache(
+    query: Optional[str] = Query(None, description="Purge only this query; omit to purge everything"),
+):
+    """Forget cached rejections and generation failures, so the queries are tried again.
+
+    Failures published for other workers are dropped as well; their own
+    negative caches still replay a failure until it expires.
+    """
+    if query is None:
+        await get_generation_leases().purge_failures()
+        return {"purged": get_negative_cache().purge()}
+    query = query.strip()
+    cache_key = normalize_for_search(query)
+    await get_generation_leases().purge_failures(cache_key)
+    return {"purged": get_negative_cache().purge(query=query, cache_key=cache_key)}
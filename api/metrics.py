@@ -0,0 +1,55 @@
+from typing import Iterable, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from services.generation_jobs import get_generation_jobs
+from services.generation_leases import get_generation_leases
+from services.generation_scheduler import get_generation_scheduler
+from services.metrics import CONTENT_TYPE, get_metrics
+from services.negative_cache import get_negative_cache
+from services.recipe_writer import get_recipe_writer
+from services.response_cache import get_recipe_cache
+from services.single_flight import get_generation_flight
+
+
+router = APIRouter(tags=["metrics"])
+
+
+def _component_samples() -> Iterable[Tuple[str, str, str, float]]:
+    """Figures the components already count, read at scrape time."""
+    cache = get_recipe_cache().stats()
+    yield "recipe_cache_hits_total", "counter", "Response cache hits", cache["hits"]
+    yield "recipe_cache_misses_total", "counter", "Response cache misses", cache["misses"]
+    yield "recipe_cache_entries", "gauge", "Entries in the response cache", cache["size"]
+
+    negative = get_negative_cache().stats()
+    yield "recipe_rejection_cache_hits_total", "counter", "Queries rejected from the negative cache", negative["rejections"]["hits"]
+    yield "recipe_failure_cache_hits_total", "counter", "Failed generations replayed from the negative cache", negative["failures"]["hits"]
+
+    flight = get_generation_flight().stats()
+    yield "recipe_generations_coalesced_total", "counter", "Requests that joined an in-flight generation", flight["coalesced"]
+
+    leases = get_generation_leases().stats()
+    yield "recipe_generations_shared_total", "counter", "Generations served from another worker's result", leases["shared_results"]
+
+    scheduler = get_generation_scheduler().stats()
+    yield "llm_inflight_requests", "gauge", "LLM calls holding a scheduler slot", scheduler["inflight"]
+    yield "llm_retries_total", "counter", "LLM calls retried after a retryable failure", scheduler["retries"]
+    yield "llm_rejected_total", "counter", "LLM calls refused while the circuit was open", scheduler["rejected"]
+    yield "llm_circuit_open", "gauge", "1 while the LLM circuit breaker is not closed", int(scheduler["circuit"] != "closed")
+
+    writer = get_recipe_writer().stats()
+    yield "recipe_writer_queued", "gauge", "Generated recipes waiting to be written", writer["queued"]
+    yield "recipe_writer_written_total", "counter", "Generated recipes written to the database", writer["written"]
+    yield "recipe_writer_failures_total", "counter", "Failed generated-recipe write batches", writer["failures"]
+    yield "recipe_writer_dropped_total", "counter", "Generated recipes dropped after failing to write alone", writer["dropped"]
+
+    jobs = get_generation_jobs().stats()
+    yield "recipe_jobs_running", "gauge", "Generation jobs running in this process", jobs["running"]
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of this process's metrics."""
+    return Response(content=get_metrics().render(_component_samples()), media_type=CONTENT_TYPE)
@@ -1,16 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional, Tuple, TypeVar, Union
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import asyncio
 import logging
+import math
+import orjson
 
-from db.base import get_db
+from db.base import get_db, AsyncReadSessionLocal
 from services.recipe_service import (
-    create_recipe,
+    recipe_lookup_keys,
     search_recipe_by_query,
-    recipe_to_response,
+    search_recipes_by_keys,
+    search_recipes_by_title_keys,
+    response_to_recipe_data,
+    search_recipe_fuzzy,
+    search_recipe_semantic,
+    get_recipes_by_ids,
+    recipe_response_json,
+    recipe_body,
+    RecipeBody,
+    normalize_for_search,
 )
 from services.llm_recipe_generator import get_recipe_generator, RecipeGenerationError
+from services.generation_scheduler import GenerationTimeoutError, GenerationUnavailableError
 from services.query_validator import validate_cocktail_wine_query
-from schemas.recipe import RecipeResponse
+from services.single_flight import get_generation_flight
+from services.response_cache import get_recipe_cache
+from services.generation_jobs import get_generation_jobs
+from services.generation_leases import SharedGenerationError, get_generation_leases
+from services.negative_cache import get_negative_cache
+from services.metrics import get_metrics
+from services.recipe_writer import get_recipe_writer
+from services.similarity_index import get_similarity_index
+from services.ingredient_index import get_ingredient_index
+from services.ingredients import ingredient_names
+from services.compression import accepted_encoding, encoded_etag, etag_matches
+from models.recipe import Recipe
+from schemas.recipe import (
+    RecipeResponse, RecipeBatchRequest, RecipeBatchResponse, RecipeJob, RecipeSimilarResponse,
+    RecipeIngredientSearchResponse,
+)
+from core.config import (
+    COMPRESSION_MIN_SIZE,
+    RECIPE_HTTP_CACHE_CONTROL,
+    RECIPE_BATCH_GENERATION_CONCURRENCY,
+    RECIPE_JOB_MAX_WAIT_SECONDS,
+    SIMILAR_MAX_RESULTS,
+    INGREDIENT_SEARCH_MAX_TERMS,
+    INGREDIENT_SEARCH_MAX_LIMIT,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -18,12 +59,190 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/recipe", tags=["recipe"])
 
+T = TypeVar("T")
 
-@router.get("", response_model=RecipeResponse)
-async def get_recipe(
-    query: str = Query(..., min_length=1, description="Cocktail name or query"),
-    db: AsyncSession = Depends(get_db)
-):
+
+def _cached_body(cache_key: str) -> Optional[bytes]:
+    body = get_recipe_cache().get(cache_key)
+    if body is None:
+        # Generated recipes whose write has not committed yet
+        body = get_recipe_writer().get(cache_key)
+    return body
+
+
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole seconds
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _validator_headers(body: RecipeBody, cache_control: str, encoding: Optional[str] = None) -> Dict[str, str]:
+    headers = {"ETag": encoded_etag(body.etag, encoding), "Cache-Control": cache_control}
+    if body.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(body.last_modified, usegmt=True)
+    return headers
+
+
+def _not_modified(
+    body: RecipeBody, if_none_match: Optional[str], if_modified_since: Optional[str]
+) -> bool:
+    """Whether the client's copy of ``body`` is current (RFC 9110 section 13.2.2)."""
+    if if_none_match is not None:
+        # If-Modified-Since is ignored whenever If-None-Match is sent
+        return etag_matches(if_none_match, body.etag)
+    if if_modified_since is not None and body.last_modified is not None:
+        return _not_modified_since(if_modified_since, body.last_modified)
+    return False
+
+
+def _recipe_response(
+    body: bytes,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[str] = None,
+    accept_encoding: Optional[str] = None,
+) -> Response:
+    """A recipe with its validators, or 304 when the client already has it.
+
+    Bodies of at least COMPRESSION_MIN_SIZE bytes are sent in the client's
+    preferred coding, from bytes kept on the cached body.
+    """
+    body = recipe_body(body)
+    compressible = len(body) >= COMPRESSION_MIN_SIZE
+    encoding = accepted_encoding(accept_encoding) if compressible else None
+    headers = _validator_headers(body, RECIPE_HTTP_CACHE_CONTROL, encoding)
+    if compressible:
+        headers["Vary"] = "Accept-Encoding"
+    if _not_modified(body, if_none_match, if_modified_since):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if encoding is None:
+        return Response(content=body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=body.encoded(encoding), media_type="application/json", headers=headers)
+
+
+def _response_body(result: Union[bytes, RecipeResponse]) -> bytes:
+    # A joined batch generation yields the unsaved RecipeResponse; the batch queues it
+    if isinstance(result, RecipeResponse):
+        return result.model_dump_json().encode()
+    return result
+
+
+async def _store_generated_many(generated: Dict[str, Tuple[str, RecipeResponse]]) -> Dict[str, bytes]:
+    """Queue generated recipes, keyed by cache key, for the background writer.
+
+    Returns the serialized response to serve for each key. A generated title
+    that matches a stored recipe serves that recipe, which stays canonical;
+    the query is still queued so it is recorded as an alias. The titles are
+    looked up on a session of their own, since a shared generation outlives
+    the request that started it. Lookup failures are logged and the
+    generated recipes are still served.
+    """
+    with get_metrics().stage_seconds.time("persist"):
+        recipes_data = {}
+        for key, (query, recipe_response) in generated.items():
+            recipe_data = response_to_recipe_data(recipe_response, query)
+            recipe_data["lookup_key"], recipe_data["title_key"] = recipe_lookup_keys(
+                recipe_data["search_query"], recipe_data["title"]
+            )
+            recipes_data[key] = recipe_data
+        generated_at = datetime.now(timezone.utc)
+        bodies = {
+            key: RecipeBody(recipe_data["response_json"].encode(), generated_at)
+            for key, recipe_data in recipes_data.items()
+        }
+        try:
+            async with AsyncReadSessionLocal() as db:
+                by_title = await search_recipes_by_title_keys(
+                    db, (recipe_data["title_key"] for recipe_data in recipes_data.values())
+                )
+                for key, recipe_data in recipes_data.items():
+                    existing = by_title.get(recipe_data["title_key"])
+                    if existing is not None:
+                        bodies[key] = await recipe_response_json(existing)
+        except Exception as e:
+            logger.error(f"Error looking up generated titles: {e}")
+
+        logger.info(f"Queueing Generated Recipes for the database: {[data['title'] for data in recipes_data.values()]}")
+        writer = get_recipe_writer()
+        for key, recipe_data in recipes_data.items():
+            writer.submit(key, recipe_data, bodies[key])
+            get_recipe_cache().put(key, bodies[key])
+        return bodies
+
+
+async def _store_generated(query: str, recipe_response: RecipeResponse) -> bytes:
+    key = normalize_for_search(query)
+    bodies = await _store_generated_many({key: (query, recipe_response)})
+    return bodies[key]
+
+
+async def _generate_and_store(query: str) -> bytes:
+    logger.info(f"Generating recipe for query: {query}")
+    recipe_response = await get_recipe_generator().generate_recipe(query)
+    return await _store_generated(query, recipe_response)
+
+
+async def _stream_generate_and_store(query: str, events: asyncio.Queue) -> bytes:
+    """Like _generate_and_store, but forwards partial fields to ``events``.
+
+    A ``None`` sentinel is always queued once the completion has finished or
+    failed, so the reader knows to await the final result.
+    """
+    logger.info(f"Streaming recipe generation for query: {query}")
+    recipe_response = None
+    try:
+        async for event in get_recipe_generator().stream_recipe(query):
+            if event[0] == "recipe":
+                recipe_response = event[1]
+            else:
+                events.put_nowait(event)
+    finally:
+        events.put_nowait(None)
+    return await _store_generated(query, recipe_response)
+
+
+async def _stored_recipe(db: AsyncSession, query: str) -> Optional[Recipe]:
+    """Stored recipe for ``query``: exact key, then fuzzy, then semantic match."""
+    metrics = get_metrics()
+    with metrics.stage_seconds.time("db"):
+        recipe = await search_recipe_by_query(db, query)
+        if recipe:
+            metrics.db_lookups.inc("hit")
+            logger.info(f"Found recipe in database: {recipe.title}")
+            return recipe
+        result = "fuzzy_hit"
+        match = await search_recipe_fuzzy(db, query)
+        if not match:
+            result = "semantic_hit"
+            match = await search_recipe_semantic(db, query)
+        if not match:
+            metrics.db_lookups.inc("miss")
+            return None
+        recipe, score = match
+        metrics.db_lookups.inc(result)
+        logger.info(f"Found similar recipe in database: {recipe.title} ({score:.2f})")
+        return recipe
+
+
+async def _find_stored(db: AsyncSession, query: str, cache_key: str) -> Optional[bytes]:
+    recipe = await _stored_recipe(db, query)
+    if recipe is None:
+        return None
+    body = await recipe_response_json(recipe)
+    get_recipe_cache().put(cache_key, body)
+    return body
+
+
+def _validated_query(query: str) -> str:
     query = query.strip()
 
     if not query:
@@ -32,75 +251,280 @@ async def get_recipe(
             detail="Query parameter is required"
         )
     
-    is_valid, error_message = validate_cocktail_wine_query(query)
-    if not is_valid:
+    negative_cache = get_negative_cache()
+    error_message = negative_cache.get_rejection(query)
+    if error_message is None:
+        is_valid, error_message = validate_cocktail_wine_query(query)
+        if is_valid:
+            return query
         logger.warning(f"Query validation failed: '{query}' - {error_message}")
-        raise HTTPException(
+        negative_cache.reject(query, error_message)
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=error_message
+    )
+
+
+def _generation_http_error(e: Exception) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, SharedGenerationError):
+        # Already logged by the worker that generated it
+        return HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
+    if isinstance(e, GenerationTimeoutError):
+        logger.error(f"Recipe generation timed out: {e.message}")
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=e.message
+        )
+    if isinstance(e, GenerationUnavailableError):
+        logger.error(f"Recipe generation unavailable: {e.message}")
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.message,
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    if isinstance(e, RecipeGenerationError):
+        logger.error(f"Error generating recipe: {e.message}")
+        return HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=error_message
+            detail=e.message
+        )
+    if isinstance(e, ValueError):
+        error_msg = str(e)
+        if "OPENAI_API_KEY" in error_msg or "OpenAI API key" in error_msg:
+            logger.error(f"OpenAI API key not configured: {error_msg}")
+            return HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="OpenAI API key is not configured. Please set OPENAI_API_KEY environment variable."
+            )
+        logger.error(f"Unexpected error generating recipe: {e}", exc_info=e)
+        return HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while retrieving the recipe"
         )
+    error_msg = str(e)
+    logger.error(f"Error generating recipe: {error_msg}")
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=error_msg if error_msg else "Query must be related to cocktails"
+    )
 
-    try:
-        recipe = await search_recipe_by_query(db, query)
-        if recipe:
-            logger.info(f"Found recipe in database: {recipe.title}")
-            return await recipe_to_response(recipe)
 
+def _generation_failed(cache_key: str, e: Exception) -> HTTPException:
+    """Map a generation failure to its HTTP error and remember it for ``cache_key``.
+
+    Unexpected errors (500) are not cached, so they are never hidden by a
+    replay.
+    """
+    error = _generation_http_error(e)
+    if error.status_code != status.HTTP_500_INTERNAL_SERVER_ERROR:
+        get_negative_cache().record_failure(cache_key, error.status_code, error.detail, error.headers)
+    return error
+
+
+def _check_failed(cache_key: str) -> None:
+    """Raise the error of a recently failed generation for ``cache_key``."""
+    failure = get_negative_cache().get_failure(cache_key)
+    if failure is not None:
+        status_code, detail, headers = failure
+        raise HTTPException(status_code=status_code, detail=detail, headers=headers)
+
+
+async def _leased(cache_key: str, generate: Callable[[], Awaitable[T]]) -> Union[T, bytes]:
+    """Run ``generate`` under the cross-worker lease for ``cache_key``.
+
+    When another worker is already generating the key, its result is
+    returned as the serialized body and cached here. Failures are raised as
+    HTTPException, so the error is shared with the other workers. Lease
+    reads check out connections from the read pool, so callers must not be
+    holding one of their own.
+    """
+    async def produce() -> T:
         try:
+            return await generate()
+        except Exception as e:
+            raise _generation_http_error(e)
+
+    result = await get_generation_leases().run(cache_key, produce, _response_body)
+    if type(result) is bytes:
+        # Another worker's body; this worker's own are RecipeBody and already cached
+        get_recipe_cache().put(cache_key, result)
+    return result
+
+
+async def _generate_many(queries: Dict[str, str]) -> List[Union[RecipeResponse, bytes, BaseException]]:
+    """Generate recipes for ``{cache_key: query}`` with bounded concurrency.
+
+    Keys already being generated by another request or worker are joined
+    rather than generated again; those return the response body it stored.
+    Failures are returned in place of their results.
+    """
+    semaphore = asyncio.Semaphore(RECIPE_BATCH_GENERATION_CONCURRENCY)
+    generator = get_recipe_generator()
+
+    async def generate(query: str) -> RecipeResponse:
+        async with semaphore:
             logger.info(f"Generating recipe for query: {query}")
-            recipe_response = await get_recipe_generator().generate_recipe(query)
-            
-            try:
-                recipe_data = {
-                    "title": recipe_response.title,
-                    "search_query": query.strip(),  # Store original query for exact matching
-                    "history": recipe_response.history,
-                    "technique": recipe_response.technique,
-                    "glass_type": recipe_response.glass_type,
-                    "ingredients": [
-                        {"name": ing.name, "oz": ing.oz, "ml": ing.ml}
-                        for ing in recipe_response.ingredients
-                    ],
-                    "tasting_profile": (
-                        {
-                            "alcohol": recipe_response.tasting_profile.alcohol,
-                            "bitter": recipe_response.tasting_profile.bitter,
-                            "sour": recipe_response.tasting_profile.sour,
-                            "sweet": recipe_response.tasting_profile.sweet
-                        } if recipe_response.tasting_profile else None
-                    ),
-                    "method": recipe_response.method,
-                    "tip": recipe_response.tip,
-                }
-                logger.info(f"Saving Generated Recipe in database: {recipe_data['title']}")
-                await create_recipe(db, recipe_data)
-            except Exception as e:
-                logger.error(f"Error creating recipe: {e}")
-            
-            return recipe_response
-
-        except ValueError as e:
-            error_msg = str(e)
-            if "OPENAI_API_KEY" in error_msg or "OpenAI API key" in error_msg:
-                logger.error(f"OpenAI API key not configured: {error_msg}")
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail="OpenAI API key is not configured. Please set OPENAI_API_KEY environment variable."
-                )
-            raise
-        except RecipeGenerationError as e:
-            logger.error(f"Error generating recipe: {e.message}")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=e.message
+            return await generator.generate_recipe(query)
+
+    flight = get_generation_flight()
+    return await asyncio.gather(
+        *(
+            flight.do(key, lambda key=key, query=query: _leased(key, lambda: generate(query)))
+            for key, query in queries.items()
+        ),
+        return_exceptions=True,
+    )
+
+
+def _batch_item(
+    query: str, status_code: int, recipe: Optional[bytes] = None, error: Optional[str] = None
+) -> bytes:
+    """Serialize a RecipeBatchItem around an already serialized recipe."""
+    return b"".join((
+        b'{"query":', orjson.dumps(query),
+        b',"status":', str(status_code).encode(),
+        b',"recipe":', recipe if recipe is not None else b"null",
+        b',"error":', orjson.dumps(error),
+        b"}",
+    ))
+
+
+async def run_generation_job(query: str, cache_key: str) -> bytes:
+    """Job runner for GenerationJobs; failures are raised as HTTPException."""
+    try:
+        return _response_body(await get_generation_flight().do(
+            cache_key, lambda: _leased(cache_key, lambda: _generate_and_store(query))
+        ))
+    except Exception as e:
+        raise _generation_failed(cache_key, e)
+
+
+def _job_json(
+    job_id: str,
+    query: str,
+    job_status: str,
+    recipe: Optional[bytes] = None,
+    error_status: Optional[int] = None,
+    error: Optional[str] = None,
+) -> bytes:
+    """Serialize a RecipeJob around an already serialized recipe."""
+    return b"".join((
+        b'{"job_id":', orjson.dumps(job_id),
+        b',"query":', orjson.dumps(query),
+        b',"status":', orjson.dumps(job_status),
+        b',"recipe":', recipe if recipe is not None else b"null",
+        b',"error_status":', orjson.dumps(error_status),
+        b',"error":', orjson.dumps(error),
+        b"}",
+    ))
+
+
+async def _accept_job(query: str, cache_key: str) -> Response:
+    job_id, created = await get_generation_jobs().submit(query, cache_key, run_generation_job)
+    if created:
+        logger.info(f"Queued generation job {job_id} for query: {query}")
+    return Response(
+        content=_job_json(job_id, query, "pending"),
+        status_code=status.HTTP_202_ACCEPTED,
+        media_type="application/json",
+        headers={"Location": f"/recipe/jobs/{job_id}", "Preference-Applied": "respond-async"},
+    )
+
+
+def _sse(event: str, data: bytes) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+async def _recipe_events(query: str, cache_key: str) -> AsyncIterator[bytes]:
+    flight = get_generation_flight()
+    events: asyncio.Queue = asyncio.Queue()
+    if flight.is_inflight(cache_key):
+        # Joining another request's generation: only the final recipe is sent
+        events.put_nowait(None)
+    generation = asyncio.ensure_future(flight.do(
+        cache_key, lambda: _leased(cache_key, lambda: _stream_generate_and_store(query, events))
+    ))
+    # Waiting on another worker's generation streams nothing, so the reader
+    # also stops once the generation is done
+    generation.add_done_callback(lambda _: events.put_nowait(None))
+
+    try:
+        while (event := await events.get()) is not None:
+            if event[0] == "field":
+                _, key, value = event
+                yield _sse("field", orjson.dumps({"key": key, "value": value}))
+            else:
+                _, key, index, value = event
+                yield _sse("item", orjson.dumps({"key": key, "index": index, "value": value}))
+        body = _response_body(await generation)
+    except Exception as e:
+        error = _generation_failed(cache_key, e)
+        yield _sse("error", orjson.dumps({"status": error.status_code, "detail": error.detail}))
+        return
+    finally:
+        if not generation.done():
+            # Client went away; the shared generation keeps running unaffected
+            generation.cancel()
+
+    yield _sse("recipe", body)
+
+
+@router.get(
+    "",
+    response_model=RecipeResponse,
+    responses={202: {"model": RecipeJob, "description": "Generation queued (Prefer: respond-async)"}},
+)
+async def get_recipe(
+    query: str = Query(..., min_length=1, description="Cocktail name or query"),
+    prefer: Optional[str] = Header(
+        None, description="Send respond-async to get 202 and a job id instead of waiting for generation"
+    ),
+    if_none_match: Optional[str] = Header(None, description="ETag of a copy the client holds"),
+    if_modified_since: Optional[str] = Header(None, description="Last-Modified of a copy the client holds"),
+    accept_encoding: Optional[str] = Header(None, include_in_schema=False),
+    db: AsyncSession = Depends(get_db)
+):
+    """Recipe for ``query``: cached, stored, or generated on a miss.
+
+    Recipes carry a strong ``ETag`` over the body, ``Last-Modified`` when the
+    recipe's time is known and ``Cache-Control: RECIPE_HTTP_CACHE_CONTROL``.
+    ``If-None-Match`` (or, without it, ``If-Modified-Since``) is answered
+    with 304 and no body when the client's copy is current. Larger recipes
+    are compressed with gzip or brotli, once per cached recipe.
+    """
+    stage_seconds = get_metrics().stage_seconds
+    with stage_seconds.time("validate"):
+        query = _validated_query(query)
+
+    with stage_seconds.time("cache"):
+        cache_key = normalize_for_search(query)
+        cached = _cached_body(cache_key)
+    if cached is not None:
+        return _recipe_response(cached, if_none_match, if_modified_since, accept_encoding)
+
+    try:
+        body = await _find_stored(db, query, cache_key)
+        if body:
+            return _recipe_response(body, if_none_match, if_modified_since, accept_encoding)
+
+        _check_failed(cache_key)
+        # Hand the read connection back while the model runs; storing the result takes a new one
+        await db.close()
+
+        if prefer and "respond-async" in prefer.lower():
+            return await _accept_job(query, cache_key)
+
+        try:
+            return _recipe_response(
+                _response_body(await get_generation_flight().do(
+                    cache_key, lambda: _leased(cache_key, lambda: _generate_and_store(query))
+                )),
+                accept_encoding=accept_encoding,
             )
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Error generating recipe: {error_msg}")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=error_msg if error_msg else "Query must be related to cocktails"
-            )
+            raise _generation_failed(cache_key, e)
     except HTTPException:
         raise
     except Exception as e:
@@ -109,4 +533,297 @@ async def get_recipe(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while retrieving the recipe"
         )        
-    
+
+
+@router.post("/batch", response_model=RecipeBatchResponse)
+async def get_recipes_batch(
+    request: RecipeBatchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Resolve many queries in one request.
+
+    Stored recipes are found with a single query over all normalized keys.
+    Misses are generated concurrently, at most
+    RECIPE_BATCH_GENERATION_CONCURRENCY at a time, and queued together for
+    the background writer. Each result carries the status ``GET /recipe`` would have
+    returned for that query, in request order. Recipes are spliced into the
+    response as their stored JSON rather than re-serialized.
+    """
+    results: List[Optional[bytes]] = [None] * len(request.queries)
+    # cache key -> first stripped query, and the request positions it answers
+    queries: Dict[str, str] = {}
+    positions: Dict[str, List[int]] = {}
+
+    for i, raw_query in enumerate(request.queries):
+        try:
+            query = _validated_query(raw_query)
+        except HTTPException as e:
+            results[i] = _batch_item(raw_query, e.status_code, error=e.detail)
+            continue
+        cache_key = normalize_for_search(query)
+        cached = _cached_body(cache_key)
+        if cached is not None:
+            results[i] = _batch_item(raw_query, status.HTTP_200_OK, recipe=cached)
+            continue
+        queries.setdefault(cache_key, query)
+        positions.setdefault(cache_key, []).append(i)
+
+    found: Dict[str, bytes] = {}
+    failed: Dict[str, HTTPException] = {}
+    metrics = get_metrics()
+    try:
+        with metrics.stage_seconds.time("db"):
+            for cache_key, recipe in (await search_recipes_by_keys(db, queries)).items():
+                found[cache_key] = await recipe_response_json(recipe)
+                metrics.db_lookups.inc("hit")
+            for cache_key in queries.keys() - found.keys():
+                result = "fuzzy_hit"
+                match = await search_recipe_fuzzy(db, queries[cache_key])
+                if not match:
+                    result = "semantic_hit"
+                    match = await search_recipe_semantic(db, queries[cache_key])
+                if match:
+                    found[cache_key] = await recipe_response_json(match[0])
+                    metrics.db_lookups.inc(result)
+                else:
+                    metrics.db_lookups.inc("miss")
+    except Exception as e:
+        logger.error(f"Unexpected error getting recipes for batch: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while retrieving the recipes"
+        )
+    for cache_key, body in found.items():
+        get_recipe_cache().put(cache_key, body)
+
+    misses = {}
+    for cache_key, query in queries.items():
+        if cache_key in found:
+            continue
+        try:
+            _check_failed(cache_key)
+        except HTTPException as e:
+            failed[cache_key] = e
+            continue
+        misses[cache_key] = query
+    if misses:
+        logger.info(f"Batch: {len(found)} stored, generating {len(misses)}")
+        # Hand the read connection back while the model runs; storing the results takes a new one
+        await db.close()
+        generated = {}
+        for (cache_key, query), outcome in zip(misses.items(), await _generate_many(misses)):
+            if isinstance(outcome, BaseException):
+                failed[cache_key] = _generation_failed(cache_key, outcome)
+            elif isinstance(outcome, bytes):
+                found[cache_key] = outcome
+            else:
+                generated[cache_key] = (query, outcome)
+        if generated:
+            found.update(await _store_generated_many(generated))
+
+    for cache_key, indexes in positions.items():
+        for i in indexes:
+            if cache_key in found:
+                results[i] = _batch_item(request.queries[i], status.HTTP_200_OK, recipe=found[cache_key])
+            else:
+                error = failed[cache_key]
+                results[i] = _batch_item(request.queries[i], error.status_code, error=error.detail)
+
+    return _json_response(b'{"results":[' + b",".join(results) + b"]}")
+
+
+@router.get("/similar", response_model=RecipeSimilarResponse)
+async def get_similar_recipes(
+    query: str = Query(..., min_length=1, description="Cocktail name or query"),
+    k: int = Query(5, ge=1, le=SIMILAR_MAX_RESULTS, description="Number of similar recipes"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stored recipes closest to the one ``query`` resolves to.
+
+    The query is matched like ``GET /recipe`` (exactly, by typo or by
+    paraphrase) but never generated: an unknown drink is a 404. Neighbours
+    are ranked by shared ingredients and tasting-profile distance in the
+    in-memory similarity index and fetched with a single query.
+    """
+    query = _validated_query(query)
+    try:
+        recipe = await _stored_recipe(db, query)
+        if recipe is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No stored recipe matches the query"
+            )
+        with get_metrics().stage_seconds.time("similar"):
+            neighbours = get_similarity_index().similar(recipe.id, k)
+        recipes = await get_recipes_by_ids(db, (recipe_id for recipe_id, _ in neighbours))
+        similar = []
+        for recipe_id, similarity in neighbours:
+            neighbour = recipes.get(recipe_id)
+            if neighbour is None:
+                continue
+            similar.append(b"".join((
+                b'{"title":', orjson.dumps(neighbour.title),
+                b',"similarity":', orjson.dumps(round(similarity, 4)),
+                b',"recipe":', await recipe_response_json(neighbour),
+                b"}",
+            )))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error getting similar recipes for query '{query}': {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while retrieving similar recipes"
+        )
+
+    return _json_response(b"".join((
+        b'{"query":', orjson.dumps(query),
+        b',"title":', orjson.dumps(recipe.title),
+        b',"similar":[', b",".join(similar), b"]}",
+    )))
+
+
+@router.get("/by-ingredient", response_model=RecipeIngredientSearchResponse)
+async def search_recipes_by_ingredient(
+    ingredient: List[str] = Query(
+        ..., description="Ingredient to search for, e.g. mezcal; repeat for several"
+    ),
+    match: Literal["all", "any"] = Query(
+        "all", description="all: recipes using every ingredient; any: recipes using at least one"
+    ),
+    offset: int = Query(0, ge=0, description="Results to skip"),
+    limit: int = Query(20, ge=1, le=INGREDIENT_SEARCH_MAX_LIMIT, description="Results per page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stored recipes that use the given ingredients, a page at a time.
+
+    Ingredients are normalized like the stored ones (amounts, units and
+    plurals dropped) and match any stored ingredient containing their words,
+    so "rum" also finds "aged rum". ``all`` results are ordered by recipe id;
+    ``any`` results put recipes matching more of the ingredients first.
+    Answered from the in-memory ingredient index, so only the page of recipes
+    is read from the database.
+    """
+    terms: Dict[str, str] = {}
+    for raw in ingredient:
+        names = ingredient_names(raw)
+        if not names:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Not an ingredient: '{raw.strip()}'"
+            )
+        terms.setdefault(" or ".join(names), raw)
+    if len(terms) > INGREDIENT_SEARCH_MAX_TERMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {INGREDIENT_SEARCH_MAX_TERMS} ingredients can be searched at once"
+        )
+
+    try:
+        total, page = get_ingredient_index().search(
+            list(terms.values()), match_all=match == "all", offset=offset, limit=limit
+        )
+        recipes = await get_recipes_by_ids(db, (recipe_id for recipe_id, _ in page))
+        results = []
+        for recipe_id, matched in page:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            results.append(b"".join((
+                b'{"title":', orjson.dumps(recipe.title),
+                b',"matched":', str(matched).encode(),
+                b',"recipe":', await recipe_response_json(recipe),
+                b"}",
+            )))
+    except Exception as e:
+        logger.error(f"Unexpected error searching recipes by ingredients {list(terms)}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while searching recipes"
+        )
+
+    return _json_response(b"".join((
+        b'{"ingredients":', orjson.dumps(list(terms)),
+        b',"match":', orjson.dumps(match),
+        b',"total":', str(total).encode(),
+        b',"offset":', str(offset).encode(),
+        b',"limit":', str(limit).encode(),
+        b',"results":[', b",".join(results), b"]}",
+    )))
+
+
+@router.get("/jobs/{job_id}", response_model=RecipeJob)
+async def get_recipe_job(
+    job_id: str,
+    wait: float = Query(
+        0, ge=0, le=RECIPE_JOB_MAX_WAIT_SECONDS,
+        description="Seconds to wait for the job to finish before answering (long poll)"
+    ),
+):
+    """State of a generation queued with ``Prefer: respond-async``.
+
+    Unfinished jobs are reported with ``Retry-After``. A finished job carries
+    the recipe, or the status and detail ``GET /recipe`` would have returned.
+    """
+    job = await get_generation_jobs().wait(job_id, wait)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    recipe = job.response_json.encode() if job.response_json else None
+    response = _json_response(_job_json(job.id, job.query, job.status, recipe, job.error_status, job.error))
+    if job.status in ("pending", "running"):
+        response.headers["Retry-After"] = "1"
+    return response
+
+
+@router.get("/stream")
+async def stream_recipe(
+    query: str = Query(..., min_length=1, description="Cocktail name or query"),
+    if_none_match: Optional[str] = Header(None, description="ETag of a copy the client holds"),
+    if_modified_since: Optional[str] = Header(None, description="Last-Modified of a copy the client holds"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Server-Sent Events version of ``GET /recipe``.
+
+    Stored and cached recipes arrive as a single ``recipe`` event. A generation
+    emits ``field`` events (``{"key", "value"}``) and ``item`` events for each
+    ingredient or method step (``{"key", "index", "value"}``) as soon as they
+    are complete, then the final ``recipe``, or an ``error`` event with
+    ``{"status", "detail"}``. Invalid queries are rejected with a plain 400.
+    Stored recipes carry the same validators as ``GET /recipe`` with
+    ``Cache-Control: no-cache``, so browsers revalidate them and get a 304.
+    """
+    query = _validated_query(query)
+    cache_key = normalize_for_search(query)
+
+    stored_body = _cached_body(cache_key)
+    if stored_body is None:
+        try:
+            stored_body = await _find_stored(db, query, cache_key)
+        except Exception as e:
+            logger.error(f"Unexpected error getting recipe for query '{query}': {e}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="An error occurred while retrieving the recipe"
+            )
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if stored_body is not None:
+        stored_body = recipe_body(stored_body)
+        headers.update(_validator_headers(stored_body, "no-cache"))
+        if _not_modified(stored_body, if_none_match, if_modified_since):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        async def single_event():
+            yield _sse("recipe", stored_body)
+        body = single_event()
+    else:
+        _check_failed(cache_key)
+        # Hand the read connection back while the model runs; storing the result takes a new one
+        await db.close()
+        body = _recipe_events(query, cache_key)
+
+    return StreamingResponse(body, media_type="text/event-stream", headers=headers)
@@ -0,0 +1,105 @@
+"""
+Benchmark query canonicalization: per-query cost and cache hit-rate lift.
+
+Replays a query log (one query per line) through the legacy lowercase +
+whitespace normalization and through canonicalize_query. The hit rate is what
+an unbounded exact-key cache would achieve: every key seen before is a hit.
+Without --log, a synthetic Zipf-distributed log of common phrasings is used.
+
+    python benchmarks/bench_canonicalization.py [--log queries.txt] [--queries 5000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.query_canonicalizer import canonicalize_query
+
+
+DRINKS = [
+    "margarita", "whiskey sour", "negroni", "old fashioned", "mojito", "daiquiri",
+    "manhattan", "cosmopolitan", "moscow mule", "gin fizz", "bloody mary", "mimosa",
+    "bellini", "aperol spritz", "sidecar", "sazerac", "boulevardier", "aviation",
+    "last word", "pina colada", "espresso martini", "paloma", "french 75", "bee's knees",
+    "mai tai", "gimlet", "tom collins", "caipirinha", "penicillin", "paper plane",
+]
+
+TEMPLATES = [
+    "{}", "{}", "{}", "{} recipe", "how to make a {}", "the {}", "{}s",
+    "a {} please", "recipe for {}", "how do i make a {}", "{}!",
+]
+
+
+def legacy_normalize(text: str) -> str:
+    return " ".join(text.lower().strip().split())
+
+
+def synthetic_log(size: int, seed: int) -> list:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(DRINKS))]
+    queries = []
+    for drink in rng.choices(DRINKS, weights=weights, k=size):
+        drink = drink.replace("whiskey", rng.choice(["whiskey", "whisky"]))
+        query = rng.choice(TEMPLATES).format(drink)
+        queries.append(rng.choice([str.lower, str.title, str.upper, str])(query))
+    return queries
+
+
+def replay(queries: list, normalize) -> dict:
+    seen = set()
+    hits = 0
+    start = time.perf_counter()
+    for query in queries:
+        key = normalize(query)
+        if key in seen:
+            hits += 1
+        else:
+            seen.add(key)
+    elapsed = time.perf_counter() - start
+    return {
+        "unique_keys": len(seen),
+        "hit_rate": hits / len(queries),
+        "ns_per_query": elapsed / len(queries) * 1e9,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", type=Path, help="Query log, one query per line")
+    parser.add_argument("--queries", type=int, default=5_000, help="Synthetic log size")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.log:
+        queries = [line.strip() for line in args.log.open(encoding="utf-8") if line.strip()]
+    else:
+        queries = synthetic_log(args.queries, args.seed)
+
+    # Uncached cost: each distinct query canonicalized once, bypassing the LRU
+    distinct = list(dict.fromkeys(queries))
+    start = time.perf_counter()
+    for query in distinct:
+        canonicalize_query.__wrapped__(query)
+    cold_ns = (time.perf_counter() - start) / len(distinct) * 1e9
+
+    canonicalize_query.cache_clear()
+    legacy = replay(queries, legacy_normalize)
+    canonical = replay(queries, canonicalize_query)
+
+    print(f"Replayed {len(queries)} queries ({len(distinct)} distinct phrasings)")
+    # Every distinct key is a miss, i.e. one paid LLM generation
+    print(f"{'':<12}{'misses':>8}{'hit rate':>10}{'ns/query':>10}")
+    for name, result in (("legacy", legacy), ("canonical", canonical)):
+        print(
+            f"{name:<12}{result['unique_keys']:>8}{result['hit_rate']:>10.2%}"
+            f"{result['ns_per_query']:>10.0f}"
+        )
+    print(f"canonicalize_query uncached: {cold_ns:.0f} ns/query")
+    print(f"Hit-rate lift: {(canonical['hit_rate'] - legacy['hit_rate']) * 100:+.2f} pp")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark the fuzzy matcher on a synthetic catalog.
+
+Builds an index of --size generated cocktail keys, then times match() for
+misspelled variants of indexed keys (expected hits) and unrelated strings
+(expected misses). House names are drawn from English words found in the
+standard library's pydoc topics, so the vocabulary is realistic and offline.
+
+    python benchmarks/bench_fuzzy_matcher.py [--size 100000] [--queries 2000]
+"""
+import argparse
+import random
+import re
+import statistics
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pydoc_data.topics import topics
+
+from services.fuzzy_matcher import FuzzyIndex
+
+
+SPIRITS = ["gin", "vodka", "rum", "tequila", "mezcal", "whiskey", "bourbon", "rye", "brandy", "pisco"]
+MODIFIERS = [
+    "smoky", "spiced", "frozen", "dirty", "royal", "tropical", "french", "mexican",
+    "blood orange", "hibiscus", "espresso", "coconut", "ginger", "honey", "basil",
+]
+STYLES = [
+    "sour", "fizz", "smash", "mule", "spritz", "collins", "old fashioned", "negroni",
+    "margarita", "daiquiri", "julep", "martini", "highball", "punch", "flip", "cobbler",
+]
+
+
+def house_words() -> list:
+    text = " ".join(topics.values())
+    return sorted({word.lower() for word in re.findall(r"[A-Za-z]{4,12}", text)})
+
+
+def synthetic_keys(size: int, rng: random.Random) -> list:
+    words = house_words()
+    keys = set()
+    while len(keys) < size:
+        roll = rng.random()
+        if roll < 0.4:
+            parts = [rng.choice(words), rng.choice(STYLES)]
+        elif roll < 0.7:
+            parts = [rng.choice(MODIFIERS), rng.choice(words), rng.choice(STYLES)]
+        elif roll < 0.9:
+            parts = [rng.choice(words), rng.choice(SPIRITS), rng.choice(STYLES)]
+        else:
+            parts = [rng.choice(words), rng.choice(words)]
+        keys.add(" ".join(parts))
+    return list(keys)
+
+
+def misspell(key: str, rng: random.Random) -> str:
+    # Typos land inside a word, as they do when people type drink names
+    positions = [i for i, char in enumerate(key) if char != " "]
+    i = rng.choice(positions)
+    edit = rng.choice(["drop", "swap", "replace"])
+    if edit == "drop":
+        return key[:i] + key[i + 1:]
+    if edit == "swap" and i < len(key) - 1 and key[i + 1] != " ":
+        return key[:i] + key[i + 1] + key[i] + key[i + 2:]
+    return key[:i] + rng.choice(string.ascii_lowercase) + key[i + 1:]
+
+
+def time_matches(index: FuzzyIndex, queries: list) -> tuple:
+    timings = []
+    hits = 0
+    for query in queries:
+        start = time.perf_counter()
+        result = index.match(query)
+        timings.append((time.perf_counter() - start) * 1e6)
+        hits += result is not None
+    timings.sort()
+    return timings, hits
+
+
+def report(label: str, timings: list, hits: int) -> None:
+    p = lambda q: timings[min(len(timings) - 1, int(q * len(timings)))]
+    print(
+        f"{label:<10} matched {hits:>5}/{len(timings):<5} "
+        f"mean {statistics.mean(timings):7.1f} us  p50 {p(0.5):7.1f} us  "
+        f"p99 {p(0.99):7.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    keys = synthetic_keys(args.size, rng)
+
+    index = FuzzyIndex(threshold=args.threshold)
+    start = time.perf_counter()
+    index.add_many((key, recipe_id) for recipe_id, key in enumerate(keys))
+    build_seconds = time.perf_counter() - start
+    print(
+        f"Indexed {len(index)} keys ({index.stats()['vocabulary']} words) in {build_seconds:.2f} s "
+        f"({len(index) / build_seconds:,.0f} keys/s)"
+    )
+
+    typos = [misspell(rng.choice(keys), rng) for _ in range(args.queries)]
+    unrelated = [
+        "".join(rng.choices(string.ascii_lowercase + " ", k=rng.randint(8, 24))).strip() or "x"
+        for _ in range(args.queries)
+    ]
+
+    report("typos", *time_matches(index, typos))
+    report("unrelated", *time_matches(index, unrelated))
+
+
+if __name__ == "__main__":
+    main()
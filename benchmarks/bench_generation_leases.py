@@ -0,0 +1,125 @@
+"""
+Benchmark generation leases across worker processes.
+
+Starts --workers processes against one SQLite database file, as uvicorn
+--workers does. Every process misses on the same --queries normalized keys,
+in its own random order and at most --concurrency at a time, and
+"generates" each with a fake LLM call of --latency seconds. Runs once with leases disabled (each worker generates
+every key, as before) and once with them enabled, and reports the LLM calls
+made, wall time, and the cost of the lease round-trips themselves: claim
+and publish on a generation, and serving a key another worker published.
+
+    python benchmarks/bench_generation_leases.py [--workers 4] [--queries 50] [--concurrency 16] [--latency 0.5]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def worker(url: str, keys: list, concurrency: int, latency: float, enabled: bool, seed: int, results) -> None:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from db.base import make_engine
+    from services.generation_leases import GenerationLeases
+
+    async def run() -> None:
+        engine, read_engine = make_engine(url), make_engine(url, read_only=True)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        read_sessions = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+        leases = GenerationLeases(sessions, read_sessions, enabled=enabled, poll_seconds=0.02)
+        generated, timings = 0, []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def resolve(key: str) -> None:
+            produced = False
+
+            async def generate() -> bytes:
+                nonlocal generated, produced
+                generated += 1
+                produced = True
+                await asyncio.sleep(latency)
+                return b'{"title":"FAKE"}'
+
+            async with semaphore:
+                start = time.perf_counter()
+                await leases.run(key, generate, lambda body: body)
+                elapsed = time.perf_counter() - start
+            if produced:
+                elapsed -= latency  # only the lease overhead
+            timings.append(("generated" if produced else "shared", elapsed * 1000))
+
+        order = list(keys)
+        random.Random(seed).shuffle(order)
+        await asyncio.gather(*(resolve(key) for key in order))
+        await engine.dispose()
+        await read_engine.dispose()
+        results.put((generated, leases.stats(), timings))
+
+    asyncio.run(run())
+
+
+def run_mode(args, enabled: bool) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}"
+
+        async def create() -> None:
+            from db.base import make_engine
+            from models.generation_lease import GenerationLease
+
+            engine = make_engine(url)
+            async with engine.begin() as conn:
+                await conn.run_sync(GenerationLease.__table__.create)
+            await engine.dispose()
+
+        asyncio.run(create())
+        keys = [f"cocktail {i}" for i in range(args.queries)]
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(url, keys, args.concurrency, args.latency, enabled, seed, results))
+            for seed in range(args.workers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        wall = time.perf_counter() - start
+
+    calls = sum(generated for generated, _, _ in outcomes)
+    label = "leases on" if enabled else "leases off"
+    print(f"{label:<11} {calls:>5} LLM calls for {len(keys)} keys x {args.workers} workers  wall {wall:6.2f} s")
+    if enabled:
+        timings = [timing for _, _, worker_timings in outcomes for timing in worker_timings]
+        for kind in ("generated", "shared"):
+            values = sorted(ms for timing_kind, ms in timings if timing_kind == kind)
+            if values:
+                print(
+                    f"  {kind:<10} {len(values):>5}  mean {statistics.mean(values):7.2f} ms  "
+                    f"p50 {values[len(values) // 2]:7.2f} ms  (lease overhead; shared includes waiting)"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16, help="misses in flight per worker")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per fake LLM call")
+    args = parser.parse_args()
+
+    run_mode(args, enabled=False)
+    run_mode(args, enabled=True)
+
+
+if __name__ == "__main__":
+    main()
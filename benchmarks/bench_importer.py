@@ -0,0 +1,123 @@
+"""
+Benchmark the bulk recipe importer against the per-recipe seed loop it
+replaced.
+
+Writes --rows synthetic recipes to a temporary NDJSON file and imports them
+into a fresh on-disk SQLite database, then re-imports the same file to time
+the upsert path. The legacy loop (search_recipe_by_query then create_recipe
+per row, each in its own transaction) is timed on the first --legacy-rows
+recipes.
+
+    python benchmarks/bench_importer.py [--rows 20000] [--legacy-rows 1000] [--chunk-size 1000]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from db.base import Base
+from services.recipe_importer import import_recipe_file, iter_recipe_file
+from services.recipe_service import create_recipe, search_recipe_by_query
+
+WORDS = [
+    "smoky", "velvet", "harbor", "midnight", "garden", "copper", "royal", "golden",
+    "island", "winter", "orchard", "saffron", "ember", "coastal", "wild", "silver",
+]
+STYLES = ["sour", "fizz", "smash", "mule", "spritz", "collins", "negroni", "julep", "punch", "flip"]
+SPIRITS = ["Gin", "Vodka", "Rum", "Tequila", "Mezcal", "Whiskey", "Bourbon", "Brandy"]
+
+
+def synthetic_recipe(i: int, rng: random.Random) -> dict:
+    title = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(STYLES)} no {i}".upper()
+    spirit = rng.choice(SPIRITS)
+    return {
+        "title": title,
+        "search_query": title.lower(),
+        "history": f"A house original built around {spirit.lower()}.",
+        "technique": rng.choice(["Shaken", "Stirred", "Built"]),
+        "glass_type": rng.choice(["Coupe", "Rocks Glass", "Highball"]),
+        "ingredients": [
+            {"name": f"2 oz (60 ml) {spirit}", "oz": 2.0, "ml": 60},
+            {"name": "0.75 oz (22 ml) Lemon Juice", "oz": 0.75, "ml": 22},
+            {"name": "0.5 oz (15 ml) Simple Syrup", "oz": 0.5, "ml": 15},
+        ],
+        "tasting_profile": {"alcohol": 3, "bitter": 1, "sour": 3, "sweet": 2},
+        "method": ["Shake: Shake hard with ice.", "Strain: Strain into a chilled glass."],
+        "tip": "Taste and adjust the syrup.",
+    }
+
+
+async def fresh_session(directory: Path, name: str) -> AsyncSession:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{directory / name}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+
+
+async def legacy_import(db: AsyncSession, path: Path, limit: int) -> int:
+    created = 0
+    for position, recipe_data in iter_recipe_file(path):
+        if position > limit:
+            break
+        if await search_recipe_by_query(db, recipe_data["search_query"]):
+            continue
+        await create_recipe(db, recipe_data)
+        created += 1
+    return created
+
+
+def report(label: str, rows: int, seconds: float) -> None:
+    print(f"{label:<16} {rows:>7} rows in {seconds:7.2f} s  {rows / seconds:>9,.0f} rows/s")
+
+
+async def run(args) -> None:
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        path = directory / "recipes.ndjson"
+        with open(path, "w") as f:
+            for i in range(args.rows):
+                f.write(json.dumps(synthetic_recipe(i, rng)) + "\n")
+        print(f"Wrote {args.rows} recipes ({path.stat().st_size / 1e6:.1f} MB)")
+
+        db = await fresh_session(directory, "bulk.db")
+        stats = await import_recipe_file(db, path, args.chunk_size)
+        report("bulk insert", stats["imported"], stats["seconds"])
+        stats = await import_recipe_file(db, path, args.chunk_size)
+        report("bulk upsert", stats["imported"], stats["seconds"])
+        await db.close()
+
+        db = await fresh_session(directory, "legacy.db")
+        start = time.perf_counter()
+        created = await legacy_import(db, path, args.legacy_rows)
+        report("per-row loop", created, time.perf_counter() - start)
+        await db.close()
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Peak RSS {peak_mb:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--legacy-rows", type=int, default=1_000)
+    parser.add_argument("--chunk-size", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark the ingredient index behind GET /recipe/by-ingredient.
+
+Indexes --size synthetic recipes (the similarity benchmark's catalog) and
+reports indexing throughput and posting-list memory. It then runs --queries
+searches of each kind (one ingredient, two and three ingredients with
+match=all, two with match=any), first page of 20, and reports searches/sec
+and latency. For comparison, --scan-queries two-ingredient searches are
+answered the way the JSON column allows without an index: decode every
+recipe's ingredients and parse their names.
+
+    python benchmarks/bench_ingredient_index.py [--size 100000] [--queries 2000] [--scan-queries 5]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_similarity_index import MIXERS, MODIFIERS, SPIRITS, synthetic_recipe
+from services.ingredient_index import IngredientIndex
+from services.ingredients import recipe_ingredient_names
+
+TERMS = [name.lower() for name in SPIRITS + MODIFIERS + MIXERS]
+
+
+def report(label: str, timings: list, total: int) -> None:
+    timings.sort()
+    p = lambda q: timings[min(len(timings) - 1, int(q * len(timings)))]
+    print(
+        f"{label:<14} {len(timings) / (sum(timings) / 1000):>9,.0f} searches/s  mean {statistics.mean(timings):7.3f} ms  "
+        f"p50 {p(0.5):7.3f} ms  p99 {p(0.99):7.3f} ms  mean hits {total / len(timings):,.0f}"
+    )
+
+
+def time_searches(index: IngredientIndex, searches: list, match_all: bool) -> tuple:
+    timings, total = [], 0
+    for terms in searches:
+        start = time.perf_counter()
+        found, _ = index.search(terms, match_all=match_all, limit=20)
+        timings.append((time.perf_counter() - start) * 1000)
+        total += found
+    return timings, total
+
+
+def scan(rows: list, terms: list) -> list:
+    # What the JSON column allows: decode and parse every row, keep those using all terms
+    matches = []
+    for recipe_id, ingredients_json in rows:
+        names = recipe_ingredient_names(json.loads(ingredients_json))
+        if all(any(f" {term} " in f" {name} " for name in names) for term in terms):
+            matches.append(recipe_id)
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000, help="searches of each kind")
+    parser.add_argument("--scan-queries", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    recipes = [synthetic_recipe(rng)[0] for _ in range(args.size)]
+
+    index = IngredientIndex()
+    start = time.perf_counter()
+    index.add_many(enumerate(recipes))
+    build_seconds = time.perf_counter() - start
+    stats = index.stats()
+    print(
+        f"Indexed {len(index)} recipes ({stats['postings']:,} postings, {stats['ingredients']} ingredients) in "
+        f"{build_seconds:.2f} s ({len(index) / build_seconds:,.0f} recipes/s); postings {stats['posting_bytes'] / 2**20:.1f} MiB"
+    )
+
+    kinds = [("1 term", 1, True), ("2 terms, all", 2, True), ("3 terms, all", 3, True), ("2 terms, any", 2, False)]
+    for label, count, match_all in kinds:
+        searches = [rng.sample(TERMS, count) for _ in range(args.queries)]
+        report(label, *time_searches(index, searches, match_all))
+
+    rows = [(recipe_id, json.dumps(ingredients)) for recipe_id, ingredients in enumerate(recipes)]
+    timings, total = [], 0
+    for _ in range(args.scan_queries):
+        terms = rng.sample(TERMS, 2)
+        start = time.perf_counter()
+        found = scan(rows, terms)
+        timings.append((time.perf_counter() - start) * 1000)
+        total += len(found)
+        assert index.search(terms, limit=len(rows))[1] == [(recipe_id, 2) for recipe_id in found]
+    report("scan, 2 terms", timings, total)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark the compiled query validator against the per-keyword regex loop it
+replaced, and verify both make identical decisions.
+
+The legacy implementation is kept here as the reference. Decisions (accept or
+reject, and the error message) are compared on a generated corpus for the
+shipped keyword lists and for lists --scale times larger; the script exits
+non-zero on any mismatch.
+
+    python benchmarks/bench_query_validator.py [--scale 10] [--queries 1000]
+"""
+import argparse
+import logging
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.query_canonicalizer import canonicalize_query, fold_text
+from services.query_validator import (
+    COCKTAIL_KEYWORDS,
+    CONTEXT_EXCEPTIONS,
+    NEGATIVE_KEYWORDS,
+    WINE_KEYWORDS,
+    QueryValidator,
+    _is_cocktail_name_pattern,
+)
+
+
+class LegacyValidator:
+    """The pre-compilation implementation: one regex search per keyword."""
+
+    def __init__(self, cocktail_keywords, wine_keywords, negative_keywords):
+        self.cocktail_keywords = list(cocktail_keywords)
+        self.wine_keywords = list(wine_keywords)
+        self.negative_keywords = list(negative_keywords)
+
+    def validate(self, query):
+        if not query or not query.strip():
+            return False, "Query cannot be empty"
+
+        query_lower = fold_text(query)
+
+        for negative_keyword in self.negative_keywords:
+            pattern = r'\b' + re.escape(negative_keyword) + r'\b'
+            if re.search(pattern, query_lower):
+                if not self._is_cocktail_wine_context(query_lower, negative_keyword):
+                    return False, f"Query must be related to cocktails or wine only. Found unrelated topic: '{negative_keyword}'"
+
+        cocktail_match = self._check_keywords(query_lower, self.cocktail_keywords)
+        wine_match = self._check_keywords(query_lower, self.wine_keywords)
+
+        if not (cocktail_match or wine_match):
+            query_canonical = canonicalize_query(query)
+            cocktail_match = self._check_keywords(query_canonical, self.cocktail_keywords)
+            wine_match = self._check_keywords(query_canonical, self.wine_keywords)
+
+        if cocktail_match or wine_match:
+            return True, ""
+
+        if _is_cocktail_name_pattern(query, query_lower):
+            return True, ""
+
+        return False, "Query must be related to cocktails or wine only. Please provide a cocktail name, wine type, or related query."
+
+    @staticmethod
+    def _check_keywords(query, keywords):
+        for keyword in keywords:
+            pattern = r'\b' + re.escape(keyword) + r'\b'
+            if re.search(pattern, query):
+                return True
+        return False
+
+    def _is_cocktail_wine_context(self, query, keyword):
+        if self._check_keywords(query, self.cocktail_keywords + self.wine_keywords):
+            return True
+        for neg_keyword, context_keywords in CONTEXT_EXCEPTIONS.items():
+            if keyword == neg_keyword:
+                if any(ctx in query for ctx in context_keywords):
+                    return True
+        return False
+
+
+def pseudo_word(rng):
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+
+
+def scaled_lists(scale, rng):
+    """Keyword lists `scale` times longer, padded with one- and two-word entries."""
+    def grow(keywords):
+        grown = list(keywords)
+        while len(grown) < len(keywords) * scale:
+            extra = pseudo_word(rng)
+            if rng.random() < 0.3:
+                extra += " " + pseudo_word(rng)
+            grown.append(extra)
+        return grown
+    return grow(COCKTAIL_KEYWORDS), grow(WINE_KEYWORDS), grow(NEGATIVE_KEYWORDS)
+
+
+def corpus(size, keyword_lists, rng):
+    vocabulary = [keyword for keywords in keyword_lists for keyword in keywords]
+    vocabulary += ["how", "what", "best", "with", "and", "for", "?", "the", "a", "recipes", "wines"]
+    queries = [
+        "margarita", "Whiskey Sour", "chicken recipe", "gin ingredient list",
+        "red wine list", "cocktail recipe", "pasta with wine", "Corpse Reviver",
+        "how to make a negroni", "what is a good bourbon?", "", "   ",
+    ]
+    while len(queries) < size:
+        words = rng.choices(vocabulary, k=rng.randint(1, 5))
+        if rng.random() < 0.3:
+            words.append(pseudo_word(rng))
+        query = " ".join(words)
+        queries.append(rng.choice([str.lower, str.title, str.upper, str])(query))
+    return queries
+
+
+def run(label, keyword_lists, queries):
+    legacy = LegacyValidator(*keyword_lists)
+    compiled = QueryValidator(*keyword_lists)
+
+    mismatches = [q for q in queries if legacy.validate(q) != compiled.validate(q)]
+
+    timings = {}
+    for name, validator in (("legacy", legacy), ("compiled", compiled)):
+        start = time.perf_counter()
+        for query in queries:
+            validator.validate(query)
+        timings[name] = (time.perf_counter() - start) / len(queries) * 1e6
+
+    keywords = sum(len(set(keywords)) for keywords in keyword_lists)
+    print(
+        f"{label:<8} {keywords:>5} keywords  legacy {timings['legacy']:8.1f} us/call  "
+        f"compiled {timings['compiled']:6.1f} us/call  "
+        f"speedup {timings['legacy'] / timings['compiled']:5.1f}x  mismatches {len(mismatches)}"
+    )
+    for query in mismatches[:5]:
+        print(f"  mismatch: {query!r}: legacy={legacy.validate(query)} compiled={compiled.validate(query)}")
+    return len(mismatches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(args.seed)
+
+    shipped = (COCKTAIL_KEYWORDS, WINE_KEYWORDS, NEGATIVE_KEYWORDS)
+    scaled = scaled_lists(args.scale, rng)
+
+    mismatches = run("shipped", shipped, corpus(args.queries, shipped, rng))
+    mismatches += run(f"{args.scale}x", scaled, corpus(args.queries, scaled, rng))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
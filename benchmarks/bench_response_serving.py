@@ -0,0 +1,126 @@
+"""
+Benchmark GET /recipe on the hit path: stored response bytes versus
+rebuilding a RecipeResponse per request.
+
+Imports --recipes synthetic recipes into a temporary SQLite database and
+replays --requests GET /recipe calls for random stored titles through the
+ASGI app in process, with --concurrency requests in flight. Each path is
+timed twice: with every request answered from the response cache, and with
+the cache disabled so every request reads the row from the database.
+
+The legacy path is the previous handler, mounted at /legacy-recipe: cache
+RecipeResponse objects, rebuild them from the JSON columns on database hits,
+and let FastAPI validate and serialize them against response_model.
+
+    python benchmarks/bench_response_serving.py [--recipes 2000] [--requests 5000] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import APIRouter, Depends
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from bench_importer import synthetic_recipe
+from db.base import Base, get_db
+from api.routes import _validated_query
+from main import app
+from schemas.recipe import RecipeResponse
+from services.recipe_importer import import_recipes
+from services.recipe_service import normalize_for_search, recipe_to_response, search_recipe_by_query
+from services.response_cache import TTLCache, get_recipe_cache
+
+legacy_cache = TTLCache(max_entries=100_000, ttl_seconds=3600)
+legacy_router = APIRouter()
+
+
+@legacy_router.get("/legacy-recipe", response_model=RecipeResponse)
+async def legacy_get_recipe(query: str, db: AsyncSession = Depends(get_db)):
+    query = _validated_query(query)
+    cache_key = normalize_for_search(query)
+    cached = legacy_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    recipe_response = await recipe_to_response(await search_recipe_by_query(db, query))
+    legacy_cache.put(cache_key, recipe_response)
+    return recipe_response
+
+
+async def replay(client: AsyncClient, path: str, queries: list, concurrency: int) -> float:
+    pending = iter(queries)
+
+    async def worker():
+        for query in pending:
+            response = await client.get(path, params={"query": query})
+            assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def run(args) -> None:
+    rng = random.Random(args.seed)
+    recipes = [synthetic_recipe(i, rng) for i in range(args.recipes)]
+    # The suffix passes query validation and is dropped by canonicalization
+    queries = [f"{rng.choice(recipes)['title'].lower()} cocktail" for _ in range(args.requests)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with sessions() as db:
+            await import_recipes(db, enumerate(recipes))
+
+        async def override_get_db():
+            async with sessions() as session:
+                yield session
+
+        app.include_router(legacy_router)
+        app.dependency_overrides[get_db] = override_get_db
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            print(f"{args.requests} requests over {args.recipes} recipes, concurrency {args.concurrency}")
+            for label, cache_entries in (("cache hit", 100_000), ("database hit", 0)):
+                results = {}
+                for name, path, cache in (
+                    ("legacy", "/legacy-recipe", legacy_cache),
+                    ("bytes", "/recipe", get_recipe_cache()),
+                ):
+                    cache.clear()
+                    cache.max_entries = cache_entries
+                    # Warm the cache (or the connection and statement caches)
+                    await replay(client, path, sorted(set(queries)), args.concurrency)
+                    results[name] = args.requests / await replay(client, path, queries, args.concurrency)
+                print(
+                    f"{label:<14} legacy {results['legacy']:>8,.0f} req/s   "
+                    f"bytes {results['bytes']:>8,.0f} req/s   x{results['bytes'] / results['legacy']:.2f}"
+                )
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=2_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark the semantic matcher on a synthetic catalog.
+
+Builds an index of --size generated cocktail keys (the fuzzy matcher
+benchmark's catalog) and reports build time and memory: the float32 matrix
+plus the Python-side key lists, measured with tracemalloc on a second build.
+It then times match() for paraphrases of indexed keys (reordered words and
+filler such as "a ... version please"), counting how many resolve to the key
+they came from, and for unrelated strings, which should not match.
+
+    python benchmarks/bench_semantic_index.py [--size 100000] [--queries 500] [--dimensions 256]
+"""
+import argparse
+import random
+import statistics
+import string
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_fuzzy_matcher import synthetic_keys
+from core.config import SEMANTIC_MATCH_THRESHOLD
+from services.semantic_index import SemanticIndex
+
+FILLERS = [
+    "a {} please", "{} style", "the {} version", "{} with a twist", "my kind of {}", "{} made the classic way",
+]
+
+
+def paraphrase(key: str, rng: random.Random) -> str:
+    words = key.split()
+    if len(words) > 1 and rng.random() < 0.5:
+        rng.shuffle(words)
+    return rng.choice(FILLERS).format(" ".join(words))
+
+
+def time_matches(index: SemanticIndex, queries: list, expected: list) -> tuple:
+    timings = []
+    hits = correct = 0
+    for query, recipe_id in zip(queries, expected):
+        start = time.perf_counter()
+        result = index.match(query)
+        timings.append((time.perf_counter() - start) * 1000)
+        hits += result is not None
+        correct += result is not None and result[0] == recipe_id
+    timings.sort()
+    return timings, hits, correct
+
+
+def report(label: str, timings: list, hits: int, correct: int) -> None:
+    p = lambda q: timings[min(len(timings) - 1, int(q * len(timings)))]
+    print(
+        f"{label:<12} matched {hits:>5}/{len(timings):<5} (correct {correct:>5})  "
+        f"mean {statistics.mean(timings):6.2f} ms  p50 {p(0.5):6.2f} ms  p99 {p(0.99):6.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--threshold", type=float, default=SEMANTIC_MATCH_THRESHOLD)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    keys = synthetic_keys(args.size, rng)
+
+    index = SemanticIndex(dimensions=args.dimensions, threshold=args.threshold)
+    start = time.perf_counter()
+    index.add_many((key, recipe_id) for recipe_id, key in enumerate(keys))
+    build_seconds = time.perf_counter() - start
+
+    # Measured on a second build, since tracing slows allocation down
+    tracemalloc.start()
+    traced = SemanticIndex(dimensions=args.dimensions)
+    traced.add_many((key, recipe_id) for recipe_id, key in enumerate(keys))
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del traced
+    print(
+        f"Indexed {len(index)} keys at {args.dimensions} dimensions in {build_seconds:.2f} s "
+        f"({len(index) / build_seconds:,.0f} keys/s); matrix {index.stats()['matrix_bytes'] / 2**20:.1f} MiB, "
+        f"total {memory / 2**20:.1f} MiB"
+    )
+
+    picks = [rng.randrange(len(keys)) for _ in range(args.queries)]
+    paraphrases = [paraphrase(keys[i], rng) for i in picks]
+    unrelated = [
+        "".join(rng.choices(string.ascii_lowercase + " ", k=rng.randint(8, 24))).strip() or "x"
+        for _ in range(args.queries)
+    ]
+
+    report("paraphrases", *time_matches(index, paraphrases, picks))
+    report("unrelated", *time_matches(index, unrelated, [-1] * len(unrelated)))
+
+
+if __name__ == "__main__":
+    main()
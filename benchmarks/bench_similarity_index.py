@@ -0,0 +1,116 @@
+"""
+Benchmark the similar-recipes index on a synthetic catalog.
+
+Builds an index of --size recipes, each with a few ingredients drawn from a
+bar's worth of names (written with amounts, as the model writes them) and a
+random tasting profile. Reports build time and memory, then times
+similar() for --queries random recipes: the whole call, which counts shared
+ingredients through the posting lists, scores the profiles and takes the
+top k. The first --check lookups are compared with a brute-force ranking
+over ingredient sets, which they must equal.
+
+    python benchmarks/bench_similarity_index.py [--size 100000] [--queries 1000] [--k 10] [--check 20]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from services.ingredients import recipe_ingredient_names
+from services.similarity_index import PROFILE_KEYS, SimilarityIndex
+
+SPIRITS = ["Gin", "Vodka", "White Rum", "Aged Rum", "Tequila", "Mezcal", "Bourbon", "Rye Whiskey", "Cognac", "Pisco"]
+MODIFIERS = [
+    "Campari", "Aperol", "Sweet Vermouth", "Dry Vermouth", "Triple Sec", "Maraschino Liqueur", "Green Chartreuse",
+    "Amaro Nonino", "Elderflower Liqueur", "Creme de Cassis", "Falernum", "Benedictine", "Coffee Liqueur",
+]
+MIXERS = [
+    "Lime Juice", "Lemon Juice", "Grapefruit Juice", "Pineapple Juice", "Simple Syrup", "Honey Syrup",
+    "Agave Syrup", "Orgeat", "Grenadine", "Soda Water", "Ginger Beer", "Tonic Water", "Egg White", "Prosecco",
+]
+BITTERS = ["Angostura Bitters", "Orange Bitters", "Peychaud's Bitters"]
+
+
+def synthetic_recipe(rng: random.Random) -> tuple:
+    ingredients = [{"name": f"2 oz (60 ml) {rng.choice(SPIRITS)}"}]
+    ingredients += [{"name": f"0.75 oz (22 ml) {name}"} for name in rng.sample(MODIFIERS, rng.randint(0, 2))]
+    ingredients += [{"name": f"0.5 oz (15 ml) {name}"} for name in rng.sample(MIXERS, rng.randint(1, 3))]
+    if rng.random() < 0.4:
+        ingredients.append({"name": f"2 dashes {rng.choice(BITTERS)}"})
+    profile = {key: rng.randint(0, 5) for key in PROFILE_KEYS}
+    return ingredients, profile
+
+
+def report(label: str, timings: list) -> None:
+    timings.sort()
+    p = lambda q: timings[min(len(timings) - 1, int(q * len(timings)))]
+    print(f"{label:<10} mean {statistics.mean(timings):6.3f} ms  p50 {p(0.5):6.3f} ms  p99 {p(0.99):6.3f} ms")
+
+
+def brute_force(index: SimilarityIndex, recipes: list, recipe_id: int, k: int) -> list:
+    """Top k by the documented formula, from Python sets, for checking."""
+    w = index.profile_weight
+    names = [set(recipe_ingredient_names(ingredients)) for ingredients, _ in recipes]
+    profiles = np.stack([index.profile(profile) for _, profile in recipes]).astype(np.float64)
+    source = names[recipe_id]
+    scores = []
+    for other, other_names in enumerate(names):
+        if other == recipe_id:
+            continue
+        cosine = len(source & other_names) / np.sqrt(len(source) * len(other_names))
+        distance = np.sum((profiles[recipe_id] - profiles[other]) ** 2)
+        scores.append(((1 - w) * cosine + w * (1 - distance / 4), other))
+    scores.sort(reverse=True)
+    return scores[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--check", type=int, default=20, help="lookups compared with a brute-force ranking")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    recipes = [synthetic_recipe(rng) for _ in range(args.size)]
+
+    index = SimilarityIndex()
+    start = time.perf_counter()
+    index.add_many((recipe_id, ingredients, profile) for recipe_id, (ingredients, profile) in enumerate(recipes))
+    build_seconds = time.perf_counter() - start
+    stats = index.stats()
+    print(
+        f"Indexed {len(index)} recipes, {stats['ingredients']} ingredients, in {build_seconds:.2f} s "
+        f"({len(index) / build_seconds:,.0f} recipes/s); arrays {stats['array_bytes'] / 2**20:.1f} MiB, "
+        f"postings {stats['posting_bytes'] / 2**20:.1f} MiB"
+    )
+
+    picks = [rng.randrange(args.size) for _ in range(args.queries)]
+    lookups = []
+    for recipe_id in picks:
+        start = time.perf_counter()
+        index.similar(recipe_id, args.k)
+        lookups.append((time.perf_counter() - start) * 1000)
+    report("similar", lookups)
+
+    mismatches = 0
+    for recipe_id in picks[:args.check]:
+        expected = brute_force(index, recipes, recipe_id, args.k)
+        got = index.similar(recipe_id, args.k)
+        # Ties may be ordered differently, so compare the scores
+        if not np.allclose([score for _, score in got], [score for score, _ in expected], atol=1e-5):
+            mismatches += 1
+    if args.check:
+        print(f"checked {min(args.check, len(picks))} lookups against brute force: {mismatches} differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark mixed read/write load on SQLite: the previous engine defaults
+against the configured engine profile.
+
+Each run imports --recipes synthetic recipes into a fresh on-disk database,
+then for --seconds keeps --readers tasks looking up random stored queries
+while --writers tasks store one new recipe per transaction, as inline
+generation used to. The defaults run uses one engine created as before
+(rollback journal, default pool) for both; the profile run reads through
+the query-only engine and writes through the writer engine from
+db.base.make_engine. SQL echo is disabled in both, so the comparison covers
+journal mode, pragmas and pools only.
+
+    python benchmarks/bench_sqlite_profile.py [--recipes 5000] [--readers 16] [--writers 2] [--seconds 10]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from bench_importer import synthetic_recipe
+from db.base import Base, make_engine
+from services.recipe_importer import import_recipes
+from services.recipe_service import create_recipes, search_recipe_by_query
+
+
+async def run_load(read_sessions, write_sessions, queries, args, rng) -> dict:
+    deadline = time.perf_counter() + args.seconds
+    latencies, writes, errors = [], [0], [0]
+    next_id = [args.recipes]
+
+    async def reader():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                async with read_sessions() as db:
+                    await search_recipe_by_query(db, rng.choice(queries))
+            except Exception:
+                errors[0] += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    async def writer():
+        while time.perf_counter() < deadline:
+            next_id[0] += 1
+            try:
+                async with write_sessions() as db:
+                    await create_recipes(db, [synthetic_recipe(next_id[0], rng)])
+            except Exception:
+                errors[0] += 1
+                continue
+            writes[0] += 1
+
+    await asyncio.gather(*(reader() for _ in range(args.readers)), *(writer() for _ in range(args.writers)))
+    latencies.sort()
+    return {
+        "reads_per_second": len(latencies) / args.seconds,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        "writes_per_second": writes[0] / args.seconds,
+        "errors": errors[0],
+    }
+
+
+async def run(args) -> None:
+    rng = random.Random(args.seed)
+    recipes = [synthetic_recipe(i, rng) for i in range(args.recipes)]
+    queries = [recipe["search_query"] for recipe in recipes]
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds}s over {args.recipes} recipes")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in ("defaults", "profile"):
+            url = f"sqlite+aiosqlite:///{Path(tmp) / f'{label}.db'}"
+            if label == "defaults":
+                write_engine = read_engine = create_async_engine(url)
+            else:
+                write_engine, read_engine = make_engine(url), make_engine(url, read_only=True)
+            write_sessions = async_sessionmaker(write_engine, class_=AsyncSession, expire_on_commit=False)
+            read_sessions = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+
+            async with write_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with write_sessions() as db:
+                await import_recipes(db, enumerate(recipes))
+
+            result = await run_load(read_sessions, write_sessions, queries, args, rng)
+            print(
+                f"{label:<9} reads {result['reads_per_second']:>8,.0f}/s  "
+                f"p50 {result['p50_ms']:6.2f} ms  p99 {result['p99_ms']:7.2f} ms  "
+                f"writes {result['writes_per_second']:>6,.0f}/s  errors {result['errors']}"
+            )
+            await write_engine.dispose()
+            if read_engine is not write_engine:
+                await read_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=5_000)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
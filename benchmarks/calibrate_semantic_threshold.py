@@ -0,0 +1,164 @@
+"""
+Calibrate SEMANTIC_MATCH_THRESHOLD on labelled query pairs.
+
+Each pair is a query and a stored key, labelled with whether serving the
+stored recipe answers the query: paraphrases of the same drink should match,
+variants (another spirit, style or flavour) and other drinks should not.
+Every pair is matched against an index holding only its stored key, through
+SemanticIndex.match, so the distinguishing-word rule applies. Prints
+precision and recall per threshold on the tuning pairs, and the lowest
+threshold with no wrong drink served, which is what the default is set from.
+That threshold is then checked on held-out pairs that were not used to
+choose it or the word lists.
+
+    python benchmarks/calibrate_semantic_threshold.py [--dimensions 256]
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.recipe_service import normalize_for_search
+from services.semantic_index import SemanticIndex
+
+# (query, stored key, the stored recipe answers the query)
+TUNING_PAIRS = [
+    # Paraphrases of the same drink
+    ("mezcal version of a margarita", "mezcal margarita", True),
+    ("old-fashioned with rye", "rye old fashioned", True),
+    ("a negroni made with mezcal", "mezcal negroni", True),
+    ("old fashioned with rum", "rum old fashioned", True),
+    ("classic dry martini", "dry martini", True),
+    ("whiskey sour with egg white", "whiskey sour", True),
+    ("frozen strawberry daiquiri", "frozen strawberry daiquiri", True),
+    ("strawberry daiquiri, frozen", "frozen strawberry daiquiri", True),
+    ("margarita on the rocks", "margarita", True),
+    ("old fashioned cocktail", "old fashioned", True),
+    ("the perfect manhattan", "perfect manhattan", True),
+    ("moscow mule in a copper mug", "moscow mule", True),
+    ("aperol spritz italian style", "aperol spritz", True),
+    ("tommy's margarita", "tommys margarita", True),
+    ("gin and tonic highball", "gin and tonic", True),
+    ("a mai tai like trader vic's", "mai tai", True),
+    ("sazerac new orleans style", "sazerac", True),
+    ("a mojito with lots of mint", "mojito", True),
+    ("manhattan stirred not shaken", "manhattan", True),
+    ("last word equal parts", "last word", True),
+    ("classic negroni", "negroni", True),
+    ("hemingway daiquiri with grapefruit", "grapefruit hemingway daiquiri", True),
+    ("paloma with grapefruit soda", "grapefruit paloma", True),
+    ("bees knees gin cocktail", "gin bees knees", True),
+    # Variants: another spirit, style or flavour
+    ("rum old fashioned", "old fashioned", False),
+    ("mezcal version of a margarita", "margarita", False),
+    ("smoky margarita", "margarita", False),
+    ("smoky old fashioned", "old fashioned", False),
+    ("old-fashioned with rye", "old fashioned", False),
+    ("mezcal negroni", "negroni", False),
+    ("vodka martini", "martini", False),
+    ("dirty martini", "martini", False),
+    ("spicy margarita", "margarita", False),
+    ("strawberry daiquiri", "daiquiri", False),
+    ("frozen margarita", "margarita", False),
+    ("rye manhattan", "manhattan", False),
+    ("espresso martini", "martini", False),
+    ("blood orange margarita", "margarita", False),
+    ("brandy alexander", "alexander", False),
+    ("margarita", "spicy margarita", False),
+    ("passion fruit martini", "martini", False),
+    ("gin old fashioned", "rum old fashioned", False),
+    # Other drinks
+    ("gin sour", "whiskey sour", False),
+    ("tequila sunrise", "tequila sour", False),
+    ("gin fizz", "gin sour", False),
+    ("whiskey smash", "whiskey sour", False),
+    ("white negroni", "negroni", False),
+    ("mezcal mule", "moscow mule", False),
+    ("rum punch", "planters punch", False),
+    ("corpse reviver", "reviver", False),
+    ("french martinez", "martinez", False),
+    ("black manhattan", "manhattan", False),
+    ("paper plane", "plane", False),
+    ("naked and famous", "naked", False),
+]
+
+# Not used for tuning; reported at the chosen threshold only
+HELD_OUT_PAIRS = [
+    ("a daiquiri shaken hard", "daiquiri", True),
+    ("sidecar with a sugar rim", "sidecar", True),
+    ("gimlet made with gin", "gin gimlet", True),
+    ("americano cocktail", "americano", True),
+    ("a tom collins in a tall glass", "tom collins", True),
+    ("cosmopolitan like in the nineties", "cosmopolitan", True),
+    ("dark and stormy with ginger beer", "ginger dark and stormy", True),
+    ("french 75 with champagne", "champagne french 75", True),
+    ("pina colada with coconut", "coconut pina colada", True),
+    ("the boulevardier", "boulevardier", True),
+    ("smoky negroni", "negroni", False),
+    ("smoky paloma", "paloma", False),
+    ("mezcal paloma", "paloma", False),
+    ("frozen pina colada", "pina colada", False),
+    ("vodka gimlet", "gin gimlet", False),
+    ("cherry sidecar", "sidecar", False),
+    ("honey daiquiri", "daiquiri", False),
+    ("pisco sour", "whiskey sour", False),
+    ("rum collins", "tom collins", False),
+    ("mango mojito", "mojito", False),
+    ("irish coffee", "irish mule", False),
+    ("gin rickey", "gin fizz", False),
+]
+
+
+def matched(query: str, stored: str, threshold: float, dimensions: int) -> bool:
+    index = SemanticIndex(dimensions=dimensions, threshold=threshold)
+    index.add(normalize_for_search(stored), 1)
+    return index.match(normalize_for_search(query)) is not None
+
+
+def evaluate(pairs, threshold: float, dimensions: int) -> Tuple[int, int, int]:
+    """(paraphrases served, paraphrases, wrong drinks served) at ``threshold``."""
+    outcomes = [(matched(query, stored, threshold, dimensions), label) for query, stored, label in pairs]
+    served = sum(hit and label for hit, label in outcomes)
+    wrong = sum(hit and not label for hit, label in outcomes)
+    return served, sum(label for _, _, label in pairs), wrong
+
+
+def report(label: str, pairs, threshold: float, dimensions: int) -> None:
+    served, positives, wrong = evaluate(pairs, threshold, dimensions)
+    precision = served / (served + wrong) if served + wrong else 1.0
+    print(
+        f"{label} {threshold:.2f}  served {served:>2}/{positives} paraphrases  "
+        f"wrong drinks {wrong:>2}  precision {precision:.2f}  recall {served / positives:.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dimensions", type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"{len(TUNING_PAIRS)} tuning pairs, {len(HELD_OUT_PAIRS)} held out")
+    chosen = None
+    for step in range(50, 96, 2):
+        threshold = step / 100
+        report("threshold", TUNING_PAIRS, threshold, args.dimensions)
+        if chosen is None and not evaluate(TUNING_PAIRS, threshold, args.dimensions)[2]:
+            chosen = threshold
+    print(f"Lowest threshold serving no wrong drink: {chosen}")
+    if chosen is None:
+        return
+
+    for query, stored, label in TUNING_PAIRS:
+        if label and not matched(query, stored, chosen, args.dimensions):
+            print(f"  missed at {chosen:.2f}: '{query}' -> '{stored}'")
+    report("held out ", HELD_OUT_PAIRS, chosen, args.dimensions)
+    for query, stored, label in HELD_OUT_PAIRS:
+        if matched(query, stored, chosen, args.dimensions) != label:
+            outcome = "missed" if label else "wrong drink"
+            print(f"  {outcome} at {chosen:.2f}: '{query}' -> '{stored}'")
+
+
+if __name__ == "__main__":
+    main()
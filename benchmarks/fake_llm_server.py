@@ -0,0 +1,125 @@
+"""
+Local OpenAI-compatible stub for load tests.
+
+Serves POST /v1/chat/completions with a valid recipe for the query named in
+the prompt, after --latency seconds (plus up to --jitter more, uniformly).
+A --error-rate fraction of calls fails with --error-status instead.
+Streaming requests get the recipe in --stream-chunks pieces followed by a
+usage chunk, like the real API with include_usage. Token usage is estimated
+at four characters per token.
+
+    python benchmarks/fake_llm_server.py [--port 8100] [--latency 0.8] [--jitter 0.4] [--error-rate 0.0]
+
+Point the service at it with OPENAI_BASE_URL=http://127.0.0.1:8100/v1 and
+any OPENAI_API_KEY.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_QUERY_RE = re.compile(r'recipe for: "(.*?)"')
+
+
+def fake_recipe(query: str) -> dict:
+    title = query.upper()
+    return {
+        "title": title,
+        "history": f"The {title}'s history is unknown; it was invented by a load test.",
+        "technique": "Shaken",
+        "glass_type": "Coupe",
+        "ingredients": [
+            {"name": "2 oz (60 ml) Gin", "oz": 2.0, "ml": 60},
+            {"name": "0.75 oz (22 ml) Lemon Juice", "oz": 0.75, "ml": 22},
+            {"name": "0.5 oz (15 ml) Simple Syrup", "oz": 0.5, "ml": 15},
+        ],
+        "tasting_profile": {"alcohol": 3, "bitter": 1, "sour": 3, "sweet": 2},
+        "method": [
+            "Ice: Fill a shaker with cubed ice.",
+            "Add ingredients: Pour in the gin, lemon juice and syrup.",
+            "Shake: Shake hard for 10-15 seconds.",
+            "Strain: Double-strain into a chilled coupe.",
+            "Garnish and serve: Garnish with a lemon twist.",
+        ],
+        "tip": "Taste and adjust the syrup.",
+    }
+
+
+def create_app(latency: float, jitter: float, error_rate: float, error_status: int, stream_chunks: int) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random()
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        match = _QUERY_RE.search(prompt)
+        content = json.dumps(fake_recipe(match.group(1) if match else "house cocktail"))
+        usage = {
+            "prompt_tokens": sum(len(message["content"]) for message in body["messages"]) // 4,
+            "completion_tokens": len(content) // 4,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "created": int(time.time()), "model": body["model"]}
+
+        await asyncio.sleep(latency + rng.uniform(0, jitter))
+        if rng.random() < error_rate:
+            return JSONResponse(
+                {"error": {"message": "Injected failure", "type": "server_error", "code": None}},
+                status_code=error_status,
+            )
+
+        if not body.get("stream"):
+            return {
+                **base,
+                "object": "chat.completion",
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }],
+                "usage": usage,
+            }
+
+        async def events():
+            size = max(1, -(-len(content) // stream_chunks))
+            for start in range(0, len(content), size):
+                chunk = {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {"content": content[start:start + size]}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.8, help="seconds before every response")
+    parser.add_argument("--jitter", type=float, default=0.4, help="up to this many extra seconds, uniformly")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--stream-chunks", type=int, default=40)
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.jitter, args.error_rate, args.error_status, args.stream_chunks)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Load test GET /recipe end to end: uvicorn, a file-backed SQLite database and
+a local fake LLM server (benchmarks/fake_llm_server.py).
+
+Imports --recipes synthetic recipes into a temporary database, starts the
+fake LLM and the service as subprocesses, then runs one scenario for every
+combination of --hit-ratios and --concurrency. A scenario sends --requests
+GET /recipe calls from that many concurrent clients over real HTTP; each
+call asks for a stored recipe with probability hit-ratio, and otherwise for
+a query never seen before, which the service has to generate. Every
+scenario reports requests/sec, p50/p95/p99 latency and status counts.
+
+Results are written as JSON to --output, together with the commit, the
+settings and /admin/stats from the end of the run. --compare prints each
+scenario's change against an earlier results file, so runs on two commits
+can be compared.
+
+    python benchmarks/load_test.py [--recipes 5000] [--requests 2000] [--hit-ratios 1.0,0.95,0.8]
+        [--concurrency 1,16,64] [--llm-latency 0.8] [--llm-jitter 0.4] [--llm-error-rate 0.0]
+        [--output load_test.json] [--compare baseline.json]
+
+Service settings (LLM_*, RECIPE_*, DB_*, SQLITE_*) are taken from the
+environment. LLM rate budgets default to off here so the stub, not the
+scheduler, sets the pace.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from bench_importer import synthetic_recipe
+from db.base import Base
+from services.recipe_importer import import_recipes
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def seed(database_url: str, recipes: List[dict]) -> None:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as db:
+        await import_recipes(db, enumerate(recipes))
+    await engine.dispose()
+
+
+async def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with status {process.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not start within {timeout:g}s")
+
+
+async def run_scenario(base_url: str, stored: List[str], hit_ratio: float, concurrency: int, args, rng) -> dict:
+    remaining = [args.requests]
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    hits_sent = [0]
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            if rng.random() < hit_ratio:
+                query = rng.choice(stored)
+                hits_sent[0] += 1
+            else:
+                # Random hex names, so misses never fuzzy-match each other
+                query = f"{uuid.uuid4().hex[:10]} cocktail"
+            start = time.perf_counter()
+            try:
+                response = await client.get("/recipe", params={"query": query})
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "name": f"hit={hit_ratio:g} c={concurrency}",
+        "hit_ratio": hit_ratio,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "hit_requests": hits_sent[0],
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "errors": sum(count for status, count in statuses.items() if status != "200"),
+        "statuses": dict(statuses),
+    }
+
+
+def print_scenario(result: dict, baseline: Optional[dict]) -> None:
+    line = (
+        f"{result['name']:<18} {result['rps']:>9,.1f} req/s  p50 {result['p50_ms']:8.2f} ms  "
+        f"p95 {result['p95_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}"
+    )
+    if baseline:
+        def change(key: str) -> str:
+            return f"{(result[key] / baseline[key] - 1) * 100:+.1f}%" if baseline[key] else "n/a"
+        line += f"  | vs baseline: req/s {change('rps')}, p99 {change('p99_ms')}"
+    print(line)
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    recipes = [synthetic_recipe(i, rng) for i in range(args.recipes)]
+    # Synthetic names have no cocktail keyword; the suffix passes validation and is canonicalized away
+    stored = [f"{recipe['search_query']} cocktail" for recipe in recipes]
+    hit_ratios = [float(value) for value in args.hit_ratios.split(",")]
+    concurrencies = [int(value) for value in args.concurrency.split(",")]
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(s["hit_ratio"], s["concurrency"]): s for s in json.load(f)["scenarios"]}
+
+    processes = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite+aiosqlite:///{Path(tmp) / 'load_test.db'}"
+        await seed(database_url, recipes)
+
+        llm_port, app_port = free_port(), free_port()
+        env = {
+            "LLM_REQUESTS_PER_MINUTE": "0",
+            "LLM_TOKENS_PER_MINUTE": "0",
+            "LOG_LEVEL": "ERROR",
+            **os.environ,
+            "DATABASE_URL": database_url,
+            "OPENAI_API_KEY": "load-test",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        }
+        try:
+            llm = subprocess.Popen([
+                sys.executable, str(Path(__file__).parent / "fake_llm_server.py"),
+                "--port", str(llm_port),
+                "--latency", str(args.llm_latency),
+                "--jitter", str(args.llm_jitter),
+                "--error-rate", str(args.llm_error_rate),
+            ])
+            processes.append(llm)
+            app = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port), "--log-level", "warning"],
+                cwd=ROOT, env=env,
+            )
+            processes.append(app)
+            base_url = f"http://127.0.0.1:{app_port}"
+            await wait_until_up(f"http://127.0.0.1:{llm_port}/docs", llm)
+            await wait_until_up(f"{base_url}/health", app)
+
+            print(
+                f"{args.recipes} stored recipes, {args.requests} requests per scenario, "
+                f"LLM {args.llm_latency:g}s +{args.llm_jitter:g}s, error rate {args.llm_error_rate:g}"
+            )
+            scenarios = []
+            for hit_ratio in hit_ratios:
+                for concurrency in concurrencies:
+                    result = await run_scenario(base_url, stored, hit_ratio, concurrency, args, rng)
+                    print_scenario(result, baseline.get((hit_ratio, concurrency)))
+                    scenarios.append(result)
+
+            async with httpx.AsyncClient(base_url=base_url) as client:
+                server_stats = (await client.get("/admin/stats")).json()
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+            for process in processes:
+                process.wait()
+
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": {
+            key: getattr(args, key)
+            for key in ("recipes", "requests", "hit_ratios", "concurrency", "llm_latency",
+                        "llm_jitter", "llm_error_rate", "seed")
+        },
+        "scenarios": scenarios,
+        "server_stats": server_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=5_000)
+    parser.add_argument("--requests", type=int, default=2_000, help="requests per scenario")
+    parser.add_argument("--hit-ratios", default="1.0,0.95,0.8", help="comma-separated fractions of stored queries")
+    parser.add_argument("--concurrency", default="1,16,64", help="comma-separated concurrent clients")
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--llm-jitter", type=float, default=0.4)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request client timeout in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="load_test.json")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    results = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,3 +8,116 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./data/app.db")
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Optional faster/cheaper model tried before OPENAI_MODEL
+OPENAI_FAST_MODEL = os.getenv("OPENAI_FAST_MODEL") or None
+# Optional OpenAI-compatible endpoint, e.g. a local fake server for testing
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# In-process cache of finished recipe responses, keyed by normalized query
+RECIPE_CACHE_MAX_ENTRIES = int(os.getenv("RECIPE_CACHE_MAX_ENTRIES", "2048"))
+RECIPE_CACHE_TTL_SECONDS = float(os.getenv("RECIPE_CACHE_TTL_SECONDS", "3600"))
+# Cache-Control sent with recipes from GET /recipe, which also carry an ETag
+# and Last-Modified so browsers and CDNs can revalidate with a 304
+RECIPE_HTTP_CACHE_CONTROL = os.getenv("RECIPE_HTTP_CACHE_CONTROL", "public, max-age=3600")
+
+# Response compression: gzip, or brotli when installed, for bodies of at
+# least COMPRESSION_MIN_SIZE bytes. Recipes keep their compressed bytes while
+# cached; static assets are compressed once at startup at the highest levels
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+STATIC_DIR = os.getenv("STATIC_DIR", "static")
+# Static URLs are not fingerprinted, so by default clients revalidate them with
+# their ETag and get a 304 until the file changes
+STATIC_CACHE_CONTROL = os.getenv("STATIC_CACHE_CONTROL", "no-cache")
+
+# Approximate matching of misspelled queries against stored titles and aliases
+# (edit similarity, 0-1). Set to a value above 1 to disable.
+FUZZY_MATCH_THRESHOLD = float(os.getenv("FUZZY_MATCH_THRESHOLD", "0.8"))
+
+# Matching of paraphrased queries against stored titles and aliases: cosine
+# similarity (0-1) of hashed word and character-trigram vectors, and the
+# vector width. The default is the lowest threshold that serves no wrong drink
+# in benchmarks/calibrate_semantic_threshold.py. Set it above 1 to disable.
+SEMANTIC_MATCH_THRESHOLD = float(os.getenv("SEMANTIC_MATCH_THRESHOLD", "0.78"))
+SEMANTIC_DIMENSIONS = int(os.getenv("SEMANTIC_DIMENSIONS", "256"))
+
+# GET /recipe/similar: the weight (0-1) of tasting-profile closeness against
+# shared ingredients, and the most results one request may ask for
+SIMILAR_PROFILE_WEIGHT = float(os.getenv("SIMILAR_PROFILE_WEIGHT", "0.4"))
+SIMILAR_MAX_RESULTS = int(os.getenv("SIMILAR_MAX_RESULTS", "50"))
+
+# GET /recipe/by-ingredient: most ingredients per search and results per page
+INGREDIENT_SEARCH_MAX_TERMS = int(os.getenv("INGREDIENT_SEARCH_MAX_TERMS", "10"))
+INGREDIENT_SEARCH_MAX_LIMIT = int(os.getenv("INGREDIENT_SEARCH_MAX_LIMIT", "100"))
+
+# POST /recipe/batch: maximum queries per request and concurrent generations
+RECIPE_BATCH_MAX_QUERIES = int(os.getenv("RECIPE_BATCH_MAX_QUERIES", "200"))
+RECIPE_BATCH_GENERATION_CONCURRENCY = int(os.getenv("RECIPE_BATCH_GENERATION_CONCURRENCY", "8"))
+
+# Write-behind persistence of generated recipes: recipes per transaction and
+# the longest a queued recipe waits before it is written
+RECIPE_WRITE_BATCH_SIZE = int(os.getenv("RECIPE_WRITE_BATCH_SIZE", "100"))
+RECIPE_WRITE_FLUSH_SECONDS = float(os.getenv("RECIPE_WRITE_FLUSH_SECONDS", "0.05"))
+
+# Database engine profile. SQLite pragmas are applied to every new connection;
+# requests read through a pool of query-only connections while writes share
+# a small separate pool.
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+DB_WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "1"))
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative: KiB, so 64 MiB
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# LLM call scheduling: concurrent completions, per-minute rate budgets (0
+# disables a budget), retries with jittered exponential backoff on 429/5xx,
+# and the circuit breaker that fails fast while the provider is down
+LLM_MAX_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", "16"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "8"))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+
+# LLM latency control: total budget per generation, how long the fast model
+# gets before OPENAI_MODEL is started alongside it, and when to fire a hedged
+# duplicate request within a tier: a delay in seconds, an observed latency
+# percentile of that tier such as "p95", or "off"
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "30"))
+LLM_FAST_TIER_TIMEOUT_SECONDS = float(os.getenv("LLM_FAST_TIER_TIMEOUT_SECONDS", "8"))
+LLM_HEDGE_AFTER = os.getenv("LLM_HEDGE_AFTER", "off").strip().lower()
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# Asynchronous generation jobs (Prefer: respond-async): longest long-poll on
+# GET /recipe/jobs/{id} and how long finished jobs are kept
+RECIPE_JOB_MAX_WAIT_SECONDS = float(os.getenv("RECIPE_JOB_MAX_WAIT_SECONDS", "30"))
+RECIPE_JOB_RETENTION_SECONDS = float(os.getenv("RECIPE_JOB_RETENTION_SECONDS", "86400"))
+# The worker running a job holds it for RECIPE_JOB_LEASE_SECONDS, renewed while
+# it runs, so jobs of a worker that died are taken over once that lapses.
+# Long-polls on jobs running in another worker check every RECIPE_JOB_POLL_SECONDS
+RECIPE_JOB_LEASE_SECONDS = float(os.getenv("RECIPE_JOB_LEASE_SECONDS", "60"))
+RECIPE_JOB_POLL_SECONDS = float(os.getenv("RECIPE_JOB_POLL_SECONDS", "0.25"))
+
+# Negative cache: validator rejections (keyed by the exact query) and failed
+# generations (keyed by normalized query) are answered from memory until
+# their TTL runs out
+NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "10000"))
+NEGATIVE_CACHE_REJECTION_TTL_SECONDS = float(os.getenv("NEGATIVE_CACHE_REJECTION_TTL_SECONDS", "86400"))
+NEGATIVE_CACHE_FAILURE_TTL_SECONDS = float(os.getenv("NEGATIVE_CACHE_FAILURE_TTL_SECONDS", "30"))
+
+# Generation leases between worker processes sharing the database (uvicorn
+# --workers): a worker claims a normalized query in the generation_leases
+# table before generating it, and the others wait for the result it
+# publishes there, polling every GENERATION_LEASE_POLL_SECONDS. The owner
+# renews its lease while generating; one whose worker died expires after
+# GENERATION_LEASE_SECONDS. Published results stay readable for
+# GENERATION_RESULT_TTL_SECONDS, failures for NEGATIVE_CACHE_FAILURE_TTL_SECONDS
+GENERATION_LEASES = os.getenv("GENERATION_LEASES", "true").lower() in ("1", "true", "yes")
+GENERATION_LEASE_SECONDS = float(os.getenv("GENERATION_LEASE_SECONDS", "60"))
+GENERATION_LEASE_POLL_SECONDS = float(os.getenv("GENERATION_LEASE_POLL_SECONDS", "0.1"))
+GENERATION_RESULT_TTL_SECONDS = float(os.getenv("GENERATION_RESULT_TTL_SECONDS", "60"))
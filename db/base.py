@@ -1,26 +1,112 @@
+from typing import List
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from core.config import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from core.config import (
+    DATABASE_URL,
+    DB_ECHO,
+    DB_READ_POOL_SIZE,
+    DB_WRITE_POOL_SIZE,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE,
+    SQLITE_BUSY_TIMEOUT_MS,
+)
 
 Base = declarative_base()
 
-# Create async engine
-engine = create_async_engine(DATABASE_URL, echo=True)
 
-# Create async session factory
+def is_sqlite_memory(url: str) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+
+def sqlite_pragmas(read_only: bool = False) -> List[str]:
+    # busy_timeout comes first so the remaining pragmas wait for a busy writer
+    pragmas = [f"busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}"]
+    if not read_only:
+        # The journal mode is stored in the database file; readers inherit it
+        pragmas.append(f"journal_mode = {SQLITE_JOURNAL_MODE}")
+    pragmas += [
+        f"synchronous = {SQLITE_SYNCHRONOUS}",
+        f"mmap_size = {SQLITE_MMAP_SIZE}",
+        f"cache_size = {SQLITE_CACHE_SIZE}",
+    ]
+    if read_only:
+        pragmas.append("query_only = ON")
+    return pragmas
+
+
+def make_engine(url: str = DATABASE_URL, read_only: bool = False) -> AsyncEngine:
+    """Create an async engine with the configured profile.
+
+    SQLite file databases get the connect-time pragmas from
+    ``sqlite_pragmas`` and a queue pool sized by DB_READ_POOL_SIZE or
+    DB_WRITE_POOL_SIZE. In-memory databases use a single shared connection,
+    so readers and writers see the same data.
+    """
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_async_engine(url, echo=DB_ECHO)
+
+    if is_sqlite_memory(url):
+        return create_async_engine(
+            url, echo=DB_ECHO, poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+
+    new_engine = create_async_engine(
+        url,
+        echo=DB_ECHO,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=DB_READ_POOL_SIZE if read_only else DB_WRITE_POOL_SIZE,
+        max_overflow=0,
+    )
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(new_engine.sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+    return new_engine
+
+
+# Writer engine: schema setup, the background recipe writer and imports
+engine = make_engine(DATABASE_URL)
+# Read-only engine for request handlers; the same engine for in-memory databases
+read_engine = engine if is_sqlite_memory(DATABASE_URL) else make_engine(DATABASE_URL, read_only=True)
+
+# Create async session factories
 AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 async def init_db():
+    from db.migrations import upgrade
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade)
 
 
 async def get_db():
-    async with AsyncSessionLocal() as session:
+    async with AsyncReadSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
 
+
+async def dispose_engines():
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
@@ -0,0 +1,199 @@
+"""
+Lightweight in-place schema upgrades for existing SQLite databases.
+
+``Base.metadata.create_all`` only creates missing tables, so columns and
+indexes added to existing tables are applied here. Derived lookup keys and
+query aliases are recomputed whenever ``LOOKUP_KEY_VERSION`` is bumped,
+which is tracked in SQLite's ``PRAGMA user_version``. Serialized responses are
+filled in for any row that lacks one.
+"""
+import logging
+from pydantic import ValidationError
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever normalize_for_search changes so stored keys are recomputed
+LOOKUP_KEY_VERSION = 4
+
+
+def upgrade(conn: Connection) -> None:
+    from models.generation_job import GenerationJob
+    from models.recipe import Recipe
+
+    tables = (Recipe.__table__, GenerationJob.__table__)
+    for table in tables:
+        _add_missing_columns(conn, table)
+    supersede_duplicate_jobs(conn)
+    for table in tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+    version = conn.execute(text("PRAGMA user_version")).scalar() or 0
+    if version < LOOKUP_KEY_VERSION:
+        backfill_lookup_keys(conn, recompute=True)
+        rebuild_aliases(conn)
+        conn.execute(text(f"PRAGMA user_version = {LOOKUP_KEY_VERSION}"))
+    else:
+        backfill_lookup_keys(conn)
+    backfill_response_json(conn)
+
+
+def _add_missing_columns(conn: Connection, table) -> None:
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        column_type = column.type.compile(dialect=conn.dialect)
+        logger.info(f"Adding column {table.name}.{column.name}")
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def supersede_duplicate_jobs(conn: Connection) -> int:
+    """Keep the newest active job per query and point the others at it.
+
+    Databases from before the unique index on active query keys can hold
+    several; the index cannot be built until only one is left.
+    """
+    rows = conn.execute(
+        text(
+            "SELECT id, query_key FROM generation_jobs WHERE status IN ('pending', 'running') "
+            "ORDER BY created_at DESC, id"
+        )
+    ).all()
+    kept, updates = {}, []
+    for job_id, query_key in rows:
+        if query_key in kept:
+            updates.append({"id": job_id, "superseded_by": kept[query_key]})
+        else:
+            kept[query_key] = job_id
+
+    if updates:
+        conn.execute(
+            text(
+                "UPDATE generation_jobs SET status = 'superseded', superseded_by = :superseded_by, "
+                "owner = NULL, lease_expires_at = NULL WHERE id = :id"
+            ),
+            updates,
+        )
+        logger.info(f"Superseded {len(updates)} duplicate generation jobs")
+    return len(updates)
+
+
+def backfill_lookup_keys(conn: Connection, recompute: bool = False) -> int:
+    """Fill lookup_key/title_key for rows that are missing them.
+
+    With ``recompute`` every row is rewritten. When several rows normalize to
+    the same lookup key, the oldest row keeps it and the others fall back to
+    title-only matching, since lookup_key is unique.
+    """
+    from services.recipe_service import recipe_lookup_keys
+
+    if recompute:
+        conn.execute(text("UPDATE recipes SET lookup_key = NULL, title_key = NULL"))
+
+    taken = {
+        row[0] for row in conn.execute(
+            text("SELECT lookup_key FROM recipes WHERE lookup_key IS NOT NULL")
+        )
+    }
+    rows = conn.execute(
+        text("SELECT id, search_query, title FROM recipes WHERE title_key IS NULL ORDER BY id")
+    ).all()
+
+    updates = []
+    for recipe_id, search_query, title in rows:
+        lookup_key, title_key = recipe_lookup_keys(search_query, title)
+        if lookup_key in taken:
+            lookup_key = None
+        elif lookup_key is not None:
+            taken.add(lookup_key)
+        updates.append({"id": recipe_id, "lookup_key": lookup_key, "title_key": title_key})
+
+    if updates:
+        conn.execute(
+            text("UPDATE recipes SET lookup_key = :lookup_key, title_key = :title_key WHERE id = :id"),
+            updates,
+        )
+        logger.info(f"Backfilled lookup keys for {len(updates)} recipes")
+    return len(updates)
+
+
+def backfill_response_json(conn: Connection) -> int:
+    """Serialize the API response for rows stored without one.
+
+    Rows that no longer validate as a RecipeResponse are left empty and keep
+    being rebuilt from their columns on read.
+    """
+    from models.recipe import Recipe
+    from schemas.recipe import RecipeResponse
+
+    table = Recipe.__table__
+    columns = ["title", "history", "technique", "glass_type", "ingredients", "tasting_profile", "method", "tip"]
+    rows = conn.execute(
+        select(table.c.id, *(table.c[name] for name in columns))
+        .where(table.c.response_json.is_(None))
+    ).all()
+
+    updates = []
+    for row in rows:
+        try:
+            recipe_response = RecipeResponse.model_validate(dict(zip(columns, row[1:])))
+        except ValidationError:
+            continue
+        updates.append({"id": row[0], "response_json": recipe_response.model_dump_json()})
+
+    if updates:
+        conn.execute(
+            text("UPDATE recipes SET response_json = :response_json WHERE id = :id"),
+            updates,
+        )
+        logger.info(f"Serialized responses for {len(updates)} recipes")
+    return len(updates)
+
+
+def rebuild_aliases(conn: Connection) -> int:
+    """Recompute every alias key from the stored phrasings.
+
+    Each recipe's own search query and title are registered first, oldest
+    recipe first, followed by aliases recorded after generation. The first
+    mapping for a key wins.
+    """
+    from services.recipe_service import normalize_for_search
+
+    recorded = conn.execute(
+        text("SELECT alias, recipe_id, created_at FROM recipe_aliases ORDER BY id")
+    ).all()
+    recipes = conn.execute(
+        text("SELECT id, search_query, title, created_at FROM recipes ORDER BY id")
+    ).all()
+
+    candidates = []
+    for recipe_id, search_query, title, created_at in recipes:
+        candidates.append((search_query, recipe_id, created_at))
+        candidates.append((title, recipe_id, created_at))
+    candidates.extend(recorded)
+
+    rows = {}
+    for alias, recipe_id, created_at in candidates:
+        alias_key = normalize_for_search(alias)
+        if alias_key and alias_key not in rows:
+            rows[alias_key] = {
+                "alias_key": alias_key,
+                "alias": alias.strip(),
+                "recipe_id": recipe_id,
+                "created_at": created_at,
+            }
+
+    conn.execute(text("DELETE FROM recipe_aliases"))
+    if rows:
+        conn.execute(
+            text(
+                "INSERT INTO recipe_aliases (alias_key, alias, recipe_id, created_at) "
+                "VALUES (:alias_key, :alias, :recipe_id, :created_at)"
+            ),
+            list(rows.values()),
+        )
+        logger.info(f"Rebuilt {len(rows)} recipe aliases")
+    return len(rows)
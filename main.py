@@ -1,12 +1,20 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Header, HTTPException, Request
 from contextlib import asynccontextmanager
+from typing import Optional
 import logging
 import os
 from fastapi.middleware.cors import CORSMiddleware
-from db.base import init_db
-from api.routes import router
+from core.config import STATIC_CACHE_CONTROL
+from db.base import init_db, dispose_engines, AsyncReadSessionLocal
+from services.recipe_service import load_fuzzy_index, load_semantic_index, load_similarity_index, load_ingredient_index
+from services.recipe_writer import get_recipe_writer
+from services.generation_jobs import get_generation_jobs
+from services.generation_leases import get_generation_leases
+from services.compression import CompressionMiddleware
+from services.static_assets import get_static_assets
+from api.routes import router, run_generation_job
+from api.admin import router as admin_router
+from api.metrics import router as metrics_router
 
 
 logging.basicConfig(
@@ -22,9 +30,28 @@ async def lifespan(app: FastAPI):
     logger.info("Initializing database...")
     await init_db()
     logger.info("Database initialized successfully")
+    async with AsyncReadSessionLocal() as db:
+        fuzzy_keys = await load_fuzzy_index(db)
+        semantic_keys = await load_semantic_index(db)
+        similarity_recipes = await load_similarity_index(db)
+        ingredient_recipes = await load_ingredient_index(db)
+    logger.info(f"Fuzzy match index loaded with {fuzzy_keys} keys")
+    logger.info(f"Semantic match index loaded with {semantic_keys} keys")
+    logger.info(f"Similarity index loaded with {similarity_recipes} recipes")
+    logger.info(f"Ingredient index loaded with {ingredient_recipes} recipes")
+    static_files = get_static_assets().stats()["files"]
+    logger.info(f"Loaded and compressed {static_files} static files")
+    expired_leases = await get_generation_leases().prune()
+    logger.info(f"Pruned {expired_leases} expired generation leases")
+    resumed_jobs = await get_generation_jobs().resume(run_generation_job)
+    logger.info(f"Resumed {resumed_jobs} generation jobs")
     yield
     
     logger.info("Shutting down...")
+    await get_generation_jobs().close()
+    await get_recipe_writer().close()
+    logger.info("Generated recipes written")
+    await dispose_engines()
 
 
 app = FastAPI(
@@ -43,18 +70,36 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 
 app.include_router(router)
-
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-
-@app.get("/")
-async def root():
-    ui_path = os.path.join("static", "index.html")
-    if os.path.exists(ui_path):
-        return FileResponse(ui_path)
+app.include_router(admin_router)
+app.include_router(metrics_router)
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def static_file(
+    request: Request,
+    path: str,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    asset = get_static_assets().get(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return asset.response(STATIC_CACHE_CONTROL, if_none_match, accept_encoding, head=request.method == "HEAD")
+
+
+@app.api_route("/", methods=["GET", "HEAD"])
+async def root(
+    request: Request,
+    if_none_match: Optional[str] = Header(None, include_in_schema=False),
+    accept_encoding: Optional[str] = Header(None, include_in_schema=False),
+):
+    ui = get_static_assets().get("index.html")
+    if ui is not None:
+        # The page keeps its URL across deploys, so it is revalidated rather than cached outright
+        return ui.response("no-cache", if_none_match, accept_encoding, head=request.method == "HEAD")
     return {"message": "Welcome to AI Recipe Fallback Service"}
 
 
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Float, Index, Integer, String, Text, DateTime, text
+from datetime import datetime, timezone
+from db.base import Base
+
+
+class GenerationJob(Base):
+    """An asynchronous recipe generation requested with ``Prefer: respond-async``."""
+    __tablename__ = "generation_jobs"
+    __table_args__ = (
+        # One active job per normalized query, across every worker
+        Index(
+            "ix_generation_jobs_active_query_key",
+            "query_key",
+            unique=True,
+            sqlite_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+
+    id = Column(String, primary_key=True)
+    query_key = Column(String, nullable=False, index=True)  # normalize_for_search(query)
+    query = Column(String, nullable=False)
+    status = Column(String, nullable=False, index=True)  # pending, running, succeeded, failed, superseded
+    response_json = Column(Text, nullable=True)  # Serialized RecipeResponse once succeeded
+    error_status = Column(Integer, nullable=True)  # HTTP status GET /recipe would have returned
+    error = Column(Text, nullable=True)
+    owner = Column(String, nullable=True)  # Worker running the job; None once released
+    lease_expires_at = Column(Float, nullable=True)  # Unix time, renewed while the job runs
+    superseded_by = Column(String, nullable=True)  # Job answering the same query in its place
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Float, Integer, String, Text
+from db.base import Base
+
+
+class GenerationLease(Base):
+    """A worker's claim on generating a normalized query, then its outcome.
+
+    Shared by every worker process using the database. While the lease is
+    held, other workers wait for the outcome instead of generating the query
+    again. The owner records the serialized response, or the error it
+    answered with, and the row is read by the other workers until
+    ``expires_at``. A lease whose owner died expires and can be taken over.
+    """
+    __tablename__ = "generation_leases"
+
+    key = Column(String, primary_key=True)  # normalize_for_search(query)
+    owner = Column(String, nullable=False)  # Token of the claim, unique per generation
+    expires_at = Column(Float, nullable=False, index=True)  # Unix time
+    response_json = Column(Text, nullable=True)  # Serialized RecipeResponse once generated
+    error_status = Column(Integer, nullable=True)  # HTTP status of a failed generation
+    error = Column(Text, nullable=True)
+    error_headers = Column(Text, nullable=True)  # JSON object, e.g. Retry-After
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, ForeignKey
 from sqlalchemy.sql import func
 from datetime import datetime, timezone
 from db.base import Base
@@ -10,6 +10,8 @@ class Recipe(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String, nullable=False, index=True)
     search_query = Column(String, nullable=True, index=True)  # Store original query for matching
+    lookup_key = Column(String, nullable=True, unique=True, index=True)  # normalize_for_search(search_query or title)
+    title_key = Column(String, nullable=True, index=True)  # normalize_for_search(title)
     history = Column(Text, nullable=True)
     technique = Column(String, nullable=True)
     glass_type = Column(String, nullable=True)
@@ -17,6 +19,18 @@ class Recipe(Base):
     tasting_profile = Column(JSON, nullable=True)
     method = Column(JSON, nullable=False)
     tip = Column(Text, nullable=True)
+    response_json = Column(Text, nullable=True)  # Serialized RecipeResponse, served as-is on reads
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+
+
+class RecipeAlias(Base):
+    """Maps a normalized query phrasing to the recipe that answers it."""
+    __tablename__ = "recipe_aliases"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    alias_key = Column(String, nullable=False, unique=True, index=True)  # normalize_for_search(alias)
+    alias = Column(String, nullable=False)  # Raw phrasing, kept so keys can be recomputed
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
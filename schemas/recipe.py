@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 
+from core.config import RECIPE_BATCH_MAX_QUERIES
+
 
 class Ingredient(BaseModel):
     name: str = Field(..., description="Ingredient name", min_length=1)
@@ -64,3 +66,56 @@ class RecipeResponse(BaseModel):
         if v is not None and (not v or not v.strip()):
             return None
         return v.strip() if v else None
+
+
+class RecipeBatchRequest(BaseModel):
+    queries: List[str] = Field(
+        ..., description="Cocktail names or queries", min_length=1, max_length=RECIPE_BATCH_MAX_QUERIES
+    )
+
+
+class RecipeBatchItem(BaseModel):
+    query: str = Field(..., description="Query as submitted")
+    status: int = Field(..., description="HTTP status this query would have returned from GET /recipe")
+    recipe: Optional[RecipeResponse] = Field(None, description="Recipe, when status is 200")
+    error: Optional[str] = Field(None, description="Error detail, when status is not 200")
+
+
+class RecipeBatchResponse(BaseModel):
+    results: List[RecipeBatchItem] = Field(..., description="One result per query, in request order")
+
+
+class RecipeJob(BaseModel):
+    job_id: str = Field(..., description="Job id, polled at GET /recipe/jobs/{job_id}")
+    query: str = Field(..., description="Query the job generates a recipe for")
+    status: str = Field(..., description="pending, running, succeeded or failed")
+    recipe: Optional[RecipeResponse] = Field(None, description="Recipe, when status is succeeded")
+    error_status: Optional[int] = Field(None, description="HTTP status GET /recipe would have returned, when failed")
+    error: Optional[str] = Field(None, description="Error detail, when failed")
+
+
+class SimilarRecipe(BaseModel):
+    title: str = Field(..., description="Title of the similar recipe")
+    similarity: float = Field(..., description="Closeness of ingredients and tasting profile, at most 1")
+    recipe: RecipeResponse = Field(..., description="The similar recipe")
+
+
+class RecipeSimilarResponse(BaseModel):
+    query: str = Field(..., description="Query as submitted")
+    title: str = Field(..., description="Title of the stored recipe the query resolved to")
+    similar: List[SimilarRecipe] = Field(..., description="Most similar stored recipes, most similar first")
+
+
+class IngredientSearchResult(BaseModel):
+    title: str = Field(..., description="Recipe title")
+    matched: int = Field(..., description="How many of the searched ingredients the recipe uses")
+    recipe: RecipeResponse = Field(..., description="The recipe")
+
+
+class RecipeIngredientSearchResponse(BaseModel):
+    ingredients: List[str] = Field(..., description="Searched ingredients, normalized")
+    match: str = Field(..., description="all or any")
+    total: int = Field(..., description="Recipes matching the search")
+    offset: int = Field(..., description="Position of the first result")
+    limit: int = Field(..., description="Most results in this page")
+    results: List[IngredientSearchResult] = Field(..., description="One page of matching recipes")
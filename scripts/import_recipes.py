@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.base import AsyncSessionLocal, init_db
+from services.recipe_importer import DEFAULT_CHUNK_SIZE, import_recipe_file
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Import recipes from an NDJSON file or a JSON array file."
+    )
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    logger.info("Initializing database...")
+    await init_db()
+
+    async with AsyncSessionLocal() as db:
+        stats = await import_recipe_file(db, args.path, args.chunk_size)
+
+    logger.info(f"Import complete in {stats['seconds']:.2f}s ({stats['rows_per_second']:,} rows/s)")
+    logger.info(f"  Imported: {stats['imported']} recipes")
+    logger.info(f"  Aliased: {stats['aliased']} (title already stored)")
+    logger.info(f"  Duplicates: {stats['duplicates']}")
+    logger.info(f"  Invalid: {stats['invalid']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
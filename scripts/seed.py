@@ -4,8 +4,8 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from db.base import get_db, init_db
-from services.recipe_service import create_recipe, search_recipe_by_query
+from db.base import AsyncSessionLocal, init_db
+from services.recipe_importer import import_recipes
 from mock.mock_recipes import get_mock_recipes
 import logging
 
@@ -21,32 +21,13 @@ async def seed_database():
         logger.info("Initializing database...")
         await init_db()
         
-        async for db in get_db():
-            mock_recipes = get_mock_recipes()
-            
-            created_count = 0
-            skipped_count = 0
-            
-            for recipe_data in mock_recipes:
-                query = recipe_data.get("search_query", recipe_data["title"])
-                existing = await search_recipe_by_query(db, query)
-                
-                if existing:
-                    logger.info(f"Skipping '{recipe_data['title']}' - already exists")
-                    skipped_count += 1
-                    continue
-                
-                try:
-                    await create_recipe(db, recipe_data)
-                    created_count += 1
-                    logger.info(f"Created recipe: {recipe_data['title']}")
-                except Exception as e:
-                    logger.error(f"Error creating recipe '{recipe_data['title']}': {e}")
+        async with AsyncSessionLocal() as db:
+            # Recipes already in the database are left as they are
+            stats = await import_recipes(db, enumerate(get_mock_recipes()), update_existing=False)
             
             logger.info(f"Seeding complete!")
-            logger.info(f"  Created: {created_count} recipes")
-            logger.info(f"  Skipped: {skipped_count} recipes")
-            break
+            logger.info(f"  Imported: {stats['imported']} recipes")
+            logger.info(f"  Skipped: {stats['existing'] + stats['duplicates'] + stats['invalid']} recipes")
         
     except Exception as e:
         logger.error(f"Error seeding database: {e}", exc_info=True)
@@ -0,0 +1,188 @@
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.config import FUZZY_MATCH_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# Shorter words are only matched exactly; one edit changes them too much
+MIN_FUZZY_WORD_LENGTH = 4
+MAX_CANDIDATES = 16
+SCORE_BUCKETS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0)
+
+
+def single_deletes(word: str) -> Set[str]:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def edit_similarity(a: str, b: str, min_similarity: float = 0.0) -> float:
+    """1 - Levenshtein distance / longer length, with early exit.
+
+    Returns 0.0 as soon as the distance cannot stay within the bound implied
+    by ``min_similarity``.
+    """
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 1.0
+    max_distance = math.floor((1 - min_similarity) * longest)
+    if abs(len(a) - len(b)) > max_distance:
+        return 0.0
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, char_b in enumerate(b, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            )
+            current.append(cost)
+            row_min = min(row_min, cost)
+        if row_min > max_distance:
+            return 0.0
+        previous = current
+    return 1 - previous[-1] / longest
+
+
+class FuzzyIndex:
+    """In-memory approximate matcher over canonical recipe keys (titles and aliases).
+
+    Misspellings are resolved per word with symmetric single-delete
+    neighborhoods: a word and a vocabulary entry one edit apart always share a
+    delete variant, so corrections are a handful of dict probes. Keys holding a
+    correction of every query word (with the same word count) are found by set
+    intersection and then ranked by whole-key edit similarity. Lookup cost is
+    bounded by query length and posting sizes, not by catalog size.
+    """
+
+    def __init__(self, threshold: float = FUZZY_MATCH_THRESHOLD):
+        self.threshold = threshold
+        self._keys: List[str] = []
+        self._recipe_ids: List[int] = []
+        self._key_ids: Dict[str, int] = {}
+        # (word, words in key) -> ids of keys containing the word
+        self._postings: Dict[Tuple[str, int], Set[int]] = {}
+        self._vocabulary: Set[str] = set()
+        # word or single-delete variant -> vocabulary words producing it
+        self._variants: Dict[str, Set[str]] = {}
+        self.lookups = 0
+        self.matches = 0
+        self.score_counts = [0] * (len(SCORE_BUCKETS) + 1)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, recipe_id: int) -> None:
+        # Like the alias table, the first mapping for a key wins
+        if not key or key in self._key_ids:
+            return
+        doc_id = len(self._keys)
+        self._keys.append(key)
+        self._recipe_ids.append(recipe_id)
+        self._key_ids[key] = doc_id
+
+        words = key.split()
+        for word in set(words):
+            self._postings.setdefault((word, len(words)), set()).add(doc_id)
+            if word not in self._vocabulary:
+                self._vocabulary.add(word)
+                self._variants.setdefault(word, set()).add(word)
+                if len(word) >= MIN_FUZZY_WORD_LENGTH:
+                    for variant in single_deletes(word):
+                        self._variants.setdefault(variant, set()).add(word)
+
+    def add_many(self, entries: Iterable[Tuple[str, int]]) -> None:
+        for key, recipe_id in entries:
+            self.add(key, recipe_id)
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._recipe_ids.clear()
+        self._key_ids.clear()
+        self._postings.clear()
+        self._vocabulary.clear()
+        self._variants.clear()
+
+    def corrections(self, word: str) -> Set[str]:
+        """Vocabulary words within one symmetric delete of ``word``."""
+        if word in self._vocabulary:
+            return {word}
+        if len(word) < MIN_FUZZY_WORD_LENGTH - 1:
+            return set()
+        found: Set[str] = set()
+        for probe in single_deletes(word) | {word}:
+            found.update(self._variants.get(probe, ()))
+        return {candidate for candidate in found if len(candidate) >= MIN_FUZZY_WORD_LENGTH}
+
+    def candidates(self, key: str) -> List[int]:
+        words = key.split()
+        word_count = len(words)
+        doc_sets = []
+        for word in dict.fromkeys(words):
+            postings = [
+                self._postings[(correction, word_count)]
+                for correction in self.corrections(word)
+                if (correction, word_count) in self._postings
+            ]
+            if not postings:
+                return []
+            doc_sets.append(postings[0] if len(postings) == 1 else set().union(*postings))
+
+        doc_sets.sort(key=len)
+        found = doc_sets[0].intersection(*doc_sets[1:])
+        if len(found) > MAX_CANDIDATES:
+            found = sorted(found, key=lambda d: abs(len(self._keys[d]) - len(key)))[:MAX_CANDIDATES]
+        return list(found)
+
+    def match(self, key: str) -> Optional[Tuple[int, str, float]]:
+        """Best (recipe_id, matched_key, similarity) at or above the threshold."""
+        if not key:
+            return None
+        self.lookups += 1
+
+        best: Optional[Tuple[int, str, float]] = None
+        best_score = 0.0
+        for doc_id in self.candidates(key):
+            score = edit_similarity(key, self._keys[doc_id], best_score)
+            if score > best_score:
+                best_score = score
+                best = (self._recipe_ids[doc_id], self._keys[doc_id], score)
+
+        self._record_score(best_score)
+        if best is None or best_score < self.threshold:
+            return None
+        self.matches += 1
+        return best
+
+    def _record_score(self, score: float) -> None:
+        for i, bound in enumerate(SCORE_BUCKETS):
+            if score < bound:
+                self.score_counts[i] += 1
+                return
+        self.score_counts[-1] += 1
+
+    def stats(self) -> dict:
+        labels = [f"<{bound}" for bound in SCORE_BUCKETS] + ["1.0"]
+        return {
+            "size": len(self._keys),
+            "vocabulary": len(self._vocabulary),
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "matches": self.matches,
+            "best_score_distribution": dict(zip(labels, self.score_counts)),
+        }
+
+
+_fuzzy_index: Optional[FuzzyIndex] = None
+
+
+def get_fuzzy_index() -> FuzzyIndex:
+    global _fuzzy_index
+    if _fuzzy_index is None:
+        _fuzzy_index = FuzzyIndex()
+    return _fuzzy_index
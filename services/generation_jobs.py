@@ -0,0 +1,327 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import RECIPE_JOB_LEASE_SECONDS, RECIPE_JOB_POLL_SECONDS, RECIPE_JOB_RETENTION_SECONDS
+from db.base import AsyncSessionLocal, AsyncReadSessionLocal
+from models.generation_job import GenerationJob
+from services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("pending", "running")
+
+# run(query, cache_key) -> serialized RecipeResponse; opens any session it needs
+JobRunner = Callable[[str, str], Awaitable[bytes]]
+
+
+class GenerationJobs:
+    """Recipe generations that run in the background and are polled by id.
+
+    Job state lives in the ``generation_jobs`` table, shared by every worker
+    process. The worker running a job owns it until ``lease_seconds`` after
+    its last renewal, which happens every third of that while the job runs.
+    ``resume`` starts jobs that no worker owns, such as those left by a
+    restart, and submitting a query whose job lost its worker takes that job
+    over. One job is active per normalized query: submitting a query that
+    already has an active job, in any worker, returns that job, and a
+    resumed job whose query this worker is already generating is marked
+    superseded and answered by that job. ``wait``
+    wakes as soon as a job running in this process finishes, and polls the
+    table every ``poll_seconds`` for jobs running elsewhere.
+
+    The runner raises on failure; an exception's ``status_code`` and
+    ``detail`` attributes, when present, are recorded as the job's error.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        read_session_factory: Callable[[], AsyncSession],
+        lease_seconds: float = 60.0,
+        poll_seconds: float = 0.25,
+    ):
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.owner = uuid.uuid4().hex
+        self._active: Dict[str, str] = {}
+        self._submits = SingleFlight()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._done: Dict[str, asyncio.Event] = {}
+        self.submitted = 0
+        self.deduplicated = 0
+        self.resumed = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    async def submit(self, query: str, cache_key: str, run: JobRunner) -> Tuple[str, bool]:
+        """Return ``(job_id, created)`` for the active job answering ``cache_key``."""
+        job_id = self._active.get(cache_key)
+        if job_id is not None:
+            self.deduplicated += 1
+            return job_id, False
+        # Concurrent submits in this process share one lookup
+        joined = self._submits.is_inflight(cache_key)
+        job_id, created = await self._submits.do(cache_key, lambda: self._submit(query, cache_key, run))
+        if joined:
+            self.deduplicated += 1
+            return job_id, False
+        return job_id, created
+
+    async def _submit(self, query: str, cache_key: str, run: JobRunner) -> Tuple[str, bool]:
+        """Insert a job for ``cache_key`` unless one is active, in one write transaction.
+
+        The unique index on active query keys makes the insert a no-op when
+        another worker's job is active, even if both submitted at once; that
+        job is read back and returned instead.
+        """
+        while True:
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            async with self.session_factory() as db:
+                result = await db.execute(
+                    sqlite_insert(GenerationJob)
+                    .values(
+                        id=job_id,
+                        query_key=cache_key,
+                        query=query,
+                        status="pending",
+                        owner=self.owner,
+                        lease_expires_at=now + self.lease_seconds,
+                    )
+                    .on_conflict_do_nothing()
+                )
+                job = None
+                if not result.rowcount:
+                    job = (await db.execute(
+                        select(GenerationJob)
+                        .where(GenerationJob.query_key == cache_key, GenerationJob.status.in_(ACTIVE_STATUSES))
+                    )).scalar()
+                await db.commit()
+            if result.rowcount:
+                break
+            if job is None:
+                # It finished between the insert and the read
+                continue
+            if job.owner is None or job.lease_expires_at <= now:
+                # Its worker stopped before finishing it
+                await self._resume(job.id, query, cache_key, run)
+            self.deduplicated += 1
+            return job.id, False
+
+        self.submitted += 1
+        self._active[cache_key] = job_id
+        self._start(job_id, query, cache_key, run)
+        return job_id, True
+
+    async def _claim(self, job_id: str) -> bool:
+        """Take ``job_id`` over if it is active and no live worker owns it."""
+        now = time.time()
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(GenerationJob)
+                .where(
+                    GenerationJob.id == job_id,
+                    GenerationJob.status.in_(ACTIVE_STATUSES),
+                    or_(GenerationJob.owner.is_(None), GenerationJob.lease_expires_at <= now),
+                )
+                .values(owner=self.owner, lease_expires_at=now + self.lease_seconds)
+            )
+            await db.commit()
+        return bool(result.rowcount)
+
+    async def _resume(self, job_id: str, query: str, cache_key: str, run: JobRunner) -> bool:
+        if not await self._claim(job_id):
+            # Another worker resumed it first
+            return False
+        active_id = self._active.get(cache_key)
+        if active_id is not None:
+            # A newer submit already covers this query; its pollers are sent to that job
+            await self._update(
+                job_id, status="superseded", superseded_by=active_id, owner=None, lease_expires_at=None
+            )
+            return False
+        logger.info(f"Resuming generation job {job_id} for query: {query}")
+        self.resumed += 1
+        self._active[cache_key] = job_id
+        self._start(job_id, query, cache_key, run)
+        return True
+
+    def _start(self, job_id: str, query: str, cache_key: str, run: JobRunner) -> None:
+        self._done[job_id] = asyncio.Event()
+        self._tasks[job_id] = asyncio.ensure_future(self._run(job_id, query, cache_key, run))
+
+    async def _run(self, job_id: str, query: str, cache_key: str, run: JobRunner) -> None:
+        renewal = asyncio.ensure_future(self._renew(job_id))
+        try:
+            await self._update(job_id, status="running")
+            try:
+                body = await run(query, cache_key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                await self._update(
+                    job_id,
+                    status="failed",
+                    error_status=getattr(e, "status_code", 500),
+                    error=str(getattr(e, "detail", None) or e),
+                )
+            else:
+                self.succeeded += 1
+                await self._update(job_id, status="succeeded", response_json=body.decode())
+        except asyncio.CancelledError:
+            # Left active in the database so it can be resumed
+            logger.info(f"Generation job {job_id} interrupted")
+            raise
+        except Exception as e:
+            logger.error(f"Error recording generation job {job_id}: {e}", exc_info=True)
+        finally:
+            renewal.cancel()
+            if self._active.get(cache_key) == job_id:
+                del self._active[cache_key]
+            self._tasks.pop(job_id, None)
+            event = self._done.pop(job_id, None)
+            if event is not None:
+                event.set()
+
+    async def _renew(self, job_id: str) -> None:
+        """Extend this worker's hold on ``job_id`` until cancelled."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with self.session_factory() as db:
+                    await db.execute(
+                        update(GenerationJob)
+                        .where(GenerationJob.id == job_id, GenerationJob.owner == self.owner)
+                        .values(lease_expires_at=time.time() + self.lease_seconds)
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Error renewing generation job {job_id}: {e}")
+
+    async def _update(self, job_id: str, **values) -> None:
+        async with self.session_factory() as db:
+            await db.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id)
+                .values(updated_at=datetime.now(timezone.utc), **values)
+            )
+            await db.commit()
+
+    async def get(self, job_id: str) -> Optional[GenerationJob]:
+        """The job, or the one that superseded it."""
+        async with self.read_session_factory() as db:
+            job = await db.get(GenerationJob, job_id)
+            while job is not None and job.superseded_by is not None:
+                job = await db.get(GenerationJob, job.superseded_by)
+            return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[GenerationJob]:
+        """The job, once it has finished or ``timeout`` seconds have passed.
+
+        Jobs running in this process are awaited directly; others, including
+        those running in another worker, are polled.
+        """
+        event = self._done.get(job_id)
+        if event is not None:
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return await self.get(job_id)
+
+        # Running in another worker, superseded, or not running at all
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            job = await self.get(job_id)
+            remaining = deadline - loop.time()
+            if job is None or job.status not in ACTIVE_STATUSES or remaining <= 0:
+                return job
+            event = self._done.get(job.id)
+            if event is None:
+                await asyncio.sleep(min(self.poll_seconds, remaining))
+                continue
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def resume(self, run: JobRunner) -> int:
+        """Drop expired finished jobs and start the active ones no live worker owns."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=RECIPE_JOB_RETENTION_SECONDS)
+        async with self.session_factory() as db:
+            await db.execute(
+                delete(GenerationJob)
+                .where(GenerationJob.status.not_in(ACTIVE_STATUSES))
+                .where(GenerationJob.updated_at < cutoff)
+            )
+            await db.commit()
+            result = await db.execute(
+                select(GenerationJob.id, GenerationJob.query, GenerationJob.query_key)
+                .where(GenerationJob.status.in_(ACTIVE_STATUSES))
+                .where(or_(GenerationJob.owner.is_(None), GenerationJob.lease_expires_at <= time.time()))
+                .order_by(GenerationJob.created_at)
+            )
+            jobs = result.all()
+
+        resumed = 0
+        for job_id, query, cache_key in jobs:
+            if await self._resume(job_id, query, cache_key, run):
+                resumed += 1
+        return resumed
+
+    async def close(self) -> None:
+        """Cancel running jobs and release them, so another worker or the next start resumes them."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if not tasks:
+            return
+        try:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(GenerationJob)
+                    .where(GenerationJob.owner == self.owner, GenerationJob.status.in_(ACTIVE_STATUSES))
+                    .values(owner=None, lease_expires_at=None)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error releasing generation jobs: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "running": len(self._tasks),
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "resumed": self.resumed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+        }
+
+
+_generation_jobs: Optional[GenerationJobs] = None
+
+
+def get_generation_jobs() -> GenerationJobs:
+    global _generation_jobs
+    if _generation_jobs is None:
+        _generation_jobs = GenerationJobs(
+            AsyncSessionLocal,
+            AsyncReadSessionLocal,
+            lease_seconds=RECIPE_JOB_LEASE_SECONDS,
+            poll_seconds=RECIPE_JOB_POLL_SECONDS,
+        )
+    return _generation_jobs
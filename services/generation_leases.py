@@ -0,0 +1,323 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar, Union
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import (
+    GENERATION_LEASES,
+    GENERATION_LEASE_SECONDS,
+    GENERATION_LEASE_POLL_SECONDS,
+    GENERATION_RESULT_TTL_SECONDS,
+    NEGATIVE_CACHE_FAILURE_TTL_SECONDS,
+)
+from db.base import AsyncSessionLocal, AsyncReadSessionLocal
+from models.generation_lease import GenerationLease
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Keys per polling query, under SQLite's bound-parameter limit
+READ_CHUNK = 500
+
+
+class SharedGenerationError(Exception):
+    """A failure another worker recorded for the query, with the HTTP error it answered."""
+
+    def __init__(self, status_code: int, detail: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.headers = headers
+
+
+class GenerationLeases:
+    """Single flight across worker processes, through the database.
+
+    ``run`` reads the key's lease row first. While another worker holds it,
+    the row is polled until that worker publishes the serialized result (or
+    an error other than a 500), which is returned. Otherwise the key is
+    claimed with one conditional upsert that succeeds only when no lease
+    exists or the existing one has expired. The owner renews the lease every
+    third of ``lease_seconds`` while it generates, so a worker that died
+    holding a lease blocks the key for at most ``lease_seconds``, however
+    long a live one takes.
+
+    Coordination is best effort: if the database cannot be reached the
+    worker generates on its own rather than failing the request.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        read_session_factory: Callable[[], AsyncSession],
+        enabled: bool = True,
+        lease_seconds: float = 60.0,
+        poll_seconds: float = 0.1,
+        result_ttl: float = 60.0,
+        failure_ttl: float = 30.0,
+    ):
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory
+        self.enabled = enabled
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.result_ttl = result_ttl
+        self.failure_ttl = failure_ttl
+        self._pruned_at = 0.0
+        self._waiting: Dict[str, asyncio.Future] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self.claimed = 0
+        self.waited = 0
+        self.shared_results = 0
+        self.shared_failures = 0
+        self.errors = 0
+
+    async def run(
+        self,
+        key: str,
+        produce: Callable[[], Awaitable[T]],
+        encode: Callable[[T], bytes],
+    ) -> Union[T, bytes]:
+        """Return ``produce()`` under the lease for ``key``, or another worker's result.
+
+        A result published by another worker is returned as its serialized
+        body; its failure is raised as SharedGenerationError. ``encode``
+        serializes this worker's result for the others.
+        """
+        if not self.enabled:
+            return await produce()
+        while True:
+            try:
+                lease = await self._wait(key)
+                owner = await self._claim(key) if lease is None else None
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error coordinating generation for '{key}': {e}")
+                return await produce()
+            if owner is not None:
+                return await self._produce(key, owner, produce, encode)
+            if lease is not None:
+                if lease.response_json is not None:
+                    self.shared_results += 1
+                    return lease.response_json.encode()
+                self.shared_failures += 1
+                headers = json.loads(lease.error_headers) if lease.error_headers else None
+                raise SharedGenerationError(lease.error_status, lease.error, headers)
+            # Another worker claimed it between the read and the claim
+
+    async def _claim(self, key: str) -> Optional[str]:
+        """Lease ``key`` and return the claim's owner token, or None if it is held."""
+        owner = uuid.uuid4().hex
+        now = time.time()
+        values = {"owner": owner, "expires_at": now + self.lease_seconds}
+        statement = sqlite_insert(GenerationLease).values(key=key, **values).on_conflict_do_update(
+            index_elements=["key"],
+            set_={**values, "response_json": None, "error_status": None, "error": None, "error_headers": None},
+            where=GenerationLease.expires_at <= now,
+        )
+        async with self.session_factory() as db:
+            result = await db.execute(statement)
+            if now - self._pruned_at >= self.result_ttl:
+                self._pruned_at = now
+                await db.execute(delete(GenerationLease).where(GenerationLease.expires_at <= now))
+            await db.commit()
+        if not result.rowcount:
+            return None
+        self.claimed += 1
+        return owner
+
+    async def _produce(
+        self, key: str, owner: str, produce: Callable[[], Awaitable[T]], encode: Callable[[T], bytes]
+    ) -> T:
+        renewal = asyncio.ensure_future(self._renew(key, owner))
+        try:
+            result = await produce()
+        except asyncio.CancelledError:
+            await self._release(key, owner)
+            raise
+        except Exception as e:
+            status_code = getattr(e, "status_code", 500)
+            if status_code == 500:
+                # Unexpected errors are not shared, like in the negative cache
+                await self._release(key, owner)
+            else:
+                headers = getattr(e, "headers", None)
+                await self._publish(
+                    key,
+                    owner,
+                    self.failure_ttl,
+                    error_status=status_code,
+                    error=str(getattr(e, "detail", None) or e),
+                    error_headers=json.dumps(headers) if headers else None,
+                )
+            raise
+        finally:
+            renewal.cancel()
+        await self._publish(key, owner, self.result_ttl, response_json=encode(result).decode())
+        return result
+
+    async def _renew(self, key: str, owner: str) -> None:
+        """Extend this worker's lease on ``key`` until cancelled.
+
+        Generation can outlast ``lease_seconds``, for instance while waiting
+        for a scheduler slot, and a lapsed lease lets another worker generate
+        the same query again.
+        """
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with self.session_factory() as db:
+                    await db.execute(
+                        update(GenerationLease)
+                        .where(
+                            GenerationLease.key == key,
+                            GenerationLease.owner == owner,
+                            GenerationLease.response_json.is_(None),
+                            GenerationLease.error_status.is_(None),
+                        )
+                        .values(expires_at=time.time() + self.lease_seconds)
+                    )
+                    await db.commit()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error renewing generation lease for '{key}': {e}")
+
+    async def _publish(self, key: str, owner: str, ttl: float, **outcome) -> None:
+        try:
+            async with self.session_factory() as db:
+                # Only while the lease is still ours; an expired one may have been taken over
+                await db.execute(
+                    update(GenerationLease)
+                    .where(GenerationLease.key == key, GenerationLease.owner == owner)
+                    .values(expires_at=time.time() + ttl, **outcome)
+                )
+                await db.commit()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error publishing generation for '{key}': {e}")
+
+    async def _release(self, key: str, owner: str) -> None:
+        try:
+            async with self.session_factory() as db:
+                await db.execute(
+                    delete(GenerationLease).where(GenerationLease.key == key, GenerationLease.owner == owner)
+                )
+                await db.commit()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error releasing generation lease for '{key}': {e}")
+
+    async def _read(self, keys: List[str]) -> Dict[str, GenerationLease]:
+        leases = {}
+        async with self.read_session_factory() as db:
+            for start in range(0, len(keys), READ_CHUNK):
+                result = await db.execute(
+                    select(GenerationLease).where(GenerationLease.key.in_(keys[start:start + READ_CHUNK]))
+                )
+                leases.update((lease.key, lease) for lease in result.scalars())
+        return leases
+
+    @staticmethod
+    def _live(lease: Optional[GenerationLease], now: float) -> Optional[GenerationLease]:
+        return lease if lease is not None and lease.expires_at > now else None
+
+    @classmethod
+    def _pending(cls, lease: Optional[GenerationLease], now: float) -> bool:
+        """Whether ``lease`` is held and its outcome not yet published."""
+        lease = cls._live(lease, now)
+        return lease is not None and lease.response_json is None and lease.error_status is None
+
+    async def _wait(self, key: str) -> Optional[GenerationLease]:
+        """The lease once it has an outcome; None when there is no live lease to wait for.
+
+        Checked once straight away, which keeps the common cases, a free key
+        or a published result, off SQLite's single write lock. Keys still
+        being generated elsewhere are then polled together, one query per
+        ``poll_seconds`` for the whole process.
+        """
+        lease = (await self._read([key])).get(key)
+        now = time.time()
+        if not self._pending(lease, now):
+            return self._live(lease, now)
+
+        self.waited += 1
+        logger.info(f"Waiting for another worker's generation for key: '{key}'")
+        future = self._waiting.get(key)
+        if future is None:
+            future = self._waiting[key] = asyncio.get_running_loop().create_future()
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll())
+        # Shielded so a cancelled waiter leaves the future to the others waiting on the key
+        return await asyncio.shield(future)
+
+    async def _poll(self) -> None:
+        while self._waiting:
+            await asyncio.sleep(self.poll_seconds)
+            keys = list(self._waiting)
+            try:
+                leases = await self._read(keys)
+            except Exception as e:
+                for key in keys:
+                    future = self._waiting.pop(key)
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            now = time.time()
+            for key in keys:
+                lease = leases.get(key)
+                if not self._pending(lease, now):
+                    future = self._waiting.pop(key)
+                    if not future.done():
+                        future.set_result(self._live(lease, now))
+
+    async def purge_failures(self, key: Optional[str] = None) -> int:
+        """Drop published failures for ``key``, or all of them, so the queries are generated again."""
+        statement = delete(GenerationLease).where(GenerationLease.error_status.is_not(None))
+        if key is not None:
+            statement = statement.where(GenerationLease.key == key)
+        async with self.session_factory() as db:
+            result = await db.execute(statement)
+            await db.commit()
+        return result.rowcount
+
+    async def prune(self) -> int:
+        """Delete expired leases and outcomes."""
+        async with self.session_factory() as db:
+            result = await db.execute(delete(GenerationLease).where(GenerationLease.expires_at <= time.time()))
+            await db.commit()
+        return result.rowcount
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "claimed": self.claimed,
+            "waited": self.waited,
+            "shared_results": self.shared_results,
+            "shared_failures": self.shared_failures,
+            "errors": self.errors,
+        }
+
+
+_generation_leases: Optional[GenerationLeases] = None
+
+
+def get_generation_leases() -> GenerationLeases:
+    global _generation_leases
+    if _generation_leases is None:
+        _generation_leases = GenerationLeases(
+            AsyncSessionLocal,
+            AsyncReadSessionLocal,
+            enabled=GENERATION_LEASES,
+            lease_seconds=GENERATION_LEASE_SECONDS,
+            poll_seconds=GENERATION_LEASE_POLL_SECONDS,
+            result_ttl=GENERATION_RESULT_TTL_SECONDS,
+            failure_ttl=NEGATIVE_CACHE_FAILURE_TTL_SECONDS,
+        )
+    return _generation_leases
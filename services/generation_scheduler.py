@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from core.config import (
+    LLM_MAX_INFLIGHT,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_RETRY_MAX_SECONDS,
+    LLM_CIRCUIT_FAILURE_THRESHOLD,
+    LLM_CIRCUIT_RESET_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class GenerationUnavailableError(Exception):
+    """The provider is rate limiting or down; the caller should retry later."""
+    def __init__(self, message: str, retry_after: float = 0.0, original_error: Optional[Exception] = None):
+        self.message = message
+        self.retry_after = retry_after
+        self.original_error = original_error
+        super().__init__(self.message)
+
+
+class GenerationTimeoutError(GenerationUnavailableError):
+    """No model produced a valid recipe within the latency budget."""
+
+
+class TokenBucket:
+    """Budget that refills continuously at ``per_minute`` units per minute.
+
+    ``acquire`` waits until the requested amount is available. A rate of zero
+    or less disables the bucket.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        if self.rate <= 0:
+            return
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            wait = (amount - self.tokens) / self.rate
+            self.waited_seconds += wait
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive provider failures.
+
+    While open, calls are refused for ``reset_seconds``; then a single trial
+    call is let through (half-open), which closes the circuit on success and
+    reopens it on failure.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self.opens = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._trial_running or time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("LLM circuit closed")
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or (self.opened_at is None and self.failures >= self.failure_threshold):
+            if self.opened_at is None:
+                self.opens += 1
+                logger.warning(f"LLM circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+    def release(self) -> None:
+        """End a trial call that neither succeeded nor failed on the provider's side."""
+        self._trial_running = False
+
+
+class GenerationScheduler:
+    """Admission control for LLM calls.
+
+    Each attempt takes one request from the requests-per-minute bucket and
+    its estimated tokens from the tokens-per-minute bucket, then holds one of
+    ``max_inflight`` slots. Failures that ``is_retryable`` accepts are retried
+    with jittered exponential backoff (or the provider's Retry-After) and
+    count towards the circuit breaker; once the retries are spent, or while
+    the circuit is open, GenerationUnavailableError is raised. Other errors
+    are passed through unchanged.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_retries: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+        breaker: CircuitBreaker,
+        is_retryable: Callable[[Exception], bool] = lambda e: False,
+        retry_after: Callable[[Exception], Optional[float]] = lambda e: None,
+    ):
+        self.max_inflight = max_inflight
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.breaker = breaker
+        self.is_retryable = is_retryable
+        self.retry_after = retry_after
+        self.inflight = 0
+        self.calls = 0
+        self.retries = 0
+        self.rejected = 0
+        self.failures = 0
+
+    def _slots(self) -> asyncio.Semaphore:
+        # Recreated per event loop, since a semaphore binds to the first loop that waits on it
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_inflight)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0) -> AsyncIterator[None]:
+        """Take rate budget, then hold one in-flight slot."""
+        await self.request_bucket.acquire(1)
+        await self.token_bucket.acquire(tokens)
+        async with self._slots():
+            self.inflight += 1
+            try:
+                yield
+            finally:
+                self.inflight -= 1
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.retry_max_seconds)
+        # Full jitter: uniform over [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+
+    async def retrying(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` with retries and the circuit breaker, but no slot."""
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.rejected += 1
+                raise GenerationUnavailableError(
+                    "Recipe generation is temporarily unavailable. Please try again shortly.",
+                    retry_after=self.breaker.retry_after(),
+                )
+            self.calls += 1
+            try:
+                result = await fn()
+            except Exception as e:
+                if not self.is_retryable(e):
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.max_retries or self.breaker.state == "open":
+                    self.failures += 1
+                    raise GenerationUnavailableError(
+                        "Recipe generation is temporarily unavailable. Please try again shortly.",
+                        retry_after=max(self.breaker.retry_after(), self.retry_after(e) or 0.0),
+                        original_error=e,
+                    )
+                delay = self.backoff(attempt, self.retry_after(e))
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"LLM call failed ({e}); retry {attempt} of {self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def call(self, fn: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """Run ``fn`` under the limits; every attempt takes its own slot."""
+        async def attempt() -> T:
+            async with self.slot(tokens):
+                return await fn()
+        return await self.retrying(attempt)
+
+    def stats(self) -> dict:
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "circuit": self.breaker.state,
+            "circuit_opens": self.breaker.opens,
+            "rate_limit_wait_seconds": round(
+                self.request_bucket.waited_seconds + self.token_bucket.waited_seconds, 3
+            ),
+        }
+
+
+_generation_scheduler: Optional[GenerationScheduler] = None
+
+
+def get_generation_scheduler() -> GenerationScheduler:
+    global _generation_scheduler
+    if _generation_scheduler is None:
+        from services.llm_recipe_generator import is_retryable_error, retry_after_seconds
+
+        _generation_scheduler = GenerationScheduler(
+            max_inflight=LLM_MAX_INFLIGHT,
+            requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+            max_retries=LLM_MAX_RETRIES,
+            retry_base_seconds=LLM_RETRY_BASE_SECONDS,
+            retry_max_seconds=LLM_RETRY_MAX_SECONDS,
+            breaker=CircuitBreaker(LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SECONDS),
+            is_retryable=is_retryable_error,
+            retry_after=retry_after_seconds,
+        )
+    return _generation_scheduler
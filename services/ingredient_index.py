@@ -0,0 +1,158 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services.ingredients import ingredient_names, recipe_ingredient_names
+
+
+class IngredientIndex:
+    """Posting lists from normalized ingredient name to the recipes using it.
+
+    Each list is a sorted int64 array of recipe ids with spare capacity, so
+    recipes stored in id order are appended in place. A search term matches
+    every indexed name that contains its words in order ("rum" matches
+    "aged rum", "lime" matches "lime juice"), found through a small
+    word-to-names map. ``all`` intersects the terms' lists by binary search,
+    starting from the shortest; ``any`` merges them and ranks recipes by how
+    many terms they match.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, np.ndarray] = {}
+        self._lengths: Dict[str, int] = {}
+        self._recipe_names: Dict[int, Tuple[str, ...]] = {}
+        self._word_names: Dict[str, Set[str]] = {}
+        self.searches = 0
+
+    def __len__(self) -> int:
+        return len(self._recipe_names)
+
+    def add(self, recipe_id: int, ingredients: Iterable[dict]) -> None:
+        self.add_many([(recipe_id, ingredients)])
+
+    def add_many(self, recipes: Iterable[Tuple[int, Iterable[dict]]]) -> None:
+        """Index ``(recipe_id, ingredients)`` rows; a known recipe's names are replaced."""
+        for recipe_id, ingredients in recipes:
+            names = tuple(recipe_ingredient_names(ingredients))
+            previous = self._recipe_names.get(recipe_id, ())
+            if names == previous:
+                continue
+            for name in previous:
+                if name not in names:
+                    self._remove(name, recipe_id)
+            for name in names:
+                if name not in previous:
+                    self._append(name, recipe_id)
+            self._recipe_names[recipe_id] = names
+
+    def _append(self, name: str, recipe_id: int) -> None:
+        postings = self._postings.get(name)
+        if postings is None:
+            postings = self._postings[name] = np.empty(4, dtype=np.int64)
+            self._lengths[name] = 0
+            for word in name.split():
+                self._word_names.setdefault(word, set()).add(name)
+        length = self._lengths[name]
+        if length == len(postings):
+            grown = np.empty(length + max(length // 4, 4), dtype=np.int64)
+            grown[:length] = postings
+            postings = self._postings[name] = grown
+        if length and postings[length - 1] > recipe_id:
+            # Out of id order, e.g. an older recipe re-imported with new ingredients
+            position = int(np.searchsorted(postings[:length], recipe_id))
+            postings[position + 1:length + 1] = postings[position:length]
+            postings[position] = recipe_id
+        else:
+            postings[length] = recipe_id
+        self._lengths[name] = length + 1
+
+    def _remove(self, name: str, recipe_id: int) -> None:
+        postings, length = self._postings[name], self._lengths[name]
+        position = int(np.searchsorted(postings[:length], recipe_id))
+        postings[position:length - 1] = postings[position + 1:length]
+        self._lengths[name] = length - 1
+
+    def _ids(self, name: str) -> np.ndarray:
+        return self._postings[name][:self._lengths[name]]
+
+    def names(self, term: str) -> List[str]:
+        """Indexed ingredient names that ``term`` matches."""
+        matched: List[str] = []
+        for key in ingredient_names(term):
+            candidates = None
+            for word in key.split():
+                names = self._word_names.get(word, set())
+                candidates = names if candidates is None else candidates & names
+            padded = f" {key} "
+            matched.extend(
+                name for name in sorted(candidates or ())
+                if padded in f" {name} " and name not in matched
+            )
+        return matched
+
+    def _term_ids(self, term: str) -> np.ndarray:
+        lists = [self._ids(name) for name in self.names(term)]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        if len(lists) == 1:
+            return lists[0]
+        return np.unique(np.concatenate(lists))
+
+    def search(
+        self, terms: List[str], match_all: bool = True, offset: int = 0, limit: int = 20
+    ) -> Tuple[int, List[Tuple[int, int]]]:
+        """Recipes using the ingredients ``terms``, a page at a time.
+
+        Returns the total number of matching recipes and one page of
+        ``(recipe_id, terms_matched)``. ``match_all`` recipes use every term
+        and are ordered by id; otherwise recipes using any term are ordered by
+        terms matched, then id.
+        """
+        self.searches += 1
+        lists = [self._term_ids(term) for term in terms]
+        if not lists:
+            return 0, []
+        if match_all:
+            lists.sort(key=len)
+            ids = lists[0]
+            for other in lists[1:]:
+                if not len(ids) or not len(other):
+                    ids = ids[:0]
+                    break
+                positions = np.searchsorted(other, ids)
+                np.minimum(positions, len(other) - 1, out=positions)
+                ids = ids[other[positions] == ids]
+            page = ids[offset:offset + limit].tolist()
+            return len(ids), [(recipe_id, len(terms)) for recipe_id in page]
+
+        ids, counts = np.unique(np.concatenate(lists), return_counts=True)
+        if len(lists) > 1:
+            order = np.lexsort((ids, -counts))[offset:offset + limit]
+        else:
+            order = np.arange(offset, min(offset + limit, len(ids)))
+        return len(ids), list(zip(ids[order].tolist(), counts[order].tolist()))
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._lengths.clear()
+        self._recipe_names.clear()
+        self._word_names.clear()
+
+    def stats(self) -> dict:
+        return {
+            "recipes": len(self._recipe_names),
+            "ingredients": len(self._postings),
+            "postings": sum(self._lengths.values()),
+            "posting_bytes": sum(postings.nbytes for postings in self._postings.values()),
+            "searches": self.searches,
+        }
+
+
+_ingredient_index: Optional[IngredientIndex] = None
+
+
+def get_ingredient_index() -> IngredientIndex:
+    global _ingredient_index
+    if _ingredient_index is None:
+        _ingredient_index = IngredientIndex()
+    return _ingredient_index
@@ -0,0 +1,71 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+from services.query_canonicalizer import SPELLING_VARIANTS, fold_text, singularize, strip_diacritics
+
+# Leading words that give an amount rather than the ingredient, as in
+# "1.75 oz (60 ml) Tequila", "3 dashes Angostura Bitters" or "2 sprigs of mint"
+MEASURE_WORDS = frozenset({
+    "oz", "ounce", "ounces", "ml", "cl", "dl", "l", "part", "parts", "cup", "cups",
+    "dash", "dashes", "drop", "drops", "splash", "splashes", "pinch", "pinches",
+    "tsp", "teaspoon", "teaspoons", "tbsp", "tablespoon", "tablespoons",
+    "barspoon", "barspoons", "bar", "spoon", "spoons", "sprig", "sprigs",
+    "slice", "slices", "wedge", "wedges", "wheel", "wheels", "leaf", "leaves",
+    "cube", "cubes", "piece", "pieces", "whole", "half", "top", "with", "of", "a", "an",
+    "one", "two", "three", "four", "five", "six",
+    "fresh", "freshly", "squeezed", "chilled",
+})
+# Trailing phrases that say how an ingredient is used
+USAGE_SUFFIXES = ("for rim", "for the rim", "for garnish", "to garnish", "to top", "to taste")
+
+_PARENTHETICAL_RE = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+_AMOUNT_RE = re.compile(r"^[\d.,/\-–¼½¾⅓⅔⅛]+$")
+_ALTERNATIVES_RE = re.compile(r"\s+or\s+|\s*/\s*")
+_NON_WORD_RE = re.compile(r"[^\w]+|_+")
+
+
+def _canonical_words(text: str) -> List[str]:
+    words = []
+    for word in _NON_WORD_RE.sub(" ", text).split():
+        word = singularize(SPELLING_VARIANTS.get(word, word))
+        words.append(SPELLING_VARIANTS.get(word, word))
+    return words
+
+
+@lru_cache(maxsize=8192)
+def ingredient_names(name: str) -> Tuple[str, ...]:
+    """Normalized ingredient names in a recipe's ``Ingredient.name``.
+
+    "1.75 oz (60 ml) Tequila" gives ``("tequila",)``. Amounts, units,
+    parentheticals, text after a comma and usage such as "for rim" are
+    dropped, and alternatives are kept separately, so "2 oz (60 ml) Bourbon
+    or Rye Whiskey" gives ``("bourbon", "rye whiskey")``. Words are
+    singularized and spelling variants folded, as for query keys.
+    """
+    text = strip_diacritics(fold_text(name))
+    text = _PARENTHETICAL_RE.sub(" ", text).split(",")[0]
+    names = []
+    for part in _ALTERNATIVES_RE.split(text):
+        part = part.strip()
+        for suffix in USAGE_SUFFIXES:
+            if part.endswith(" " + suffix) or part == suffix:
+                part = part[:-len(suffix)]
+                break
+        words = part.split()
+        while words and (_AMOUNT_RE.match(words[0]) or words[0] in MEASURE_WORDS):
+            words.pop(0)
+        canonical = " ".join(_canonical_words(" ".join(words)))
+        if canonical and canonical not in names:
+            names.append(canonical)
+    return tuple(names)
+
+
+def recipe_ingredient_names(ingredients: Iterable[dict]) -> List[str]:
+    """Distinct normalized names of a stored recipe's ``ingredients`` JSON, in order."""
+    names: List[str] = []
+    for ingredient in ingredients or ():
+        for name in ingredient_names(ingredient.get("name") or ""):
+            if name not in names:
+                names.append(name)
+    return names
@@ -0,0 +1,128 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """Parses a streamed JSON object and reports values as soon as they close.
+
+    ``feed`` accepts arbitrary chunks and returns the events completed by that
+    chunk:
+
+    - ``("field", key, value)`` when a top-level member is complete
+    - ``("item", key, index, value)`` when an element of a top-level array
+      member is complete, before the array itself closes
+
+    Only the structure is tracked while scanning; each completed value is
+    decoded with ``json.loads``. Text outside the root object (such as a
+    markdown fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._item_index = 0
+        self.complete = False
+
+    def feed(self, chunk: str) -> List[Tuple[Any, ...]]:
+        self._buffer += chunk
+        events: List[Tuple[Any, ...]] = []
+        buffer = self._buffer
+
+        for i in range(self._pos, len(buffer)):
+            if self.complete:
+                break
+            char = buffer[i]
+            depth = len(self._stack)
+            in_top_array = depth == 2 and self._stack[1] == "["
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if depth == 1 and self._expect_key:
+                        self._key = json.loads(buffer[self._key_start:i + 1])
+                    elif depth == 1:
+                        self._emit_field(i + 1, events)
+                    elif in_top_array:
+                        self._emit_item(i + 1, events)
+                continue
+
+            if char in _WHITESPACE:
+                continue
+
+            if depth == 0:
+                if char == "{":
+                    self._stack.append(char)
+                    self._expect_key = True
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if depth == 1 and self._expect_key:
+                    self._key_start = i
+                else:
+                    self._mark_start(i, depth, in_top_array)
+            elif char in "{[":
+                self._mark_start(i, depth, in_top_array)
+                self._stack.append(char)
+                if depth == 1 and char == "[":
+                    self._item_index = 0
+            elif char in "}]":
+                self._end_scalar(i, depth, in_top_array, events)
+                self._stack.pop()
+                depth = len(self._stack)
+                if depth == 0:
+                    self.complete = True
+                elif depth == 1 and self._value_start is not None:
+                    self._emit_field(i + 1, events)
+                elif depth == 2 and self._stack[1] == "[" and self._item_start is not None:
+                    self._emit_item(i + 1, events)
+            elif char == ",":
+                self._end_scalar(i, depth, in_top_array, events)
+                if depth == 1:
+                    self._expect_key = True
+            elif char == ":":
+                if depth == 1:
+                    self._expect_key = False
+            else:
+                self._mark_start(i, depth, in_top_array)
+
+        self._pos = len(buffer)
+        return events
+
+    def _mark_start(self, i: int, depth: int, in_top_array: bool) -> None:
+        if depth == 1 and self._value_start is None:
+            self._value_start = i
+        elif in_top_array and self._item_start is None:
+            self._item_start = i
+
+    def _end_scalar(self, i: int, depth: int, in_top_array: bool, events: list) -> None:
+        # Numbers, booleans and null have no closing delimiter of their own
+        if depth == 1 and self._value_start is not None:
+            self._emit_field(i, events)
+        elif in_top_array and self._item_start is not None:
+            self._emit_item(i, events)
+
+    def _emit_field(self, end: int, events: list) -> None:
+        value = json.loads(self._buffer[self._value_start:end])
+        events.append(("field", self._key, value))
+        self._value_start = None
+
+    def _emit_item(self, end: int, events: list) -> None:
+        value = json.loads(self._buffer[self._item_start:end])
+        events.append(("item", self._key, self._item_index, value))
+        self._item_index += 1
+        self._item_start = None
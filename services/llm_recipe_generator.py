@@ -1,11 +1,32 @@
 import json
 import ast
+import asyncio
 import logging
-from typing import Optional
+import time
+from contextlib import AsyncExitStack
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from openai import AsyncOpenAI
-from openai import APIError
-from core.config import OPENAI_API_KEY, OPENAI_MODEL
+from openai import APIError, APIConnectionError, APIStatusError
+from core.config import (
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+    OPENAI_FAST_MODEL,
+    OPENAI_BASE_URL,
+    LLM_DEADLINE_SECONDS,
+    LLM_FAST_TIER_TIMEOUT_SECONDS,
+    LLM_HEDGE_AFTER,
+    LLM_HEDGE_MIN_SAMPLES,
+)
 from schemas.recipe import RecipeResponse, Ingredient, TastingProfile
+from services.json_stream import IncrementalJSONParser
+from services.generation_scheduler import (
+    GenerationScheduler,
+    GenerationTimeoutError,
+    GenerationUnavailableError,
+    get_generation_scheduler,
+)
+from services.metrics import get_metrics
+from services.model_tiers import get_tier_stats
 
 logger = logging.getLogger(__name__)
 
@@ -19,18 +40,54 @@ class RecipeGenerationError(Exception):
 
 
 class RecipeGenerator:    
-    def __init__(self):
-        if not OPENAI_API_KEY:
-            raise ValueError(
-                "OpenAI API key not configured. Please set OPENAI_API_KEY in .env file"
-            )
+    """Generates recipes with the configured model tiers.
+
+    ``models`` are tried fastest first. A tier gets ``tier_timeout`` seconds
+    before the next one is started alongside it, or the next one starts at
+    once if the tier fails. Within a tier, a hedged duplicate request is fired
+    after ``hedge_after`` (seconds, an observed latency percentile such as
+    ``"p95"``, or ``"off"``). The first valid RecipeResponse wins and every
+    other call is cancelled; past ``deadline`` seconds GenerationTimeoutError
+    is raised.
+    """
+
+    def __init__(
+        self,
+        client: Optional[AsyncOpenAI] = None,
+        scheduler: Optional[GenerationScheduler] = None,
+        models: Optional[List[str]] = None,
+        deadline: float = LLM_DEADLINE_SECONDS,
+        tier_timeout: float = LLM_FAST_TIER_TIMEOUT_SECONDS,
+        hedge_after: str = LLM_HEDGE_AFTER,
+    ):
+        if client is None:
+            if not OPENAI_API_KEY:
+                raise ValueError(
+                    "OpenAI API key not configured. Please set OPENAI_API_KEY in .env file"
+                )
+            # Retries are handled by the scheduler
+            client = AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, max_retries=0)
         
-        self.client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-        self.model = OPENAI_MODEL
+        self.client = client
+        self.models = models or [model for model in (OPENAI_FAST_MODEL, OPENAI_MODEL) if model]
+        self.model = self.models[-1]
+        self.scheduler = scheduler or get_generation_scheduler()
+        self.deadline = deadline
+        self.tier_timeout = tier_timeout
+        self.hedge_after = hedge_after
 
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        if self.hedge_after in ("", "off"):
+            return None
+        if self.hedge_after.startswith("p"):
+            latency = get_tier_stats(model).latency
+            if len(latency) < LLM_HEDGE_MIN_SAMPLES:
+                return None
+            return latency.percentile(float(self.hedge_after[1:]))
+        return float(self.hedge_after)
 
-    async def generate_recipe(self, query: str) -> Optional[RecipeResponse]:
 
+    def _build_messages(self, query: str) -> List[dict]:
         prompt = f"""You are a professional bartender creating cocktail recipes in the Cocktail Club style.
 
 Generate a complete, detailed cocktail recipe for: "{query}"
@@ -112,93 +169,289 @@ CRITICAL REQUIREMENTS - Follow the Cocktail Club style exactly:
 
 Return ONLY valid JSON. Do not include any markdown formatting or code blocks."""
 
+        return [
+            {
+                "role": "system",
+                "content": "You are a professional bartender creating detailed cocktail recipes in the Cocktail Club style. Your recipes should be professional, engaging, and suitable for hospitality staff. Always return valid JSON only, matching the exact format specified."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
+    def _completion_kwargs(self, query: str, model: Optional[str] = None) -> dict:
+        return {
+            "model": model or self.model,
+            "messages": self._build_messages(query),
+            "temperature": 0.3,
+            "max_completion_tokens": 2000,
+            "response_format": {"type": "json_object"},
+        }
+
+    def _estimated_tokens(self, completion_kwargs: dict) -> int:
+        # About four characters per token for the prompt, plus the completion budget
+        prompt_chars = sum(len(message["content"]) for message in completion_kwargs["messages"])
+        return prompt_chars // 4 + completion_kwargs["max_completion_tokens"]
+
+    def _parse_recipe(self, content: str, query: str) -> RecipeResponse:
+        content = content.strip()
+
+        if content.startswith("```"):
+            lines = content.split("\n")
+            content = "\n".join(lines[1:-1]) if len(lines) > 2 else content
+
+        recipe_data = json.loads(content)
+
+        ingredients = [
+            Ingredient(**ing) for ing in recipe_data.get("ingredients", [])
+        ]
+
+        tasting_profile_data = recipe_data.get("tasting_profile")
+        tasting_profile = None
+        if tasting_profile_data:
+            tasting_profile = TastingProfile(**tasting_profile_data)
+
+        return RecipeResponse(
+            title=recipe_data.get("title", query),
+            history=recipe_data.get("history"),
+            technique=recipe_data.get("technique"),
+            glass_type=recipe_data.get("glass_type"),
+            ingredients=ingredients,
+            tasting_profile=tasting_profile,
+            method=recipe_data.get("method", []),
+            tip=recipe_data.get("tip")
+        )
+
+    async def _attempt(self, model: str, query: str) -> RecipeResponse:
+        completion_kwargs = self._completion_kwargs(query, model)
+        metrics = get_metrics()
+        started = time.perf_counter()
+        response = await self.scheduler.call(
+            lambda: self.client.chat.completions.create(**completion_kwargs),
+            tokens=self._estimated_tokens(completion_kwargs),
+        )
+        # Includes waiting for rate budget and retries; cancelled attempts are not observed
+        metrics.stage_seconds.observe(time.perf_counter() - started, "llm")
+        metrics.record_usage(model, getattr(response, "usage", None))
+        with metrics.stage_seconds.time("parse"):
+            return self._parse_recipe(response.choices[0].message.content, query)
+
+    async def _race(self, query: str) -> RecipeResponse:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        attempts: Dict[asyncio.Task, Tuple[str, float]] = {}
+        tier, tier_started, hedged = -1, 0.0, False
+        last_error: Optional[Exception] = None
+
+        def launch(model: str) -> None:
+            attempts[asyncio.ensure_future(self._attempt(model, query))] = (model, loop.time())
+            get_tier_stats(model).calls += 1
+
+        def escalate() -> bool:
+            nonlocal tier, tier_started, hedged
+            if tier + 1 >= len(self.models):
+                return False
+            tier, tier_started, hedged = tier + 1, loop.time(), False
+            if tier > 0:
+                logger.info(f"Starting model tier {self.models[tier]} for query: {query}")
+            launch(self.models[tier])
+            return True
+
+        escalate()
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a professional bartender creating detailed cocktail recipes in the Cocktail Club style. Your recipes should be professional, engaging, and suitable for hospitality staff. Always return valid JSON only, matching the exact format specified."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,
-                max_completion_tokens=2000,
-                response_format={"type": "json_object"}
-            )
+            while attempts:
+                hedge_delay = None if hedged else self._hedge_delay(self.models[tier])
+                hedge_at = tier_started + hedge_delay if hedge_delay is not None else deadline
+                escalate_at = tier_started + self.tier_timeout if tier + 1 < len(self.models) else deadline
+                wake_at = min(deadline, hedge_at, escalate_at)
 
-            content = response.choices[0].message.content.strip()
-            
-            if content.startswith("```"):
-                lines = content.split("\n")
-                content = "\n".join(lines[1:-1]) if len(lines) > 2 else content
-            
-            recipe_data = json.loads(content)
-
-            ingredients = [
-                Ingredient(**ing) for ing in recipe_data.get("ingredients", [])
-            ]
-            
-            tasting_profile_data = recipe_data.get("tasting_profile")
-            tasting_profile = None
-            if tasting_profile_data:
-                tasting_profile = TastingProfile(**tasting_profile_data)
-            
-            recipe_response = RecipeResponse(
-                title=recipe_data.get("title", query),
-                history=recipe_data.get("history"),
-                technique=recipe_data.get("technique"),
-                glass_type=recipe_data.get("glass_type"),
-                ingredients=ingredients,
-                tasting_profile=tasting_profile,
-                method=recipe_data.get("method", []),
-                tip=recipe_data.get("tip")
-            )
-            
-            return recipe_response
-
-        except APIError as e:
-            # Extract the actual error message from OpenAI API error
-            error_message = str(e)
-            
-            # Try to extract message from exception body if available (OpenAI SDK v1.x)
-            if hasattr(e, 'body') and e.body:
-                try:
-                    if isinstance(e.body, dict) and 'error' in e.body:
-                        if 'message' in e.body['error']:
-                            error_message = e.body['error']['message']
-                except (ValueError, TypeError, AttributeError):
-                    pass
-            
-            # Try to parse error message from string format: "Error code: XXX - {'error': {'message': '...'}}"
-            if "Error code:" in error_message and "'error'" in error_message:
+                done, _ = await asyncio.wait(
+                    attempts, timeout=max(0.0, wake_at - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    model, started = attempts.pop(task)
+                    stats = get_tier_stats(model)
+                    if task.exception() is None:
+                        stats.wins += 1
+                        stats.latency.add(loop.time() - started)
+                        return task.result()
+                    stats.failures += 1
+                    last_error = task.exception()
+                    logger.warning(f"Model {model} failed for query '{query}': {last_error}")
+
+                now = loop.time()
+                if now >= deadline:
+                    raise GenerationTimeoutError(
+                        f"Recipe generation did not finish within {self.deadline:g} seconds. Please try again."
+                    )
+                if not attempts:
+                    if escalate():
+                        continue
+                    break
+                if now >= hedge_at:
+                    hedged = True
+                    get_tier_stats(self.models[tier]).hedges += 1
+                    launch(self.models[tier])
+                if now >= escalate_at:
+                    escalate()
+        finally:
+            for task, (model, _) in attempts.items():
+                task.cancel()
+                get_tier_stats(model).cancelled += 1
+        raise last_error
+
+    async def generate_recipe(self, query: str) -> Optional[RecipeResponse]:
+        metrics = get_metrics()
+        try:
+            recipe = await self._race(query)
+        except Exception as e:
+            error = _generation_error(e)
+            metrics.record_failure(error)
+            raise error
+        metrics.generations.inc("success")
+        return recipe
+
+    async def stream_recipe(self, query: str) -> AsyncIterator[Tuple[Any, ...]]:
+        """Stream a generation, yielding parser events as fields complete.
+
+        Yields ``("field", key, value)`` and ``("item", key, index, value)``
+        events from IncrementalJSONParser, then a final ``("recipe",
+        RecipeResponse)`` once the whole completion has been validated. The
+        scheduler slot is held until the stream ends; only opening the stream
+        is retried. Streams use the primary model only, since fields already
+        sent cannot be taken back, and are bounded by the same deadline,
+        which also covers waiting for the slot.
+        """
+        metrics = get_metrics()
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.deadline
+
+            async def before_deadline(awaitable):
+                # httpx's timeout restarts on every read, so a stream that
+                # trickles or stalls is bounded here instead
                 try:
-                    # Extract the dict part after "Error code: XXX - "
-                    dict_start = error_message.find("{")
-                    if dict_start != -1:
-                        dict_str = error_message[dict_start:]
-                        error_dict = ast.literal_eval(dict_str)
-                        if 'error' in error_dict and 'message' in error_dict['error']:
-                            error_message = error_dict['error']['message']
-                except (ValueError, SyntaxError):
-                    pass
-            
-            if "429" in error_message or "insufficient_quota" in error_message or "quota" in error_message.lower():
-                logger.error(
-                    f"OpenAI API quota exceeded or billing issue. "
-                    f"Please check your OpenAI account billing and usage limits. "
-                    f"Error: {error_message}"
+                    return await asyncio.wait_for(awaitable, max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    raise GenerationTimeoutError(
+                        f"Recipe generation did not finish within {self.deadline:g} seconds. Please try again."
+                    )
+
+            completion_kwargs = self._completion_kwargs(query)
+            started = time.perf_counter()
+            async with AsyncExitStack() as slot:
+                # Waiting for rate budget and a slot counts against the deadline too
+                await before_deadline(
+                    slot.enter_async_context(self.scheduler.slot(self._estimated_tokens(completion_kwargs)))
                 )
-            else:
-                logger.error(f"Error generating recipe: {error_message}")
-            raise RecipeGenerationError(error_message, e)
+                stream = await before_deadline(self.scheduler.retrying(
+                    lambda: self.client.chat.completions.create(
+                        **completion_kwargs,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        timeout=self.deadline,
+                    )
+                ))
+                parser = IncrementalJSONParser()
+                content = []
+                chunks = stream.__aiter__()
+                try:
+                    while True:
+                        try:
+                            chunk = await before_deadline(chunks.__anext__())
+                        except StopAsyncIteration:
+                            break
+                        if not chunk.choices:
+                            # The usage-only chunk that ends the stream
+                            metrics.record_usage(self.model, getattr(chunk, "usage", None))
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if not delta:
+                            continue
+                        content.append(delta)
+                        for event in parser.feed(delta):
+                            yield event
+                finally:
+                    await stream.close()
+
+            metrics.stage_seconds.observe(time.perf_counter() - started, "llm")
+
+            with metrics.stage_seconds.time("parse"):
+                recipe = self._parse_recipe("".join(content), query)
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Error generating recipe: {error_msg}")
-            raise RecipeGenerationError(error_msg, e)
+            error = _generation_error(e)
+            metrics.record_failure(error)
+            raise error
+        metrics.generations.inc("success")
+        yield ("recipe", recipe)
+
+
+def is_retryable_error(e: Exception) -> bool:
+    """Rate limits, server errors, timeouts and connection failures.
+
+    An exhausted quota is also reported as a 429 but will not clear on retry.
+    """
+    if isinstance(e, APIStatusError):
+        if getattr(e, "code", None) == "insufficient_quota":
+            return False
+        return e.status_code == 429 or e.status_code >= 500
+    return isinstance(e, APIConnectionError)
+
+
+def retry_after_seconds(e: Exception) -> Optional[float]:
+    response = getattr(e, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _generation_error(e: Exception) -> Exception:
+    if isinstance(e, (RecipeGenerationError, GenerationUnavailableError)):
+        return e
+
+    if isinstance(e, APIError):
+        # Extract the actual error message from OpenAI API error
+        error_message = str(e)
+        
+        # Try to extract message from exception body if available (OpenAI SDK v1.x)
+        if hasattr(e, 'body') and e.body:
+            try:
+                if isinstance(e.body, dict) and 'error' in e.body:
+                    if 'message' in e.body['error']:
+                        error_message = e.body['error']['message']
+            except (ValueError, TypeError, AttributeError):
+                pass
+        
+        # Try to parse error message from string format: "Error code: XXX - {'error': {'message': '...'}}"
+        if "Error code:" in error_message and "'error'" in error_message:
+            try:
+                # Extract the dict part after "Error code: XXX - "
+                dict_start = error_message.find("{")
+                if dict_start != -1:
+                    dict_str = error_message[dict_start:]
+                    error_dict = ast.literal_eval(dict_str)
+                    if 'error' in error_dict and 'message' in error_dict['error']:
+                        error_message = error_dict['error']['message']
+            except (ValueError, SyntaxError):
+                pass
+        
+        if "429" in error_message or "insufficient_quota" in error_message or "quota" in error_message.lower():
+            logger.error(
+                f"OpenAI API quota exceeded or billing issue. "
+                f"Please check your OpenAI account billing and usage limits. "
+                f"Error: {error_message}"
+            )
+        else:
+            logger.error(f"Error generating recipe: {error_message}")
+        return RecipeGenerationError(error_message, e)
+
+    error_msg = str(e)
+    logger.error(f"Error generating recipe: {error_msg}")
+    return RecipeGenerationError(error_msg, e)
 
 
 _recipe_generator: Optional[RecipeGenerator] = None
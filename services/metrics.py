@@ -0,0 +1,188 @@
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+# Seconds; spans sub-millisecond cache hits to LLM calls near the deadline
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Histogram:
+    """Bucketed distribution of observed values per combination of label values.
+
+    Bucket counts are kept per bucket and made cumulative when rendered, so
+    an observation costs one bisect and three additions.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def time(self, *labels: str) -> _Timer:
+        """Context manager that observes the seconds its block took."""
+        return _Timer(self, labels)
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Metrics:
+    """Request-path metrics, rendered in the Prometheus text format.
+
+    Hot paths only update in-memory counters and histograms. Figures that
+    other components already keep (cache, scheduler, writer) are read from
+    their ``stats()`` when ``/metrics`` is scraped and passed to ``render``.
+    """
+
+    def __init__(self):
+        self.stage_seconds = Histogram(
+            "recipe_stage_duration_seconds",
+            "Time spent in each stage of serving a recipe",
+            ("stage",),
+        )
+        self.db_lookups = Counter(
+            "recipe_db_lookups_total",
+            "Database lookups for queries missing from the response cache, by result (hit, fuzzy_hit, semantic_hit, miss)",
+            ("result",),
+        )
+        self.generations = Counter(
+            "recipe_generations_total",
+            "Recipe generations started by this process, by outcome",
+            ("outcome",),
+        )
+        self.generation_failures = Counter(
+            "recipe_generation_failures_total",
+            "Failed recipe generations, by error class and the class of the error that caused it",
+            ("error", "cause"),
+        )
+        self.llm_tokens = Counter(
+            "llm_tokens_total",
+            "Tokens reported in OpenAI response usage, by model and kind (prompt, completion)",
+            ("model", "kind"),
+        )
+
+    def metrics(self) -> list:
+        return [self.stage_seconds, self.db_lookups, self.generations, self.generation_failures, self.llm_tokens]
+
+    def record_usage(self, model: str, usage) -> None:
+        """Count the tokens of an OpenAI ``usage`` object; ``None`` is ignored."""
+        if usage is None:
+            return
+        self.llm_tokens.inc(model, "prompt", amount=getattr(usage, "prompt_tokens", 0) or 0)
+        self.llm_tokens.inc(model, "completion", amount=getattr(usage, "completion_tokens", 0) or 0)
+
+    def record_failure(self, error: Exception) -> None:
+        cause = getattr(error, "original_error", None) or error
+        self.generations.inc("failure")
+        self.generation_failures.inc(type(error).__name__, type(cause).__name__)
+
+    def render(self, extra: Iterable[Tuple[str, str, str, float]] = ()) -> str:
+        """All metrics, followed by ``extra`` ``(name, type, help, value)`` samples."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for name, kind, documentation, value in extra:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
@@ -0,0 +1,63 @@
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyWindow:
+    """The most recent ``size`` latency samples, in seconds."""
+
+    def __init__(self, size: int = 512):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class TierStats:
+    """Outcome counters and completion latency for one model tier."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.calls = 0
+        self.wins = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.hedges = 0
+        self.latency = LatencyWindow()
+
+    def stats(self) -> dict:
+        def ms(p: float) -> Optional[float]:
+            value = self.latency.percentile(p)
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "calls": self.calls,
+            "wins": self.wins,
+            "failures": self.failures,
+            "cancelled": self.cancelled,
+            "hedges": self.hedges,
+            "latency_ms": {"p50": ms(50), "p95": ms(95), "p99": ms(99)},
+        }
+
+
+_tier_stats: Dict[str, TierStats] = {}
+
+
+def get_tier_stats(model: str) -> TierStats:
+    stats = _tier_stats.get(model)
+    if stats is None:
+        stats = _tier_stats[model] = TierStats(model)
+    return stats
+
+
+def tier_stats() -> dict:
+    return {model: stats.stats() for model, stats in _tier_stats.items()}
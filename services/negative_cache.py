@@ -0,0 +1,84 @@
+import logging
+from typing import Dict, Optional, Tuple
+
+from core.config import (
+    NEGATIVE_CACHE_MAX_ENTRIES,
+    NEGATIVE_CACHE_REJECTION_TTL_SECONDS,
+    NEGATIVE_CACHE_FAILURE_TTL_SECONDS,
+)
+from services.response_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# (status code, detail, headers) of the error to answer with
+CachedError = Tuple[int, str, Optional[Dict[str, str]]]
+
+
+class NegativeCache:
+    """Queries that cannot be answered, so repeats fail without redoing the work.
+
+    Validator rejections are deterministic and kept for ``rejection_ttl``.
+    They are keyed by the exact stripped query, because the validator's
+    name-pattern check depends on capitalization. Failed generations are
+    keyed by normalized query, like generations themselves, and kept for the
+    shorter ``failure_ttl`` so the query is tried again once the provider or
+    model has had a chance to recover.
+    """
+
+    def __init__(self, max_entries: int, rejection_ttl: float, failure_ttl: float):
+        self.rejections: TTLCache[str] = TTLCache(max_entries, rejection_ttl)
+        self.failures: TTLCache[CachedError] = TTLCache(max_entries, failure_ttl)
+        self.purged = 0
+
+    def get_rejection(self, query: str) -> Optional[str]:
+        """The validator's error message for ``query``, if it was rejected."""
+        return self.rejections.get(query)
+
+    def reject(self, query: str, message: str) -> None:
+        self.rejections.put(query, message)
+
+    def get_failure(self, cache_key: str) -> Optional[CachedError]:
+        return self.failures.get(cache_key)
+
+    def record_failure(
+        self, cache_key: str, status_code: int, detail: str, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        self.failures.put(cache_key, (status_code, detail, headers))
+
+    def purge(self, query: Optional[str] = None, cache_key: Optional[str] = None) -> int:
+        """Drop the entries for ``query`` and ``cache_key``, or everything if neither is given."""
+        if query is None and cache_key is None:
+            purged = len(self.rejections) + len(self.failures)
+            self.rejections.clear()
+            self.failures.clear()
+        else:
+            purged = 0
+            if query is not None and self.rejections.pop(query) is not None:
+                purged += 1
+            if cache_key is not None and self.failures.pop(cache_key) is not None:
+                purged += 1
+        self.purged += purged
+        if purged:
+            logger.info(f"Purged {purged} negative cache entries")
+        return purged
+
+    def stats(self) -> dict:
+        return {
+            "rejections": self.rejections.stats(),
+            "failures": self.failures.stats(),
+            "purged": self.purged,
+        }
+
+
+_negative_cache: Optional[NegativeCache] = None
+
+
+def get_negative_cache() -> NegativeCache:
+    global _negative_cache
+    if _negative_cache is None:
+        _negative_cache = NegativeCache(
+            NEGATIVE_CACHE_MAX_ENTRIES,
+            NEGATIVE_CACHE_REJECTION_TTL_SECONDS,
+            NEGATIVE_CACHE_FAILURE_TTL_SECONDS,
+        )
+    return _negative_cache
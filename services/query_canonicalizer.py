@@ -0,0 +1,100 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# Request phrasing that carries no information about which drink is wanted.
+# Matched as whole words after folding, longest first.
+FILLER_PHRASES = [
+    "how do i make", "how do you make", "how to make", "how to mix",
+    "how to prepare", "recipe for", "recipes for", "make me", "give me",
+    "i want", "please", "recipe", "recipes", "the", "a", "an", "of",
+]
+
+# "Cocktail" and "drink" are part of names such as Champagne Cocktail or
+# Prawn Cocktail, so they are only dropped where the request introduces a name
+_NAMING_RE = re.compile(r"\b(?:cocktail|drink)s? (?:called|named)\b")
+
+# Spelling variants folded onto one form, applied per token after singularizing
+SPELLING_VARIANTS = {
+    "whisky": "whiskey",
+    "whiskies": "whiskey",
+    "daquiri": "daiquiri",
+    "daiquiry": "daiquiri",
+    "oldfashioned": "old fashioned",
+    "cosmo": "cosmopolitan",
+    "margharita": "margarita",
+    "expresso": "espresso",
+    "liquer": "liqueur",
+    "licor": "liqueur",
+}
+
+# Plural-looking words that must not be singularized
+_SINGULAR_EXCEPTIONS = {
+    "bitters", "paris", "ramos", "rocks", "citrus", "hibiscus", "collins", "oasis", "adonis", "atlas",
+}
+
+_FILLER_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(p) for p in sorted(FILLER_PHRASES, key=len, reverse=True)) + r")\b"
+)
+_APOSTROPHE_RE = re.compile(r"['’`]")
+_NON_WORD_RE = re.compile(r"[^\w]+|_+")
+
+
+def fold_text(text: str) -> str:
+    """Unicode-normalize, lowercase and collapse whitespace.
+
+    This is the light folding shared by the validator, which still needs
+    diacritics and punctuation to match its keyword lists.
+    """
+    if not text:
+        return ""
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+def strip_diacritics(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def singularize(word: str) -> str:
+    if len(word) <= 3 or word in _SINGULAR_EXCEPTIONS:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes", "zzes")):
+        return word[:-2]
+    if word.endswith(("ss", "us")):
+        return word
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=4096)
+def canonicalize_query(text: str) -> str:
+    """Reduce a query to the canonical key used for lookups and storage.
+
+    Stages: fold case and whitespace, strip diacritics, drop punctuation,
+    remove request phrasing, then singularize and fold spelling variants per
+    token, dropping immediate repeats. If only filler remains (e.g.
+    "recipe"), the de-punctuated text is kept so the key is never empty for
+    a non-empty query.
+    """
+    folded = strip_diacritics(fold_text(text))
+    folded = folded.replace("&", " and ")
+    folded = _APOSTROPHE_RE.sub("", folded)
+    words = _NON_WORD_RE.sub(" ", folded).split()
+    if not words:
+        return ""
+
+    stripped = _FILLER_RE.sub(" ", _NAMING_RE.sub(" ", " ".join(words))).split() or words
+
+    tokens = []
+    for word in stripped:
+        word = SPELLING_VARIANTS.get(word, word)
+        word = singularize(word)
+        word = SPELLING_VARIANTS.get(word, word)
+        # "WHISKEY (WHISKY) SOUR" folds to a repeated token
+        if not tokens or tokens[-1] != word:
+            tokens.append(word)
+    return " ".join(tokens)
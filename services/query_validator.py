@@ -1,6 +1,8 @@
 import re
 import logging
-from typing import Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from services.query_canonicalizer import canonicalize_query, fold_text
 
 logger = logging.getLogger(__name__)
 
@@ -49,44 +51,145 @@ NEGATIVE_KEYWORDS = [
 ]
 
 
-def validate_cocktail_wine_query(query: str) -> Tuple[bool, str]:
-    if not query or not query.strip():
-        return False, "Query cannot be empty"
-    
-    query_lower = query.lower().strip()
-    
-    for negative_keyword in NEGATIVE_KEYWORDS:
-        pattern = r'\b' + re.escape(negative_keyword) + r'\b'
-        if re.search(pattern, query_lower):
-            if not _is_cocktail_wine_context(query_lower, negative_keyword):
-                logger.warning(f"Query rejected due to negative keyword: '{negative_keyword}' in '{query}'")
-                return False, f"Query must be related to cocktails or wine only. Found unrelated topic: '{negative_keyword}'"
-    
-    cocktail_match = _check_keywords(query_lower, COCKTAIL_KEYWORDS)
-    wine_match = _check_keywords(query_lower, WINE_KEYWORDS)
-    
-    if cocktail_match or wine_match:
-        logger.info(f"Query validated as {'cocktail' if cocktail_match else 'wine'} related: '{query}'")
-        return True, ""
-    
-    if _is_cocktail_name_pattern(query, query_lower):
-        logger.info(f"Query validated as cocktail name pattern: '{query}'")
-        return True, ""
-    
-    logger.warning(f"Query rejected - no cocktail/wine keywords found: '{query}'")
-    return False, "Query must be related to cocktails or wine only. Please provide a cocktail name, wine type, or related query."
+# Negative keywords that are allowed when the query also mentions one of the
+# context words (plain substring match)
+CONTEXT_EXCEPTIONS = {
+    "recipe": ["cocktail", "drink", "wine"],
+    "ingredient": ["cocktail", "drink", "wine", "gin", "vodka", "rum"],
+}
+
+_NAME_FILLER_PATTERN = r'\b(the|a|an|how to make|recipe for|how to)\b'
+_NAME_FILLER_RE = re.compile(_NAME_FILLER_PATTERN)
+_NAME_FILLER_RE_IGNORECASE = re.compile(_NAME_FILLER_PATTERN, flags=re.IGNORECASE)
+_WORD_CHAR_RE = re.compile(r"\w")
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation factored by common prefixes, so a match attempt costs
+    O(keyword length) instead of one attempt per keyword. Optional suffixes are
+    greedy, so the longest keyword at a position is tried first."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        alternatives = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        if "" in node:
+            return ("(?:" + body + ")?") if len(alternatives) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Whole-word matching of a keyword list with a single compiled regex."""
+
+    def __init__(self, keywords: Iterable[str]):
+        unique = sorted(set(keywords))
+        self._pattern: Optional[re.Pattern] = None
+        if unique:
+            # Zero-width lookahead so matches starting inside an earlier match
+            # (e.g. "wine list" inside "red wine list") are still reported
+            self._pattern = re.compile(r"(?=\b(" + _trie_pattern(unique) + r")\b)")
+        # Shorter keywords that also match wherever a longer one does, e.g.
+        # "wine" for "wine list"; the regex only reports the longest
+        self._shadowed: Dict[str, List[str]] = {}
+        for keyword in unique:
+            shadowed = [
+                other for other in unique
+                if len(other) < len(keyword) and keyword.startswith(other)
+                and _is_word_boundary(keyword, len(other))
+            ]
+            if shadowed:
+                self._shadowed[keyword] = shadowed
+
+    def search(self, text: str) -> bool:
+        return self._pattern is not None and self._pattern.search(text) is not None
+
+    def find_all(self, text: str) -> Set[str]:
+        found: Set[str] = set()
+        if self._pattern is None:
+            return found
+        for match in self._pattern.finditer(text):
+            keyword = match.group(1)
+            found.add(keyword)
+            found.update(self._shadowed.get(keyword, ()))
+        return found
+
+
+def _is_word_boundary(text: str, index: int) -> bool:
+    return bool(_WORD_CHAR_RE.match(text[index - 1])) != bool(_WORD_CHAR_RE.match(text[index]))
 
 
-def _check_keywords(query: str, keywords: list) -> bool:
-    for keyword in keywords:
-        pattern = r'\b' + re.escape(keyword) + r'\b'
-        if re.search(pattern, query):
-            return True
-    return False
+class QueryValidator:
+    def __init__(
+        self,
+        cocktail_keywords: Iterable[str],
+        wine_keywords: Iterable[str],
+        negative_keywords: Iterable[str],
+        context_exceptions: Optional[Dict[str, List[str]]] = None,
+    ):
+        negative_keywords = list(negative_keywords)
+        # Rejections report the first negative keyword in list order
+        self._negative_order: Dict[str, int] = {}
+        for i, keyword in enumerate(negative_keywords):
+            self._negative_order.setdefault(keyword, i)
+        self._negative = KeywordMatcher(negative_keywords)
+        self._cocktail = KeywordMatcher(cocktail_keywords)
+        self._wine = KeywordMatcher(wine_keywords)
+        self._exceptions = CONTEXT_EXCEPTIONS if context_exceptions is None else context_exceptions
+
+    def validate(self, query: str) -> Tuple[bool, str]:
+        if not query or not query.strip():
+            return False, "Query cannot be empty"
+
+        query_lower = fold_text(query)
+
+        cocktail_match = self._cocktail.search(query_lower)
+        wine_match = self._wine.search(query_lower)
+
+        negatives = self._negative.find_all(query_lower)
+        if negatives and not (cocktail_match or wine_match):
+            for negative_keyword in sorted(negatives, key=self._negative_order.__getitem__):
+                context = self._exceptions.get(negative_keyword, ())
+                if not any(word in query_lower for word in context):
+                    logger.warning(f"Query rejected due to negative keyword: '{negative_keyword}' in '{query}'")
+                    return False, f"Query must be related to cocktails or wine only. Found unrelated topic: '{negative_keyword}'"
+
+        if not (cocktail_match or wine_match):
+            # Plurals and spelling variants ("margaritas", "whisky sours") match
+            # once reduced to the same canonical form used for lookups
+            query_canonical = canonicalize_query(query)
+            cocktail_match = self._cocktail.search(query_canonical)
+            wine_match = self._wine.search(query_canonical)
+
+        if cocktail_match or wine_match:
+            logger.info(f"Query validated as {'cocktail' if cocktail_match else 'wine'} related: '{query}'")
+            return True, ""
+
+        if _is_cocktail_name_pattern(query, query_lower):
+            logger.info(f"Query validated as cocktail name pattern: '{query}'")
+            return True, ""
+
+        logger.warning(f"Query rejected - no cocktail/wine keywords found: '{query}'")
+        return False, "Query must be related to cocktails or wine only. Please provide a cocktail name, wine type, or related query."
+
+
+_default_validator = QueryValidator(COCKTAIL_KEYWORDS, WINE_KEYWORDS, NEGATIVE_KEYWORDS)
+
+
+def validate_cocktail_wine_query(query: str) -> Tuple[bool, str]:
+    return _default_validator.validate(query)
 
 
 def _is_cocktail_name_pattern(query_original: str, query_lower: str) -> bool:
-    cleaned_lower = re.sub(r'\b(the|a|an|how to make|recipe for|how to)\b', '', query_lower).strip()
+    cleaned_lower = _NAME_FILLER_RE.sub('', query_lower).strip()
     
     if not cleaned_lower:
         return False
@@ -101,7 +204,7 @@ def _is_cocktail_name_pattern(query_original: str, query_lower: str) -> bool:
     if any(word in cleaned_lower for word in ['what', 'where', 'when', 'why', 'how', '?']):
         return False
     
-    cleaned_original = re.sub(r'\b(the|a|an|how to make|recipe for|how to)\b', '', query_original, flags=re.IGNORECASE).strip()
+    cleaned_original = _NAME_FILLER_RE_IGNORECASE.sub('', query_original).strip()
     
     if not cleaned_original:
         return False
@@ -119,21 +222,3 @@ def _is_cocktail_name_pattern(query_original: str, query_lower: str) -> bool:
     )
     
     return all_uppercase or all_title_case
-
-
-def _is_cocktail_wine_context(query: str, keyword: str) -> bool:
-    if _check_keywords(query, COCKTAIL_KEYWORDS + WINE_KEYWORDS):
-        return True
-    
-    exceptions = [
-        ("recipe", ["cocktail", "drink", "wine"]),
-        ("ingredient", ["cocktail", "drink", "wine", "gin", "vodka", "rum"]),
-    ]
-    
-    for neg_keyword, context_keywords in exceptions:
-        if keyword == neg_keyword:
-            if any(ctx in query for ctx in context_keywords):
-                return True
-    
-    return False
-
@@ -0,0 +1,294 @@
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Set, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.recipe import Recipe, RecipeAlias
+from schemas.recipe import RecipeResponse
+from services.fuzzy_matcher import get_fuzzy_index
+from services.semantic_index import get_semantic_index
+from services.similarity_index import get_similarity_index
+from services.ingredient_index import get_ingredient_index
+from services.recipe_service import recipe_lookup_keys, response_to_recipe_data
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+READ_SIZE = 1 << 16
+# Longest row, in characters, buffered while looking for its end
+MAX_ROW_SIZE = 1 << 20
+
+# Columns overwritten when an imported row's lookup key already exists
+_UPSERT_COLUMNS = (
+    "title", "search_query", "title_key", "history", "technique", "glass_type",
+    "ingredients", "tasting_profile", "method", "tip", "response_json",
+)
+
+
+def iter_recipe_file(path: Union[str, Path]) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(position, row)`` from an NDJSON file or a JSON array file.
+
+    The format is detected from the first non-blank character. Both are read
+    incrementally, so memory use is bounded by the largest single row rather
+    than the file size; a row longer than ``MAX_ROW_SIZE`` characters, such
+    as a malformed array element swallowing the rest of the file, raises
+    ValueError with its position and character offset. Positions are 1-based
+    line numbers for NDJSON and array indexes for JSON.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(READ_SIZE)
+        if head.lstrip()[:1] == "[":
+            yield from _iter_json_array(f, head)
+        else:
+            yield from _iter_ndjson(f, head)
+
+
+def _iter_ndjson(f, head: str) -> Iterator[Tuple[int, Any]]:
+    pending = head
+    line_number = 0
+    offset = 0
+    while True:
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            line_number += 1
+            offset += len(line) + 1
+            if line.strip():
+                yield line_number, _decode(line)
+        if len(pending) > MAX_ROW_SIZE:
+            raise ValueError(
+                f"Line {line_number + 1} at offset {offset} is longer than {MAX_ROW_SIZE} characters"
+            )
+        chunk = f.read(READ_SIZE)
+        if not chunk:
+            break
+        pending += chunk
+    if pending.strip():
+        yield line_number + 1, _decode(pending)
+
+
+def _decode(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        return ValueError(f"invalid JSON: {e}")
+
+
+def _iter_json_array(f, head: str) -> Iterator[Tuple[int, Any]]:
+    decoder = json.JSONDecoder()
+    offset = head.index("[") + 1
+    buffer = head[offset:]
+    pos = 0
+    index = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if buffer[pos:pos + 1] == "]":
+            return
+        try:
+            row, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The element may be cut off by the read boundary; keep only its start
+            if len(buffer) - pos > MAX_ROW_SIZE:
+                raise ValueError(
+                    f"Invalid JSON array element at index {index}, offset {offset + pos}: "
+                    f"no complete value within {MAX_ROW_SIZE} characters"
+                )
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                raise ValueError(f"Invalid or truncated JSON array element at index {index}, offset {offset + pos}")
+            offset += pos
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield index, row
+        index += 1
+
+
+def _validated_rows(rows: Iterable[Tuple[int, Any]], stats: dict) -> Iterator[dict]:
+    for position, row in rows:
+        stats["rows"] += 1
+        try:
+            if isinstance(row, Exception):
+                raise row
+            if not isinstance(row, dict):
+                raise ValueError("row is not a JSON object")
+            recipe_response = RecipeResponse.model_validate(row)
+        except (ValidationError, ValueError) as e:
+            stats["invalid"] += 1
+            if stats["invalid"] <= 10:
+                logger.warning(f"Skipping invalid recipe at {position}: {e}")
+            continue
+        search_query = row.get("search_query")
+        if not isinstance(search_query, str) or not search_query.strip():
+            search_query = recipe_response.title
+        yield response_to_recipe_data(recipe_response, search_query)
+
+
+async def _write_chunk(
+    db: AsyncSession, chunk: List[dict], update_existing: bool = True
+) -> Tuple[List[Tuple[str, int]], List[Tuple[int, dict]], int]:
+    """Upsert one chunk; returns the new alias keys, the ``(recipe_id, row)`` pairs written
+    and the number of stored rows left as they were.
+
+    As in ``create_recipes``, a new row whose normalized title already
+    belongs to a recipe, stored or earlier in the chunk, is not written; its
+    query becomes an alias of that recipe. Without ``update_existing``, rows
+    whose lookup key is already stored are skipped rather than updated.
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        select(Recipe.lookup_key, Recipe.id)
+        .where(Recipe.lookup_key.in_([recipe_data["lookup_key"] for recipe_data in chunk]))
+    )
+    recipe_ids = dict(result.all())
+    new_title_keys = {
+        recipe_data["title_key"] for recipe_data in chunk
+        if recipe_data["title_key"] and recipe_data["lookup_key"] not in recipe_ids
+    }
+    title_ids = {}
+    if new_title_keys:
+        result = await db.execute(
+            select(Recipe.title_key, func.min(Recipe.id))
+            .where(Recipe.title_key.in_(new_title_keys))
+            .group_by(Recipe.title_key)
+        )
+        title_ids = dict(result.all())
+
+    rows, aliased, title_owners, existing = [], [], {}, 0
+    for recipe_data in chunk:
+        title_key = recipe_data["title_key"]
+        if not update_existing and recipe_data["lookup_key"] in recipe_ids:
+            existing += 1
+            continue
+        if recipe_data["lookup_key"] not in recipe_ids and (title_key in title_ids or title_key in title_owners):
+            aliased.append(recipe_data)
+            continue
+        recipe_data["updated_at"] = now
+        rows.append(recipe_data)
+        if title_key and title_key not in title_ids:
+            title_owners.setdefault(title_key, recipe_data["lookup_key"])
+
+    if rows:
+        # Core table inserts skip the ORM bulk-persistence layer
+        insert = sqlite_insert(Recipe.__table__)
+        await db.execute(
+            insert.on_conflict_do_update(
+                index_elements=["lookup_key"],
+                set_={column: insert.excluded[column] for column in _UPSERT_COLUMNS + ("updated_at",)},
+            ),
+            rows,
+        )
+        result = await db.execute(
+            select(Recipe.lookup_key, Recipe.id)
+            .where(Recipe.lookup_key.in_([recipe_data["lookup_key"] for recipe_data in rows]))
+        )
+        recipe_ids.update(result.all())
+    for title_key, lookup_key in title_owners.items():
+        title_ids[title_key] = recipe_ids[lookup_key]
+
+    aliases = {}
+    entries = [
+        (recipe_ids[recipe_data["lookup_key"]], recipe_data["lookup_key"], recipe_data["search_query"])
+        for recipe_data in rows
+    ]
+    entries += [
+        (recipe_ids[recipe_data["lookup_key"]], recipe_data["title_key"], recipe_data["title"])
+        for recipe_data in rows
+    ]
+    entries += [
+        (title_ids[recipe_data["title_key"]], recipe_data["lookup_key"], recipe_data["search_query"])
+        for recipe_data in aliased
+    ]
+    for recipe_id, alias_key, alias in entries:
+        if alias_key and alias_key not in aliases:
+            aliases[alias_key] = {"alias_key": alias_key, "alias": alias.strip(), "recipe_id": recipe_id}
+    if aliases:
+        # An alias that already points at a recipe keeps its first mapping
+        await db.execute(
+            sqlite_insert(RecipeAlias.__table__).on_conflict_do_nothing(index_elements=["alias_key"]),
+            list(aliases.values()),
+        )
+    await db.commit()
+    written = [(recipe_ids[recipe_data["lookup_key"]], recipe_data) for recipe_data in rows]
+    return [(alias_key, alias["recipe_id"]) for alias_key, alias in aliases.items()], written, existing
+
+
+async def import_recipes(
+    db: AsyncSession,
+    rows: Iterable[Tuple[Any, Any]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    update_existing: bool = True,
+) -> dict:
+    """Validate and upsert recipes in chunked transactions.
+
+    ``rows`` are ``(position, row)`` pairs, as produced by ``iter_recipe_file``
+    or ``enumerate``; each row is a dict in the ``RecipeResponse`` shape,
+    optionally with a ``search_query``. Positions only label log messages.
+
+    Rows are keyed by their normalized search query (or title). The first
+    row for a key wins within one import; an existing recipe with that key is
+    updated in place, or left as it is and counted as existing without
+    ``update_existing``. A new key whose normalized title is already stored is
+    recorded as an alias of that recipe instead, as ``create_recipes`` does.
+    Each chunk is written with two lookups, one executemany upsert, one id
+    lookup and one executemany alias insert, then committed.
+
+    Returns counts plus elapsed seconds and rows per second.
+    """
+    stats = {"rows": 0, "imported": 0, "aliased": 0, "existing": 0, "invalid": 0, "duplicates": 0}
+    seen: Set[str] = set()
+    chunk: List[dict] = []
+    start = time.perf_counter()
+
+    async def flush() -> None:
+        alias_keys, written, existing = await _write_chunk(db, chunk, update_existing)
+        get_fuzzy_index().add_many(alias_keys)
+        get_semantic_index().add_many(alias_keys)
+        # Upserted recipes replace their rows
+        get_similarity_index().add_many(
+            (recipe_id, recipe_data["ingredients"], recipe_data["tasting_profile"])
+            for recipe_id, recipe_data in written
+        )
+        get_ingredient_index().add_many(
+            (recipe_id, recipe_data["ingredients"]) for recipe_id, recipe_data in written
+        )
+        stats["imported"] += len(written)
+        stats["existing"] += existing
+        stats["aliased"] += len(chunk) - len(written) - existing
+        chunk.clear()
+        elapsed = time.perf_counter() - start
+        logger.info(f"Imported {stats['imported']} recipes ({stats['imported'] / elapsed:,.0f} rows/s)")
+
+    for recipe_data in _validated_rows(rows, stats):
+        recipe_data["lookup_key"], recipe_data["title_key"] = recipe_lookup_keys(
+            recipe_data["search_query"], recipe_data["title"]
+        )
+        if recipe_data["lookup_key"] in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(recipe_data["lookup_key"])
+        chunk.append(recipe_data)
+        if len(chunk) >= chunk_size:
+            await flush()
+    if chunk:
+        await flush()
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    stats["rows_per_second"] = round(stats["rows"] / stats["seconds"]) if stats["seconds"] else 0
+    return stats
+
+
+async def import_recipe_file(
+    db: AsyncSession,
+    path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict:
+    return await import_recipes(db, iter_recipe_file(path), chunk_size)
@@ -1,8 +1,19 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func as sql_func
-from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import hashlib
 import logging
-from models.recipe import Recipe
+from models.recipe import Recipe, RecipeAlias
+from services.query_canonicalizer import canonicalize_query
+from services.fuzzy_matcher import get_fuzzy_index
+from services.semantic_index import get_semantic_index
+from services.similarity_index import get_similarity_index
+from services.ingredient_index import get_ingredient_index
+from services.compression import compress
 from schemas.recipe import RecipeResponse, Ingredient, TastingProfile
 
 logger = logging.getLogger(__name__)
@@ -11,8 +22,13 @@ logger = logging.getLogger(__name__)
 def normalize_for_search(text: str) -> str:
     if not text:
         return ""
-    normalized = " ".join(text.lower().strip().split())
-    return normalized
+    return canonicalize_query(text)
+
+
+def recipe_lookup_keys(search_query: Optional[str], title: str) -> Tuple[Optional[str], Optional[str]]:
+    title_key = normalize_for_search(title) or None
+    lookup_key = normalize_for_search(search_query) or title_key
+    return lookup_key, title_key
 
 
 async def search_recipe_by_query(
@@ -26,32 +42,244 @@ async def search_recipe_by_query(
         return None
     
     result = await db.execute(
-        select(Recipe).where(
-            sql_func.lower(Recipe.search_query) == normalized_query
-        )
+        select(Recipe)
+        .join(RecipeAlias, RecipeAlias.recipe_id == Recipe.id)
+        .where(RecipeAlias.alias_key == normalized_query)
     )
-    recipe = result.scalar_one_or_none()
-    
-    if recipe:
-        return recipe
-    
+    return result.scalar_one_or_none()
+
+
+async def search_recipe_fuzzy(
+    db: AsyncSession,
+    query: str
+) -> Optional[Tuple[Recipe, float]]:
+    match = get_fuzzy_index().match(normalize_for_search(query))
+    if match is None:
+        return None
+
+    recipe_id, matched_key, score = match
+    recipe = await db.get(Recipe, recipe_id)
+    if recipe is None:
+        return None
+    logger.info(f"Fuzzy matched '{query}' to '{matched_key}' (similarity {score:.2f})")
+    return recipe, score
+
+
+async def search_recipe_semantic(
+    db: AsyncSession,
+    query: str
+) -> Optional[Tuple[Recipe, float]]:
+    index = get_semantic_index()
+    if not index.enabled:
+        return None
+    key = normalize_for_search(query)
+    if not key:
+        return None
+    # The scan is linear in the catalog, so it runs off the event loop; the
+    # counters are only updated here, on the loop
+    match, refused = await asyncio.to_thread(index.find, key)
+    index.record(match, refused)
+    if match is None:
+        return None
+
+    recipe_id, matched_key, score = match
+    recipe = await db.get(Recipe, recipe_id)
+    if recipe is None:
+        return None
+    logger.info(f"Semantically matched '{query}' to '{matched_key}' (similarity {score:.2f})")
+    return recipe, score
+
+
+async def load_semantic_index(db: AsyncSession) -> int:
+    result = await db.execute(
+        select(RecipeAlias.alias_key, RecipeAlias.recipe_id).order_by(RecipeAlias.id)
+    )
+    index = get_semantic_index()
+    index.clear()
+    index.add_many(result.all())
+    return len(index)
+
+
+async def load_similarity_index(db: AsyncSession) -> int:
+    result = await db.execute(
+        select(Recipe.id, Recipe.ingredients, Recipe.tasting_profile).order_by(Recipe.id)
+    )
+    index = get_similarity_index()
+    index.clear()
+    index.add_many(result.all())
+    return len(index)
+
+
+async def load_ingredient_index(db: AsyncSession) -> int:
+    result = await db.execute(select(Recipe.id, Recipe.ingredients).order_by(Recipe.id))
+    index = get_ingredient_index()
+    index.clear()
+    index.add_many(result.all())
+    return len(index)
+
+
+async def load_fuzzy_index(db: AsyncSession) -> int:
+    result = await db.execute(
+        select(RecipeAlias.alias_key, RecipeAlias.recipe_id).order_by(RecipeAlias.id)
+    )
+    index = get_fuzzy_index()
+    index.clear()
+    index.add_many(result.all())
+    return len(index)
+
+
+async def search_recipes_by_keys(
+    db: AsyncSession,
+    keys: Iterable[str]
+) -> Dict[str, Recipe]:
+    """Resolve many normalized keys with a single query, keyed by alias key."""
+    keys = {key for key in keys if key}
+    if not keys:
+        return {}
+    result = await db.execute(
+        select(RecipeAlias.alias_key, Recipe)
+        .join(Recipe, RecipeAlias.recipe_id == Recipe.id)
+        .where(RecipeAlias.alias_key.in_(keys))
+    )
+    return {alias_key: recipe for alias_key, recipe in result.all()}
+
+
+async def get_recipes_by_ids(
+    db: AsyncSession,
+    recipe_ids: Iterable[int]
+) -> Dict[int, Recipe]:
+    """Stored recipes by id, with a single query; unknown ids are left out."""
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return {}
+    result = await db.execute(select(Recipe).where(Recipe.id.in_(recipe_ids)))
+    return {recipe.id: recipe for recipe in result.scalars()}
+
+
+async def search_recipes_by_title_keys(
+    db: AsyncSession,
+    title_keys: Iterable[Optional[str]]
+) -> Dict[str, Recipe]:
+    """Oldest stored recipe for each normalized title, with a single query."""
+    title_keys = {key for key in title_keys if key}
+    if not title_keys:
+        return {}
     result = await db.execute(
-        select(Recipe).where(
-            sql_func.lower(Recipe.title) == normalized_query
+        select(Recipe)
+        .where(Recipe.title_key.in_(title_keys))
+        .order_by(Recipe.id)
+    )
+    by_title: Dict[str, Recipe] = {}
+    for existing in result.scalars():
+        by_title.setdefault(existing.title_key, existing)
+    return by_title
+
+
+async def _insert_aliases(
+    db: AsyncSession,
+    entries: Iterable[Tuple[int, Optional[str]]]
+) -> List[Tuple[str, int]]:
+    rows = {}
+    for recipe_id, alias in entries:
+        alias_key = normalize_for_search(alias)
+        if alias_key and alias_key not in rows:
+            rows[alias_key] = {"alias_key": alias_key, "alias": alias.strip(), "recipe_id": recipe_id}
+    if not rows:
+        return []
+    # An alias that already points at a recipe keeps its first mapping
+    await db.execute(
+        sqlite_insert(RecipeAlias)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(index_elements=["alias_key"])
+    )
+    return [(alias_key, row["recipe_id"]) for alias_key, row in rows.items()]
+
+
+async def add_recipe_aliases(
+    db: AsyncSession,
+    recipe_id: int,
+    aliases: Iterable[Optional[str]]
+) -> List[str]:
+    inserted = await _insert_aliases(db, ((recipe_id, alias) for alias in aliases))
+    return [alias_key for alias_key, _ in inserted]
+
+
+async def create_recipes(
+    db: AsyncSession,
+    recipes_data: List[dict]
+) -> List[Recipe]:
+    """Store several recipes and the aliases that resolve to them in one transaction.
+
+    Returns the stored recipe for each input, in order. A recipe whose
+    normalized title already exists, in the database or earlier in the batch,
+    is not written again; its query is recorded as an alias of that recipe.
+    """
+    recipes = []
+    for recipe_data in recipes_data:
+        recipe = Recipe(**recipe_data)
+        if recipe.lookup_key is None or recipe.title_key is None:
+            recipe.lookup_key, recipe.title_key = recipe_lookup_keys(recipe.search_query, recipe.title)
+        recipes.append(recipe)
+
+    by_title = await search_recipes_by_title_keys(db, (recipe.title_key for recipe in recipes))
+
+    stored, new_recipes = [], []
+    for recipe in recipes:
+        existing = by_title.get(recipe.title_key) if recipe.title_key else None
+        if existing is not None:
+            logger.info(f"Recording alias '{recipe.search_query}' for existing recipe: {existing.title}")
+            stored.append(existing)
+            continue
+        db.add(recipe)
+        if recipe.title_key:
+            by_title[recipe.title_key] = recipe
+        stored.append(recipe)
+        new_recipes.append(recipe)
+    await db.flush()
+
+    aliases = []
+    for recipe, target in zip(recipes, stored):
+        aliases.append((target.id, recipe.search_query))
+        if target is recipe:
+            aliases.append((target.id, recipe.title))
+    alias_keys = await _insert_aliases(db, aliases)
+    await db.commit()
+
+    if new_recipes:
+        # Load server defaults for every new row in one query
+        await db.execute(
+            select(Recipe)
+            .where(Recipe.id.in_([recipe.id for recipe in new_recipes]))
+            .execution_options(populate_existing=True)
         )
+    get_fuzzy_index().add_many(alias_keys)
+    get_semantic_index().add_many(alias_keys)
+    get_similarity_index().add_many(
+        (recipe.id, recipe.ingredients, recipe.tasting_profile) for recipe in new_recipes
     )
-    return result.scalar_one_or_none()
+    get_ingredient_index().add_many((recipe.id, recipe.ingredients) for recipe in new_recipes)
+    return stored
 
 
 async def create_recipe(
     db: AsyncSession,
     recipe_data: dict
 ) -> Recipe:
-    recipe = Recipe(**recipe_data)
-    db.add(recipe)
-    await db.commit()
-    await db.refresh(recipe)
-    return recipe
+    """Store a recipe and the aliases that resolve to it.
+
+    If a recipe with the same normalized title already exists, no new row is
+    written; the query is recorded as an alias of the existing recipe, which is
+    returned instead.
+    """
+    stored = await create_recipes(db, [recipe_data])
+    return stored[0]
+
+
+def response_to_recipe_data(recipe_response: RecipeResponse, search_query: str) -> dict:
+    recipe_data = recipe_response.model_dump()
+    recipe_data["search_query"] = search_query.strip()  # Store original query for exact matching
+    recipe_data["response_json"] = recipe_response.model_dump_json()
+    return recipe_data
 
 
 async def recipe_to_response(recipe: Recipe) -> RecipeResponse:
@@ -74,3 +302,53 @@ async def recipe_to_response(recipe: Recipe) -> RecipeResponse:
         tip=recipe.tip
     )
 
+
+class RecipeBody(bytes):
+    """Serialized recipe response that carries its HTTP validators.
+
+    Being bytes, it is cached, queued and spliced into batch and stream
+    responses like any other body. ``etag`` is a strong validator over the
+    content, hashed on first use; ``last_modified`` is when the recipe was
+    stored or generated, in UTC, if known. Compressed variants are kept on
+    the body too, so a cached recipe is compressed once per coding.
+    """
+
+    def __new__(cls, content: bytes, last_modified: Optional[datetime] = None):
+        body = super().__new__(cls, content)
+        if last_modified is not None and last_modified.tzinfo is None:
+            # SQLite hands back naive datetimes; they are stored in UTC
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        body.last_modified = last_modified
+        return body
+
+    @cached_property
+    def etag(self) -> str:
+        return '"' + hashlib.blake2b(self, digest_size=16).hexdigest() + '"'
+
+    @cached_property
+    def _encoded(self) -> Dict[str, bytes]:
+        return {}
+
+    def encoded(self, encoding: str) -> bytes:
+        """The body in content coding ``encoding``, compressed on first use and kept."""
+        content = self._encoded.get(encoding)
+        if content is None:
+            content = self._encoded[encoding] = compress(self, encoding)
+        return content
+
+
+def recipe_body(body: bytes) -> RecipeBody:
+    """``body`` as a RecipeBody; bodies without a known time get no Last-Modified."""
+    return body if isinstance(body, RecipeBody) else RecipeBody(body)
+
+
+async def recipe_response_json(recipe: Recipe) -> RecipeBody:
+    """Response body for a stored recipe.
+
+    Uses the JSON serialized when the recipe was written; rows without it are
+    rebuilt through RecipeResponse.
+    """
+    if recipe.response_json:
+        return RecipeBody(recipe.response_json.encode(), recipe.updated_at)
+    recipe_response = await recipe_to_response(recipe)
+    return RecipeBody(recipe_response.model_dump_json().encode(), recipe.updated_at)
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import RECIPE_WRITE_BATCH_SIZE, RECIPE_WRITE_FLUSH_SECONDS
+from db.base import AsyncSessionLocal
+from services.metrics import get_metrics
+from services.recipe_service import create_recipes, recipe_response_json
+from services.response_cache import get_recipe_cache
+
+logger = logging.getLogger(__name__)
+
+
+class RecipeWriter:
+    """Write-behind queue that persists generated recipes off the request path.
+
+    Submitted recipes are written by one background task, up to
+    ``batch_size`` per transaction through ``create_recipes``. A flush starts
+    as soon as a full batch is queued, or ``flush_interval`` seconds after the
+    previous one. Until a recipe's write has committed, its response body is
+    held here and served by ``get``, so an evicted or expired cache entry never
+    sends a query back to the LLM. A batch whose transaction fails is retried
+    in halves, down to single recipes, so one bad row costs only itself; a
+    recipe that cannot be written alone is logged and dropped, as it was when
+    recipes were written inline.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        batch_size: int,
+        flush_interval: float,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: List[Tuple[str, dict]] = []
+        self._pending: Dict[str, bytes] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def submit(self, key: str, recipe_data: dict, body: bytes) -> None:
+        """Queue ``recipe_data`` for the cache key ``key``, served as ``body`` meanwhile."""
+        self._pending.setdefault(key, body)
+        self._queue.append((key, recipe_data))
+        self._ensure_running()
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._pending.get(key)
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            # Bound to the running loop, so created with the task
+            self._wakeup = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # Shielded so close() cannot cancel a batch halfway through its write
+            await asyncio.shield(self.flush())
+
+    async def flush(self) -> int:
+        """Write everything queued so far; returns the number of recipes written."""
+        if self._lock is None:
+            return 0
+        written = 0
+        async with self._lock:
+            while self._queue:
+                batch = self._queue[:self.batch_size]
+                del self._queue[:self.batch_size]
+                written += await self._write(batch)
+        return written
+
+    async def _write(self, batch: List[Tuple[str, dict]]) -> int:
+        try:
+            bodies = await self._write_batch(batch)
+        except Exception as e:
+            self.failures += 1
+            if len(batch) > 1:
+                logger.warning(f"Error writing {len(batch)} generated recipes, retrying in halves: {e}")
+                middle = len(batch) // 2
+                return await self._write(batch[:middle]) + await self._write(batch[middle:])
+            key, _ = batch[0]
+            logger.error(f"Error writing generated recipe for '{key}', dropping it: {e}", exc_info=True)
+            self._pending.pop(key, None)
+            self.dropped += 1
+            return 0
+
+        for (key, _), body in zip(batch, bodies):
+            self._pending.pop(key, None)
+            if body is not None:
+                get_recipe_cache().put(key, body)
+        self.written += len(batch)
+        self.batches += 1
+        logger.info(f"Saved {len(batch)} generated recipes")
+        return len(batch)
+
+    async def _write_batch(self, batch: List[Tuple[str, dict]]) -> List[Optional[bytes]]:
+        """Store ``batch`` in one transaction; returns the body to cache for each recipe."""
+        async with self.session_factory() as db:
+            with get_metrics().stage_seconds.time("write"):
+                stored = await create_recipes(db, [recipe_data for _, recipe_data in batch])
+            bodies = []
+            for (key, _), recipe in zip(batch, stored):
+                if recipe.lookup_key == key:
+                    bodies.append(self._pending.get(key))
+                else:
+                    # Matched a recipe that was already stored, which stays canonical
+                    bodies.append(await recipe_response_json(recipe))
+        return bodies
+
+    async def close(self) -> None:
+        """Stop the background task and write whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "pending": len(self._pending),
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+        }
+
+
+_recipe_writer: Optional[RecipeWriter] = None
+
+
+def get_recipe_writer() -> RecipeWriter:
+    global _recipe_writer
+    if _recipe_writer is None:
+        _recipe_writer = RecipeWriter(AsyncSessionLocal, RECIPE_WRITE_BATCH_SIZE, RECIPE_WRITE_FLUSH_SECONDS)
+    return _recipe_writer
@@ -0,0 +1,232 @@
+import logging
+import zlib
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import SEMANTIC_DIMENSIONS, SEMANTIC_MATCH_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# Words that describe how a drink is asked for rather than which drink it is
+FILLER_WORDS = frozenset({
+    "a", "an", "and", "the", "of", "on", "in", "with", "my", "please", "like",
+    "version", "style", "variation", "twist", "kind", "type", "using", "made",
+    "classic", "traditional", "original", "authentic", "proper", "best", "easy", "simple", "homemade",
+})
+# Words that make a different drink out of the same name: a Rum Old Fashioned
+# is not an Old Fashioned. A match must agree on all of them, in canonical form
+DISTINGUISHING_WORDS = frozenset({
+    # Spirits, wines and bitter liqueurs
+    "gin", "vodka", "rum", "tequila", "mezcal", "whiskey", "bourbon", "rye", "scotch", "brandy",
+    "cognac", "armagnac", "calvados", "pisco", "cachaca", "absinthe", "aquavit", "genever", "grappa",
+    "sake", "soju", "champagne", "prosecco", "cava", "sherry", "port", "campari", "aperol", "amaro",
+    # Styles
+    "dirty", "dry", "perfect", "spicy", "frozen", "virgin", "skinny", "hot", "reverse", "sparkling",
+    # Flavours
+    "strawberry", "raspberry", "blackberry", "blueberry", "cherry", "peach", "mango", "pineapple",
+    "coconut", "passion", "watermelon", "apple", "pear", "pomegranate", "cranberry", "grapefruit",
+    "blood", "lavender", "elderflower", "cucumber", "ginger", "honey", "chocolate", "espresso",
+    "coffee", "pumpkin", "cinnamon", "smoky",
+})
+WORD_WEIGHT = 2.0
+# Rows scanned per alias when collecting distinct recipes for top-k
+CANDIDATES_PER_RESULT = 4
+# Recipes considered by match() when the best ones disagree on distinguishing words
+MATCH_CANDIDATES = 8
+
+
+def _hashed(feature: str, dimensions: int) -> Tuple[int, float]:
+    # Signed hashing, so colliding features tend to cancel instead of adding up
+    h = zlib.crc32(feature.encode())
+    return h % dimensions, 1.0 if h & 0x80000000 else -1.0
+
+
+def key_features(key: str, dimensions: int) -> Tuple[List[int], List[float]]:
+    """Hashed columns and weights of the words and padded character trigrams of ``key``."""
+    columns: List[int] = []
+    weights: List[float] = []
+    for word in key.split():
+        if word in FILLER_WORDS:
+            continue
+        column, sign = _hashed("w:" + word, dimensions)
+        columns.append(column)
+        weights.append(sign * WORD_WEIGHT)
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            column, sign = _hashed(padded[i:i + 3], dimensions)
+            columns.append(column)
+            weights.append(sign)
+    return columns, weights
+
+
+def distinguishing_words(key: str) -> FrozenSet[str]:
+    return DISTINGUISHING_WORDS.intersection(key.split())
+
+
+class SemanticIndex:
+    """Cosine similarity over hashed n-gram vectors of canonical recipe keys.
+
+    Every key (title or alias) is a unit-length row of a float32 matrix, so a
+    lookup is one matrix-vector product over the whole catalog. That is
+    memory-bound and linear in the number of keys. ``match`` only accepts a
+    key with the same spirits, styles and flavours (``DISTINGUISHING_WORDS``)
+    as the query, since those name a different drink however close the
+    vectors are.
+
+    ``find`` reads a consistent snapshot and may run in a worker thread while
+    keys are being added on the event loop: rows are written before ``_size``
+    is published. It leaves the counters alone; the caller passes its result
+    to ``record`` back on the event loop, as ``match`` does.
+    """
+
+    def __init__(self, dimensions: int = SEMANTIC_DIMENSIONS, threshold: float = SEMANTIC_MATCH_THRESHOLD):
+        self.dimensions = dimensions
+        self.threshold = threshold
+        self._matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self._size = 0
+        self._keys: List[str] = []
+        self._recipe_ids: List[int] = []
+        self._key_ids: Dict[str, int] = {}
+        self.lookups = 0
+        self.matches = 0
+        self.refused = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold <= 1
+
+    def vector(self, key: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        columns, weights = key_features(key, self.dimensions)
+        np.add.at(vector, columns, weights)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def add(self, key: str, recipe_id: int) -> None:
+        self.add_many([(key, recipe_id)])
+
+    def add_many(self, entries: Iterable[Tuple[str, int]]) -> None:
+        # Like the alias table, the first mapping for a key wins
+        new: Dict[str, int] = {}
+        for key, recipe_id in entries:
+            if key and key not in self._key_ids and key not in new:
+                new[key] = recipe_id
+        if not new:
+            return
+
+        rows, columns, weights = [], [], []
+        for row, key in enumerate(new):
+            key_columns, key_weights = key_features(key, self.dimensions)
+            rows.extend([row] * len(key_columns))
+            columns.extend(key_columns)
+            weights.extend(key_weights)
+        block = np.zeros((len(new), self.dimensions), dtype=np.float32)
+        np.add.at(block, (rows, columns), weights)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        np.divide(block, norms, out=block, where=norms > 0)
+
+        start, end = self._size, self._size + len(new)
+        matrix = self._matrix
+        if end > len(matrix):
+            # Grown by a quarter, since a copy briefly holds both matrices
+            matrix = np.zeros((max(end, len(matrix) + len(matrix) // 4, 1024), self.dimensions), dtype=np.float32)
+            matrix[:start] = self._matrix[:start]
+        matrix[start:end] = block
+        for offset, (key, recipe_id) in enumerate(new.items()):
+            self._keys.append(key)
+            self._recipe_ids.append(recipe_id)
+            self._key_ids[key] = start + offset
+        self._matrix = matrix
+        self._size = end
+
+    def clear(self) -> None:
+        self._size = 0
+        self._matrix = np.zeros((0, self.dimensions), dtype=np.float32)
+        self._keys.clear()
+        self._recipe_ids.clear()
+        self._key_ids.clear()
+
+    def search(self, key: str, k: int = 5) -> List[Tuple[int, str, float]]:
+        """Top ``k`` distinct recipes as (recipe_id, matched_key, similarity), best first."""
+        size = self._size
+        if not key or not size or k <= 0:
+            return []
+        query = self.vector(key)
+        if not query.any():
+            return []
+        scores = self._matrix[:size] @ query
+
+        candidates = min(size, k * CANDIDATES_PER_RESULT)
+        top = np.argpartition(scores, size - candidates)[size - candidates:]
+        top = top[np.argsort(scores[top])[::-1]]
+        results: List[Tuple[int, str, float]] = []
+        seen = set()
+        for row in top.tolist():
+            recipe_id = self._recipe_ids[row]
+            if recipe_id in seen:
+                continue
+            seen.add(recipe_id)
+            results.append((recipe_id, self._keys[row], float(scores[row])))
+            if len(results) == k:
+                break
+        return results
+
+    def find(self, key: str) -> Tuple[Optional[Tuple[int, str, float]], bool]:
+        """Best (recipe_id, matched_key, similarity) at or above the threshold, or None.
+
+        Also returns whether a close enough key was refused for naming
+        another drink.
+        """
+        if not self.enabled or not key:
+            return None, False
+        words = distinguishing_words(key)
+        refused = False
+        for candidate in self.search(key, k=MATCH_CANDIDATES):
+            if candidate[2] < self.threshold:
+                break
+            if distinguishing_words(candidate[1]) != words:
+                refused = True
+                continue
+            return candidate, refused
+        return None, refused
+
+    def record(self, match: Optional[Tuple[int, str, float]], refused: bool) -> None:
+        """Count a lookup from ``find``."""
+        self.lookups += 1
+        if match is not None:
+            self.matches += 1
+        elif refused:
+            self.refused += 1
+
+    def match(self, key: str) -> Optional[Tuple[int, str, float]]:
+        """``find`` and ``record`` in one call, for callers on the event loop."""
+        if not self.enabled or not key:
+            return None
+        match, refused = self.find(key)
+        self.record(match, refused)
+        return match
+
+    def stats(self) -> dict:
+        return {
+            "size": self._size,
+            "dimensions": self.dimensions,
+            "matrix_bytes": self._matrix.nbytes,
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "matches": self.matches,
+            "refused": self.refused,
+        }
+
+
+_semantic_index: Optional[SemanticIndex] = None
+
+
+def get_semantic_index() -> SemanticIndex:
+    global _semantic_index
+    if _semantic_index is None:
+        _semantic_index = SemanticIndex()
+    return _semantic_index
@@ -0,0 +1,248 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import SIMILAR_PROFILE_WEIGHT
+from services.ingredients import recipe_ingredient_names
+
+logger = logging.getLogger(__name__)
+
+PROFILE_KEYS = ("alcohol", "bitter", "sour", "sweet")
+PROFILE_SCALE = 5.0
+# Recipes without a tasting profile sit mid-scale, neither close to nor far from any
+MISSING_PROFILE = np.full(len(PROFILE_KEYS), 0.5, dtype=np.float32)
+# Rows per block when narrowing top-k candidates by block maxima
+TOP_K_BLOCK = 512
+
+
+def _top_indexes(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the ``k`` highest scores, highest first.
+
+    A full argpartition costs about as much as the matrix product, so it runs
+    only on the scores that can still make the top k: at least k blocks have
+    a maximum no lower than the k-th highest block maximum, so every top-k
+    score is at or above it.
+    """
+    size = len(scores)
+    k = min(k, size)
+    if size > TOP_K_BLOCK * k * 4:
+        whole = size - size % TOP_K_BLOCK
+        block_max = scores[:whole].reshape(-1, TOP_K_BLOCK).max(axis=1)
+        if whole < size:
+            block_max = np.append(block_max, scores[whole:].max())
+        cutoff = np.partition(block_max, len(block_max) - k)[len(block_max) - k]
+        candidates = np.flatnonzero(scores >= cutoff)
+    else:
+        candidates = np.arange(size)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(scores[candidates], len(candidates) - k)[len(candidates) - k:]]
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+class SimilarityIndex:
+    """Nearest recipes by ingredients and tasting profile.
+
+    Similarity is
+
+        (1 - w) * shared / sqrt(n_a * n_b) + w * (1 - squared profile distance / 4)
+
+    with ``w`` the profile weight, ``shared`` the number of normalized
+    ingredient names two recipes have in common and ``n`` their numbers of
+    names: the exact cosine of their ingredient sets, with no hashing. Shared
+    counts come from posting lists of rows per ingredient name, so a lookup
+    reads only the postings of the source's ingredients (one ``bincount``).
+    Tasting profiles, scaled to 0-1, are stored as four float32 rows of one
+    value per recipe; expanding the squared distance leaves one small
+    vector-matrix product, a per-recipe constant (``_penalty``) and a
+    per-query constant. As with the semantic index, rows are written before
+    ``_size`` is published, and a stored recipe's row is overwritten in
+    place when it is stored again.
+    """
+
+    def __init__(self, profile_weight: float = SIMILAR_PROFILE_WEIGHT):
+        self.profile_weight = profile_weight
+        self._profiles = np.zeros((len(PROFILE_KEYS), 0), dtype=np.float32)
+        self._penalty = np.zeros(0, dtype=np.float32)
+        # 1 / sqrt(number of ingredient names), 0 for recipes without any
+        self._inverse_norms = np.zeros(0, dtype=np.float32)
+        self._recipe_ids = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._rows: Dict[int, int] = {}
+        self._row_names: List[Tuple[str, ...]] = []
+        # Sorted rows per ingredient name, with spare capacity
+        self._postings: Dict[str, np.ndarray] = {}
+        self._lengths: Dict[str, int] = {}
+        self.lookups = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, recipe_id: int) -> bool:
+        return recipe_id in self._rows
+
+    @staticmethod
+    def profile(tasting_profile: Optional[dict]) -> np.ndarray:
+        if not tasting_profile:
+            return MISSING_PROFILE
+        return np.array([
+            min(max(float(tasting_profile.get(key) or 0), 0.0), PROFILE_SCALE) / PROFILE_SCALE
+            for key in PROFILE_KEYS
+        ], dtype=np.float32)
+
+    @staticmethod
+    def _inverse_norm(names: Tuple[str, ...]) -> float:
+        return 1 / np.sqrt(len(names)) if names else 0.0
+
+    def add(self, recipe_id: int, ingredients: Iterable[dict], tasting_profile: Optional[dict]) -> None:
+        self.add_many([(recipe_id, ingredients, tasting_profile)])
+
+    def add_many(self, recipes: Iterable[Tuple[int, Iterable[dict], Optional[dict]]]) -> None:
+        """Index ``(recipe_id, ingredients, tasting_profile)`` rows; known recipes are updated."""
+        new: Dict[int, Tuple[Tuple[str, ...], np.ndarray]] = {}
+        for recipe_id, ingredients, tasting_profile in recipes:
+            names = tuple(dict.fromkeys(recipe_ingredient_names(ingredients)))
+            profile = self.profile(tasting_profile)
+            row = self._rows.get(recipe_id)
+            if row is None:
+                new[recipe_id] = (names, profile)
+                continue
+            previous = self._row_names[row]
+            for name in previous:
+                if name not in names:
+                    self._remove(name, row)
+            for name in names:
+                if name not in previous:
+                    self._append(name, row)
+            self._row_names[row] = names
+            self._profiles[:, row] = profile
+            self._penalty[row] = self._row_penalty(profile)
+            self._inverse_norms[row] = self._inverse_norm(names)
+        if not new:
+            return
+
+        start, end = self._size, self._size + len(new)
+        profiles, penalty, inverse_norms, recipe_ids = (
+            self._profiles, self._penalty, self._inverse_norms, self._recipe_ids
+        )
+        if end > len(penalty):
+            # Grown by a quarter, since a copy briefly holds both arrays
+            capacity = max(end, len(penalty) + len(penalty) // 4, 1024)
+            profiles = np.zeros((len(PROFILE_KEYS), capacity), dtype=np.float32)
+            profiles[:, :start] = self._profiles[:, :start]
+            penalty = np.zeros(capacity, dtype=np.float32)
+            penalty[:start] = self._penalty[:start]
+            inverse_norms = np.zeros(capacity, dtype=np.float32)
+            inverse_norms[:start] = self._inverse_norms[:start]
+            recipe_ids = np.zeros(capacity, dtype=np.int64)
+            recipe_ids[:start] = self._recipe_ids[:start]
+        block = np.stack([profile for _, profile in new.values()])
+        profiles[:, start:end] = block.T
+        penalty[start:end] = self._row_penalty(block)
+        inverse_norms[start:end] = [self._inverse_norm(names) for names, _ in new.values()]
+        recipe_ids[start:end] = list(new)
+        for row, (recipe_id, (names, _)) in enumerate(new.items(), start):
+            self._rows[recipe_id] = row
+            self._row_names.append(names)
+            for name in names:
+                self._append(name, row)
+        self._profiles, self._penalty, self._inverse_norms, self._recipe_ids = (
+            profiles, penalty, inverse_norms, recipe_ids
+        )
+        self._size = end
+
+    def _append(self, name: str, row: int) -> None:
+        postings = self._postings.get(name)
+        if postings is None:
+            postings = self._postings[name] = np.empty(4, dtype=np.int64)
+            self._lengths[name] = 0
+        length = self._lengths[name]
+        if length == len(postings):
+            grown = np.empty(length + max(length // 4, 4), dtype=np.int64)
+            grown[:length] = postings
+            postings = self._postings[name] = grown
+        if length and postings[length - 1] > row:
+            # An older recipe stored again with a new ingredient
+            position = int(np.searchsorted(postings[:length], row))
+            postings[position + 1:length + 1] = postings[position:length]
+            postings[position] = row
+        else:
+            postings[length] = row
+        self._lengths[name] = length + 1
+
+    def _remove(self, name: str, row: int) -> None:
+        postings, length = self._postings[name], self._lengths[name]
+        position = int(np.searchsorted(postings[:length], row))
+        postings[position:length - 1] = postings[position + 1:length]
+        self._lengths[name] = length - 1
+
+    def _row_penalty(self, profiles: np.ndarray) -> np.ndarray:
+        return (self.profile_weight / 4) * np.sum(profiles * profiles, axis=-1)
+
+    def clear(self) -> None:
+        self._size = 0
+        self._profiles = np.zeros((len(PROFILE_KEYS), 0), dtype=np.float32)
+        self._penalty = np.zeros(0, dtype=np.float32)
+        self._inverse_norms = np.zeros(0, dtype=np.float32)
+        self._recipe_ids = np.zeros(0, dtype=np.int64)
+        self._rows.clear()
+        self._row_names.clear()
+        self._postings.clear()
+        self._lengths.clear()
+
+    def similar(self, recipe_id: int, k: int = 5) -> List[Tuple[int, float]]:
+        """Up to ``k`` other recipes as (recipe_id, similarity), most similar first.
+
+        Similarity is at most 1, for the same ingredients and profile. The
+        result is empty if ``recipe_id`` is not indexed.
+        """
+        size = self._size
+        row = self._rows.get(recipe_id)
+        if row is None or k <= 0 or size < 2:
+            return []
+        self.lookups += 1
+        w = self.profile_weight
+        profiles = self._profiles[:, :size]
+        scores = ((w / 2) * profiles[:, row]) @ profiles
+        scores -= self._penalty[:size]
+
+        names = self._row_names[row]
+        if names:
+            rows = np.concatenate([self._postings[name][:self._lengths[name]] for name in names])
+            shared = np.bincount(rows, minlength=size)[:size].astype(np.float32)
+            shared *= self._inverse_norms[:size]
+            shared *= (1 - w) * self._inverse_norms[row]
+            scores += shared
+        offset = w - self._penalty[row]
+
+        # One extra candidate, since the source recipe is its own best match
+        top = _top_indexes(scores, k + 1)
+        results: List[Tuple[int, float]] = []
+        for index in top.tolist():
+            if index == row:
+                continue
+            results.append((int(self._recipe_ids[index]), float(scores[index] + offset)))
+        return results[:k]
+
+    def stats(self) -> dict:
+        return {
+            "size": self._size,
+            "ingredients": len(self._postings),
+            "postings": sum(self._lengths.values()),
+            "array_bytes": (
+                self._profiles.nbytes + self._penalty.nbytes + self._inverse_norms.nbytes + self._recipe_ids.nbytes
+            ),
+            "posting_bytes": sum(postings.nbytes for postings in self._postings.values()),
+            "profile_weight": self.profile_weight,
+            "lookups": self.lookups,
+        }
+
+
+_similarity_index: Optional[SimilarityIndex] = None
+
+
+def get_similarity_index() -> SimilarityIndex:
+    global _similarity_index
+    if _similarity_index is None:
+        _similarity_index = SimilarityIndex()
+    return _similarity_index
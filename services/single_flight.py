@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one running task.
+
+    The first caller for a key starts the work; every caller that arrives while
+    it is still running awaits the same task and receives the same result or
+    exception. Waiters are shielded, so cancelling one of them never cancels the
+    shared task.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"Joining in-flight generation for key: '{key}'")
+        return await asyncio.shield(task)
+
+    def is_inflight(self, key: str) -> bool:
+        return key in self._inflight
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved so it is not reported as unhandled
+        # when every waiter was cancelled before the task finished.
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "inflight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+_generation_flight: SingleFlight = SingleFlight()
+
+
+def get_generation_flight() -> SingleFlight:
+    return _generation_flight
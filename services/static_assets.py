@@ -0,0 +1,103 @@
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from fastapi.responses import Response
+
+from core.config import STATIC_DIR
+from services.compression import (
+    ENCODINGS, MAX_LEVELS, accepted_encoding, compress, encoded_etag, etag_matches, is_compressible,
+)
+
+
+class StaticAsset:
+    """A static file held in memory with its precompressed variants."""
+
+    __slots__ = ("content", "media_type", "etag", "encoded")
+
+    def __init__(self, content: bytes, media_type: str):
+        self.content = content
+        self.media_type = media_type
+        self.etag = '"' + hashlib.blake2b(content, digest_size=16).hexdigest() + '"'
+        self.encoded: Dict[str, bytes] = {}
+        if is_compressible(media_type):
+            for encoding in ENCODINGS:
+                compressed = compress(content, encoding, MAX_LEVELS[encoding])
+                # Kept only where it saves bytes
+                if len(compressed) < len(content):
+                    self.encoded[encoding] = compressed
+
+    def response(
+        self,
+        cache_control: str,
+        if_none_match: Optional[str] = None,
+        accept_encoding: Optional[str] = None,
+        head: bool = False,
+    ) -> Response:
+        """The asset in the best accepted coding; for ``head``, the same headers without the body."""
+        encoding = accepted_encoding(accept_encoding)
+        if encoding not in self.encoded:
+            encoding = None
+        headers = {"ETag": encoded_etag(self.etag, encoding), "Cache-Control": cache_control}
+        if self.encoded:
+            headers["Vary"] = "Accept-Encoding"
+        if if_none_match is not None and etag_matches(if_none_match, self.etag):
+            return Response(status_code=304, headers=headers)
+        content = self.content
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            content = self.encoded[encoding]
+        if head:
+            headers["Content-Length"] = str(len(content))
+            content = b""
+        return Response(content=content, media_type=self.media_type, headers=headers)
+
+
+class StaticAssets:
+    """Every file under a directory, read and compressed once.
+
+    Requests are answered from memory without touching the filesystem, and
+    only paths found at load time are served, so request paths never reach
+    the filesystem either.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self._assets: Dict[str, StaticAsset] = {}
+        self.load()
+
+    def load(self) -> int:
+        assets = {}
+        if self.directory.is_dir():
+            for path in sorted(self.directory.rglob("*")):
+                if path.is_file():
+                    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                    if media_type.startswith("text/"):
+                        media_type += "; charset=utf-8"
+                    assets[path.relative_to(self.directory).as_posix()] = StaticAsset(path.read_bytes(), media_type)
+        self._assets = assets
+        return len(assets)
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self._assets.get(path)
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self._assets),
+            "bytes": sum(len(asset.content) for asset in self._assets.values()),
+            "compressed_bytes": {
+                encoding: sum(len(asset.encoded.get(encoding, asset.content)) for asset in self._assets.values())
+                for encoding in ENCODINGS
+            },
+        }
+
+
+_static_assets: Optional[StaticAssets] = None
+
+
+def get_static_assets() -> StaticAssets:
+    global _static_assets
+    if _static_assets is None:
+        _static_assets = StaticAssets(STATIC_DIR)
+    return _static_assets
@@ -20,6 +20,30 @@ TestSessionLocal = async_sessionmaker(
 )
 
 
+@pytest.fixture(autouse=True)
+def reset_in_memory_state():
+    from services.response_cache import get_recipe_cache
+    from services.fuzzy_matcher import get_fuzzy_index
+    from services.negative_cache import get_negative_cache
+    from services.semantic_index import get_semantic_index
+    from services.similarity_index import get_similarity_index
+    from services.ingredient_index import get_ingredient_index
+
+    get_recipe_cache().clear()
+    get_fuzzy_index().clear()
+    get_semantic_index().clear()
+    get_similarity_index().clear()
+    get_ingredient_index().clear()
+    get_negative_cache().purge()
+    yield
+    get_recipe_cache().clear()
+    get_fuzzy_index().clear()
+    get_semantic_index().clear()
+    get_similarity_index().clear()
+    get_ingredient_index().clear()
+    get_negative_cache().purge()
+
+
 @pytest.fixture(scope="function")
 async def db_session():
     async with test_engine.begin() as conn:
@@ -64,17 +88,71 @@ def sample_recipe_data():
 
 
 @pytest.fixture(scope="function")
-async def test_client(db_session):
+async def test_client(db_session, monkeypatch):
+    from services.recipe_writer import get_recipe_writer
+    from services.generation_jobs import get_generation_jobs
+    from services.generation_leases import get_generation_leases
+
     async def override_get_db():
         yield db_session
     
     app.dependency_overrides[get_db] = override_get_db
+    writer = get_recipe_writer()
+    writer.session_factory = TestSessionLocal
+    jobs = get_generation_jobs()
+    jobs.session_factory = jobs.read_session_factory = TestSessionLocal
+    leases = get_generation_leases()
+    leases.session_factory = leases.read_session_factory = TestSessionLocal
+    monkeypatch.setattr("api.routes.AsyncReadSessionLocal", TestSessionLocal)
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         yield client
     
+    await jobs.close()
+    await writer.close()
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="function")
+async def file_database(tmp_path, monkeypatch):
+    """The app on a SQLite file with a single read connection; yields writer sessions."""
+    import db.base
+    from services.recipe_writer import get_recipe_writer
+    from services.generation_leases import get_generation_leases
+
+    monkeypatch.setattr(db.base, "DB_READ_POOL_SIZE", 1)
+    url = f"sqlite+aiosqlite:///{tmp_path / 'app.db'}"
+    engine, read_engine = db.base.make_engine(url), db.base.make_engine(url, read_only=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    read_sessions = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with read_sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    writer = get_recipe_writer()
+    monkeypatch.setattr(writer, "session_factory", sessions)
+    leases = get_generation_leases()
+    monkeypatch.setattr(leases, "session_factory", sessions)
+    monkeypatch.setattr(leases, "read_session_factory", read_sessions)
+    monkeypatch.setattr("api.routes.AsyncReadSessionLocal", read_sessions)
+
+    yield sessions
+
+    await writer.close()
     app.dependency_overrides.clear()
+    await engine.dispose()
+    await read_engine.dispose()
+
+
+async def flush_recipe_writer():
+    from services.recipe_writer import get_recipe_writer
+
+    await get_recipe_writer().flush()
 
 
 @pytest.mark.asyncio
@@ -210,3 +288,1593 @@ async def test_query_validator_empty_query():
         if query.strip() == "":
             assert "empty" in error.lower()
 
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    import asyncio
+    from services.single_flight import SingleFlight
+
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "MARGARITA"
+
+    results = await asyncio.gather(*[flight.do("margarita", work) for _ in range(10)])
+
+    assert calls == 1
+    assert results == ["MARGARITA"] * 10
+    assert flight.stats()["coalesced"] == 9
+    assert not flight.is_inflight("margarita")
+
+
+@pytest.mark.asyncio
+async def test_single_flight_propagates_failure_to_all_waiters():
+    import asyncio
+    from services.single_flight import SingleFlight
+
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("generation failed")
+
+    results = await asyncio.gather(
+        *[flight.do("negroni", work) for _ in range(3)], return_exceptions=True
+    )
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert not flight.is_inflight("negroni")
+
+
+@pytest.mark.asyncio
+async def test_single_flight_waiter_cancellation_keeps_shared_task():
+    import asyncio
+    from services.single_flight import SingleFlight
+
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "SIDECAR"
+
+    first = asyncio.ensure_future(flight.do("sidecar", work))
+    second = asyncio.ensure_future(flight.do("sidecar", work))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "SIDECAR"
+    assert first.cancelled()
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    from services.response_cache import TTLCache
+
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.put("margarita", 1)
+    cache.put("negroni", 2)
+    assert cache.get("margarita") == 1
+    cache.put("sidecar", 3)
+
+    assert cache.get("negroni") is None
+    assert cache.get("margarita") == 1
+    assert cache.get("sidecar") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    from services.response_cache import TTLCache
+
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    cache.put("margarita", 1, ttl_seconds=0)
+
+    assert cache.get("margarita") is None
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_database(test_client, db_session, sample_recipe_data):
+    await create_recipe(db_session, sample_recipe_data)
+
+    response = await test_client.get("/recipe?query=margarita")
+    assert response.status_code == 200
+
+    with patch('api.routes.search_recipe_by_query', new=AsyncMock()) as mock_search:
+        response = await test_client.get("/recipe?query=  Margarita ")
+        mock_search.assert_not_called()
+
+    assert response.status_code == 200
+    assert response.json()["title"] == sample_recipe_data["title"]
+
+    stats = (await test_client.get("/admin/stats")).json()["recipe_cache"]
+    assert stats["hits"] == 1
+    assert stats["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_same_title_records_alias_instead_of_new_recipe(db_session, sample_recipe_data):
+    from sqlalchemy import select, func
+    from models.recipe import Recipe, RecipeAlias
+
+    first = await create_recipe(db_session, sample_recipe_data)
+    second = await create_recipe(db_session, {**sample_recipe_data, "search_query": "Margarita on the rocks"})
+
+    assert first.lookup_key == "margarita"
+    assert first.title_key == "margarita"
+    assert second.id == first.id
+    assert (await db_session.execute(select(func.count()).select_from(Recipe))).scalar() == 1
+    assert (await db_session.execute(select(func.count()).select_from(RecipeAlias))).scalar() == 2
+
+    found = await search_recipe_by_query(db_session, "MARGARITA")
+    assert found.id == first.id
+
+    found = await search_recipe_by_query(db_session, "margarita  ON the rocks")
+    assert found.id == first.id
+
+
+@pytest.mark.asyncio
+async def test_migration_backfills_lookup_keys_on_legacy_database(tmp_path):
+    from sqlalchemy import text
+    from db.migrations import upgrade
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE recipes (id INTEGER PRIMARY KEY AUTOINCREMENT, title VARCHAR NOT NULL, "
+            "search_query VARCHAR, history TEXT, technique VARCHAR, glass_type VARCHAR, "
+            "ingredients JSON NOT NULL, tasting_profile JSON, method JSON NOT NULL, tip TEXT, "
+            "created_at DATETIME, updated_at DATETIME)"
+        ))
+        await conn.execute(text(
+            "INSERT INTO recipes (title, search_query, ingredients, method) VALUES "
+            "('MARGARITA', 'Margarita', '[]', '[]'), "
+            "('MARGARITA', ' margarita ', '[]', '[]'), "
+            "('SIDECAR', NULL, '[]', '[]')"
+        ))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade)
+        rows = (await conn.execute(
+            text("SELECT lookup_key, title_key FROM recipes ORDER BY id")
+        )).all()
+        aliases = (await conn.execute(
+            text("SELECT alias_key, recipe_id FROM recipe_aliases ORDER BY alias_key")
+        )).all()
+        plan = (await conn.execute(
+            text("EXPLAIN QUERY PLAN SELECT id FROM recipes WHERE lookup_key = 'sidecar'")
+        )).all()
+
+    await engine.dispose()
+
+    assert rows == [("margarita", "margarita"), (None, "margarita"), ("sidecar", "sidecar")]
+    assert aliases == [("margarita", 1), ("sidecar", 3)]
+    assert "ix_recipes_lookup_key" in " ".join(str(row) for row in plan)
+
+
+@pytest.mark.asyncio
+async def test_generated_duplicate_title_serves_stored_recipe(test_client, db_session, sample_recipe_data):
+    from sqlalchemy import select, func
+    from models.recipe import Recipe
+
+    await create_recipe(db_session, sample_recipe_data)
+    generated = RecipeResponse(
+        title="Margarita",
+        ingredients=[Ingredient(name="2 oz (60 ml) Tequila", oz=2.0, ml=60)],
+        method=["Shake: Shake with ice."],
+    )
+
+    with patch('api.routes.get_recipe_generator') as mock_get_generator:
+        mock_generator = AsyncMock()
+        mock_generator.generate_recipe = AsyncMock(return_value=generated)
+        mock_get_generator.return_value = mock_generator
+
+        response = await test_client.get("/recipe?query=cadillac margarita")
+
+    assert response.status_code == 200
+    assert response.json()["history"] == sample_recipe_data["history"]
+    await flush_recipe_writer()
+    assert (await db_session.execute(select(func.count()).select_from(Recipe))).scalar() == 1
+
+    found = await search_recipe_by_query(db_session, "cadillac margarita")
+    assert found.title == sample_recipe_data["title"]
+
+
+def test_canonicalize_query_folds_phrasings_to_one_key():
+    from services.query_canonicalizer import canonicalize_query
+
+    variants = [
+        "margarita",
+        "how to make a margarita",
+        "Margarita recipe",
+        "margaritas",
+        "the  MARGARITA",
+        "Márgarita!",
+    ]
+    assert {canonicalize_query(q) for q in variants} == {"margarita"}
+    assert canonicalize_query("Whisky Sours") == canonicalize_query("WHISKEY SOUR recipe") == "whiskey sour"
+    assert canonicalize_query("Bee's Knees") == "bee knee"
+    assert canonicalize_query("cocktail") == "cocktail"
+    assert canonicalize_query("recipe for a cocktail called the Paper Plane") == "paper plane"
+
+
+def test_canonicalize_query_keeps_names_that_contain_generic_words():
+    from services.query_canonicalizer import canonicalize_query
+
+    distinct = [
+        ("Champagne Cocktail", "champagne"),
+        ("Prawn Cocktail", "prawn"),
+        ("Whiskey Cocktail", "whiskey"),
+        ("Rum drink", "rum"),
+    ]
+    for name, other in distinct:
+        assert canonicalize_query(name) != canonicalize_query(other), name
+    assert canonicalize_query("how to make a Champagne Cocktail") == "champagne cocktail"
+    assert canonicalize_query("Tom Collins") == "tom collins"
+    assert canonicalize_query("Oasis") == "oasis"
+    assert canonicalize_query("Negronis") == "negroni"
+
+
+@pytest.mark.asyncio
+async def test_canonical_phrasings_hit_stored_recipe(db_session, sample_recipe_data):
+    recipe = await create_recipe(db_session, sample_recipe_data)
+
+    for query in ["how to make a margarita", "Margaritas", "the margarita recipe"]:
+        found = await search_recipe_by_query(db_session, query)
+        assert found is not None and found.id == recipe.id, query
+
+
+def test_fuzzy_index_matches_typos_above_threshold():
+    from services.fuzzy_matcher import FuzzyIndex
+
+    index = FuzzyIndex(threshold=0.8)
+    index.add_many([("margarita", 1), ("negroni", 2), ("whiskey sour", 3), ("gin fizz", 4)])
+
+    assert index.match("margarta")[:2] == (1, "margarita")
+    assert index.match("negoni")[:2] == (2, "negroni")
+    assert index.match("whiskey smash") is None
+    assert index.match("gin sour") is None
+
+    stats = index.stats()
+    assert stats["lookups"] == 4
+    assert stats["matches"] == 2
+    assert sum(stats["best_score_distribution"].values()) == 4
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_match_serves_stored_recipe_without_generation(test_client, db_session, sample_recipe_data):
+    await create_recipe(db_session, sample_recipe_data)
+
+    with patch('api.routes.get_recipe_generator') as mock_get_generator:
+        mock_generator = AsyncMock()
+        mock_generator.generate_recipe = AsyncMock()
+        mock_get_generator.return_value = mock_generator
+
+        response = await test_client.get("/recipe?query=Margarta")
+
+        mock_generator.generate_recipe.assert_not_called()
+
+    assert response.status_code == 200
+    assert response.json()["title"] == sample_recipe_data["title"]
+
+
+def test_keyword_matcher_reports_overlapping_keywords():
+    from services.query_validator import KeywordMatcher
+
+    matcher = KeywordMatcher(["wine", "wine list", "red wine", "gin"])
+
+    assert matcher.find_all("the red wine list") == {"red wine", "wine", "wine list"}
+    assert matcher.find_all("ginger beer") == set()
+    assert matcher.search("a gin and tonic")
+    assert not matcher.search("tonic")
+
+
+def test_query_validator_reports_first_negative_keyword_in_list_order():
+    from services.query_validator import validate_cocktail_wine_query
+
+    is_valid, error = validate_cocktail_wine_query("pizza and chicken")
+    assert is_valid is False
+    assert "'chicken'" in error
+
+    assert validate_cocktail_wine_query("gin ingredient list")[0] is True
+    assert validate_cocktail_wine_query("cocktail recipe")[0] is True
+
+
+def test_incremental_json_parser_emits_fields_as_they_close():
+    import json
+    from services.json_stream import IncrementalJSONParser
+
+    document = json.dumps({
+        "title": "Negroni \"Sbagliato\"",
+        "ingredients": [{"name": "Campari", "oz": 1, "ml": 30}, {"name": "Prosecco", "oz": 1, "ml": 30}],
+        "tasting_profile": {"alcohol": 2, "bitter": 4},
+        "tip": None,
+        "method": ["Build: Over ice.", "Top: With prosecco."],
+    })
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(document), 3):
+        events.extend(parser.feed(document[i:i + 3]))
+
+    assert parser.complete
+    assert events[0] == ("field", "title", "Negroni \"Sbagliato\"")
+    assert events[1] == ("item", "ingredients", 0, {"name": "Campari", "oz": 1, "ml": 30})
+    assert ("field", "tip", None) in events
+    assert events[-2] == ("item", "method", 1, "Top: With prosecco.")
+    assert events[-1] == ("field", "method", ["Build: Over ice.", "Top: With prosecco."])
+
+
+def _sse_events(body: str) -> list:
+    import json
+
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_stream_cache_hit_sends_single_recipe_event(test_client, db_session, sample_recipe_data):
+    await create_recipe(db_session, sample_recipe_data)
+
+    with patch('api.routes.get_recipe_generator') as mock_get_generator:
+        response = await test_client.get("/recipe/stream?query=margarita")
+        mock_get_generator.assert_not_called()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(response.text)
+    assert [event for event, _ in events] == ["recipe"]
+    assert events[0][1]["title"] == sample_recipe_data["title"]
+
+
+@pytest.mark.asyncio
+async def test_stream_generation_emits_partial_fields_then_persists(test_client, db_session):
+    generated = RecipeResponse(
+        title="Paper Plane",
+        ingredients=[Ingredient(name="0.75 oz (22 ml) Bourbon", oz=0.75, ml=22)],
+        method=["Shake: Shake with ice."],
+    )
+
+    async def fake_stream(query):
+        yield ("field", "title", "Paper Plane")
+        yield ("item", "ingredients", 0, {"name": "0.75 oz (22 ml) Bourbon", "oz": 0.75, "ml": 22})
+        yield ("recipe", generated)
+
+    with patch('api.routes.get_recipe_generator') as mock_get_generator:
+        mock_get_generator.return_value.stream_recipe = fake_stream
+        response = await test_client.get("/recipe/stream?query=paper plane cocktail")
+
+    events = _sse_events(response.text)
+    assert [event for event, _ in events] == ["field", "item", "recipe"]
+    assert events[0][1] == {"key": "title", "value": "Paper Plane"}
+    assert events[1][1]["index"] == 0
+    assert events[2][1]["title"] == "Paper Plane"
+
+    await flush_recipe_writer()
+    found = await search_recipe_by_query(db_session, "paper plane cocktail")
+    assert found.title == "Paper Plane"
+
+
+@pytest.mark.asyncio
+async def test_stream_rejects_invalid_query_with_plain_error(test_client):
+    response = await test_client.get("/recipe/stream?query=chicken recipe")
+    assert response.status_code == 400
+    assert "detail" in response.json()
+
+
+@pytest.mark.asyncio
+async def test_batch_resolves_stored_and_generates_misses_in_order(test_client, db_session, sample_recipe_data):
+    from sqlalchemy import event
+    from services.llm_recipe_generator import RecipeGenerationError
+
+    await create_recipe(db_session, sample_recipe_data)
+
+    async def fake_generate(query):
+        if "fail" in query:
+            raise RecipeGenerationError("Model refused")
+        return RecipeResponse(
+            title=query.title(),
+            ingredients=[Ingredient(name="2 oz (60 ml) Gin", oz=2.0, ml=60)],
+            method=["Stir: Stir with ice."],
+        )
+
+    alias_selects = []
+
+    def count_alias_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "recipe_aliases" in statement:
+            alias_selects.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", count_alias_selects)
+    try:
+        with patch('api.routes.get_recipe_generator') as mock_get_generator:
+            mock_generator = AsyncMock()
+            mock_generator.generate_recipe = AsyncMock(side_effect=fake_generate)
+            mock_get_generator.return_value = mock_generator
+
+            response = await test_client.post("/recipe/batch", json={"queries": [
+                "gimlet cocktail", "Margarita", "chicken recipe", "fail cocktail", "Gimlet Cocktail ",
+            ]})
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", count_alias_selects)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["status"] for item in results] == [200, 200, 400, 400, 200]
+    assert [item["query"] for item in results] == ["gimlet cocktail", "Margarita", "chicken recipe", "fail cocktail", "Gimlet Cocktail "]
+    assert results[0]["recipe"]["title"] == "Gimlet Cocktail"
+    assert results[4]["recipe"] == results[0]["recipe"]
+    assert results[1]["recipe"]["title"] == sample_recipe_data["title"]
+    assert results[3]["error"] == "Model refused"
+    assert mock_generator.generate_recipe.await_count == 2
+    assert len(alias_selects) == 1
+
+    await flush_recipe_writer()
+    found = await search_recipe_by_query(db_session, "gimlet cocktail")
+    assert found.title == "Gimlet Cocktail"
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_empty_query_list(test_client):
+    response = await test_client.post("/recipe/batch", json={"queries": []})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_importer_streams_files_and_upserts_on_lookup_key(db_session, sample_recipe_data, tmp_path, monkeypatch):
+    import json
+    from services import recipe_importer
+
+    # Force rows to straddle read boundaries
+    monkeypatch.setattr(recipe_importer, "READ_SIZE", 7)
+    await create_recipe(db_session, sample_recipe_data)
+
+    updated = dict(sample_recipe_data, search_query="Margarita", tip="Use fresh limes.")
+    gimlet = dict(sample_recipe_data, title="GIMLET", search_query="gimlet")
+    rows = [updated, gimlet, dict(gimlet, tip="duplicate"), {"title": "No ingredients"}]
+
+    ndjson_path = tmp_path / "recipes.ndjson"
+    ndjson_path.write_text("\n".join(json.dumps(row) for row in rows) + "\n{not json\n")
+    array_path = tmp_path / "recipes.json"
+    array_path.write_text(json.dumps(rows, indent=2))
+
+    assert [position for position, _ in recipe_importer.iter_recipe_file(array_path)] == [0, 1, 2, 3]
+
+    stats = await recipe_importer.import_recipe_file(db_session, ndjson_path, chunk_size=1)
+    assert (stats["rows"], stats["imported"], stats["duplicates"], stats["invalid"]) == (5, 2, 1, 2)
+
+    stats = await recipe_importer.import_recipe_file(db_session, array_path)
+    assert (stats["imported"], stats["duplicates"], stats["invalid"]) == (2, 1, 1)
+
+    db_session.expire_all()
+    margarita = await search_recipe_by_query(db_session, "margarita")
+    assert margarita.id == 1
+    assert margarita.tip == "Use fresh limes."
+    assert (await search_recipe_by_query(db_session, "gimlet")).tip == sample_recipe_data["tip"]
+
+
+@pytest.mark.asyncio
+async def test_importer_records_known_titles_as_aliases(db_session, sample_recipe_data):
+    from sqlalchemy import func, select
+    from models.recipe import Recipe
+    from services import recipe_importer
+
+    await create_recipe(db_session, sample_recipe_data)
+
+    gimlet = dict(sample_recipe_data, title="GIMLET", search_query="gimlet")
+    rows = [
+        dict(sample_recipe_data, search_query="classic margarita", tip="duplicate"),
+        gimlet,
+        dict(gimlet, search_query="gin gimlet", tip="duplicate"),
+    ]
+    stats = await recipe_importer.import_recipes(db_session, enumerate(rows))
+    assert (stats["imported"], stats["aliased"]) == (1, 2)
+
+    assert await db_session.scalar(select(func.count()).select_from(Recipe)) == 2
+    assert (await search_recipe_by_query(db_session, "classic margarita")).id == 1
+    gin_gimlet = await search_recipe_by_query(db_session, "gin gimlet")
+    assert gin_gimlet.id == (await search_recipe_by_query(db_session, "gimlet")).id
+    assert gin_gimlet.tip == sample_recipe_data["tip"]
+
+    # Seeding leaves stored recipes as they are
+    stats = await recipe_importer.import_recipes(
+        db_session, enumerate([dict(gimlet, tip="seeded")]), update_existing=False
+    )
+    assert (stats["imported"], stats["aliased"], stats["existing"]) == (0, 0, 1)
+    db_session.expire_all()
+    assert (await search_recipe_by_query(db_session, "gimlet")).tip == sample_recipe_data["tip"]
+
+
+def test_importer_bounds_a_malformed_array_element(tmp_path, monkeypatch):
+    from services import recipe_importer
+
+    monkeypatch.setattr(recipe_importer, "READ_SIZE", 16)
+    monkeypatch.setattr(recipe_importer, "MAX_ROW_SIZE", 64)
+    path = tmp_path / "recipes.json"
+    path.write_text('[{"title": "ok"}, {"title" "broken", ' + '"tip": "y", ' * 1_000 + "}]")
+
+    rows = recipe_importer.iter_recipe_file(path)
+    assert next(rows) == (0, {"title": "ok"})
+    with pytest.raises(ValueError, match="index 1, offset 18"):
+        next(rows)
+
+
+@pytest.mark.asyncio
+async def test_stored_response_json_is_served_without_rebuilding(test_client, db_session):
+    from services.recipe_service import response_to_recipe_data
+
+    generated = RecipeResponse(
+        title="GIMLET",
+        ingredients=[Ingredient(name="2 oz (60 ml) Gin", oz=2.0, ml=60)],
+        tasting_profile=TastingProfile(alcohol=3, bitter=0, sour=3, sweet=2),
+        method=["Shake: Shake with ice."],
+    )
+    recipe_data = response_to_recipe_data(generated, " Gimlet ")
+    assert recipe_data["search_query"] == "Gimlet"
+    assert recipe_data["ingredients"] == [{"name": "2 oz (60 ml) Gin", "oz": 2.0, "ml": 60}]
+    recipe = await create_recipe(db_session, recipe_data)
+
+    with patch('services.recipe_service.recipe_to_response', new=AsyncMock()) as mock_rebuild:
+        response = await test_client.get("/recipe?query=recipe for a cocktail called gimlet")
+        cached = await test_client.get("/recipe?query=Cocktail called Gimlet")
+        mock_rebuild.assert_not_called()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == cached.content == recipe.response_json.encode()
+    assert RecipeResponse.model_validate_json(response.content) == generated
+
+
+@pytest.mark.asyncio
+async def test_recipe_writer_batches_writes_and_serves_pending_until_durable(db_session):
+    from services.recipe_writer import RecipeWriter
+    from services.recipe_service import response_to_recipe_data
+    from services.response_cache import get_recipe_cache
+
+    writer = RecipeWriter(TestSessionLocal, batch_size=10, flush_interval=60)
+    for name in ["gimlet", "daiquiri"]:
+        generated = RecipeResponse(
+            title=name.upper(),
+            ingredients=[Ingredient(name="2 oz (60 ml) Rum", oz=2.0, ml=60)],
+            method=["Shake: Shake with ice."],
+        )
+        writer.submit(name, response_to_recipe_data(generated, name), f"body-{name}".encode())
+
+    assert writer.get("gimlet") == b"body-gimlet"
+    assert await search_recipe_by_query(db_session, "gimlet") is None
+
+    await writer.close()
+
+    assert writer.get("gimlet") is None
+    assert get_recipe_cache().get("daiquiri") == b"body-daiquiri"
+    stats = writer.stats()
+    assert (stats["written"], stats["batches"], stats["queued"]) == (2, 1, 0)
+    assert (await search_recipe_by_query(db_session, "daiquiri")).title == "DAIQUIRI"
+
+
+@pytest.mark.asyncio
+async def test_recipe_writer_drops_only_the_row_that_fails(db_session):
+    from services.recipe_writer import RecipeWriter
+    from services.recipe_service import response_to_recipe_data
+
+    writer = RecipeWriter(TestSessionLocal, batch_size=10, flush_interval=60)
+    names = ["gimlet", "daiquiri", "sidecar", "negroni"]
+    for name in names:
+        generated = RecipeResponse(
+            title=name.upper(),
+            ingredients=[Ingredient(name="2 oz (60 ml) Rum", oz=2.0, ml=60)],
+            method=["Shake: Shake with ice."],
+        )
+        recipe_data = response_to_recipe_data(generated, name)
+        if name == "sidecar":
+            recipe_data["title"] = None  # violates NOT NULL
+        writer.submit(name, recipe_data, f"body-{name}".encode())
+
+    assert await writer.flush() == 3
+
+    stats = writer.stats()
+    assert (stats["written"], stats["dropped"], stats["pending"]) == (3, 1, 0)
+    assert await search_recipe_by_query(db_session, "sidecar") is None
+    for name in ["gimlet", "daiquiri", "negroni"]:
+        assert (await search_recipe_by_query(db_session, name)).title == name.upper()
+
+
+@pytest.mark.asyncio
+async def test_generation_does_not_hold_a_read_connection(file_database, sample_recipe_data):
+    import asyncio
+
+    async with file_database() as db:
+        await create_recipe(db, sample_recipe_data)
+
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_generate(query):
+        started.set()
+        await release.wait()
+        return RecipeResponse(
+            title="NEGRONI",
+            ingredients=[Ingredient(name="2 oz (60 ml) Gin", oz=2.0, ml=60)],
+            method=["Shake: Shake with ice."],
+        )
+
+    with patch("api.routes.get_recipe_generator") as mock_get_generator:
+        mock_get_generator.return_value.generate_recipe = slow_generate
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            generation = asyncio.ensure_future(client.get("/recipe?query=negroni"))
+            await asyncio.wait_for(started.wait(), 5)
+
+            # The only read connection is free while the model runs
+            hit = await asyncio.wait_for(client.get("/recipe?query=margarita"), 5)
+            assert hit.status_code == 200
+            assert hit.json()["title"] == "MARGARITA"
+
+            release.set()
+            response = await asyncio.wait_for(generation, 5)
+            assert response.status_code == 200
+            assert response.json()["title"] == "NEGRONI"
+
+
+@pytest.mark.asyncio
+async def test_shared_generation_outlives_the_request_that_started_it(file_database, sample_recipe_data):
+    import asyncio
+
+    async with file_database() as db:
+        await create_recipe(db, sample_recipe_data)
+
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_generate(query):
+        started.set()
+        await release.wait()
+        # A title that is already stored, so storing it looks the title up
+        return RecipeResponse(
+            title="Margarita",
+            ingredients=[Ingredient(name="2 oz (60 ml) Tequila", oz=2.0, ml=60)],
+            method=["Shake: Shake with ice."],
+        )
+
+    with patch("api.routes.get_recipe_generator") as mock_get_generator:
+        mock_get_generator.return_value.generate_recipe = slow_generate
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.ensure_future(client.get("/recipe?query=tequila classic"))
+            await asyncio.wait_for(started.wait(), 5)
+            joined = asyncio.ensure_future(client.get("/recipe?query=Tequila Classic"))
+            await asyncio.sleep(0.05)
+
+            # The first client goes away and its request session is closed
+            first.cancel()
+            await asyncio.gather(first, return_exceptions=True)
+            release.set()
+            response = await asyncio.wait_for(joined, 5)
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "MARGARITA"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_do_not_exhaust_the_read_pool_for_leases(file_database):
+    import asyncio
+    from services.generation_leases import get_generation_leases
+
+    queries = ["negroni", "daiquiri", "gin fizz", "rum punch"]
+    leases = get_generation_leases()
+    claimed, errors = leases.claimed, leases.errors
+
+    async def generate(query):
+        await asyncio.sleep(0.05)
+        return RecipeResponse(
+            title=query.upper(),
+            ingredients=[Ingredient(name="2 oz (60 ml) Gin", oz=2.0, ml=60)],
+            method=["Shake: Shake with ice."],
+        )
+
+    with patch("api.routes.get_recipe_generator") as mock_get_generator:
+        mock_get_generator.return_value.generate_recipe = generate
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            # More generations than read connections, each needing lease reads
+            responses = await asyncio.wait_for(
+                asyncio.gather(*(client.get(f"/recipe?query={query}") for query in queries)), 5
+            )
+
+    assert [response.json()["title"] for response in responses] == [query.upper() for query in queries]
+    assert (leases.claimed - claimed, leases.errors - errors) == (len(queries), 0)
+
+
+@pytest.mark.asyncio
+async def test_engine_profile_uses_wal_and_query_only_readers(tmp_path):
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    from db.base import make_engine
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}"
+    writer, reader = make_engine(url), make_engine(url, read_only=True)
+    try:
+        async with writer.begin() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+            await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+
+        async with reader.connect() as conn:
+            assert (await conn.execute(text("SELECT x FROM t"))).scalar() == 1
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() > 0
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO t VALUES (2)"))
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+def _fake_openai_generator(responses, scheduler, **generator_options):
+    """RecipeGenerator wired to an in-process OpenAI-compatible app.
+
+    ``responses`` is a list of ``(status, body)`` or ``(status, body, delay)``
+    served in order, the last one repeating. Returns the generator and the
+    list of received requests.
+    """
+    import asyncio
+    import httpx
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+    from openai import AsyncOpenAI
+    from services.llm_recipe_generator import RecipeGenerator
+
+    fake = FastAPI()
+    received = []
+
+    @fake.post("/v1/chat/completions")
+    async def completions(request: Request):
+        received.append(await request.json())
+        status_code, body, *delay = responses[min(len(received), len(responses)) - 1]
+        if delay:
+            await asyncio.sleep(delay[0])
+        return JSONResponse(body, status_code=status_code, headers={"retry-after": "0"})
+
+    client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://fake/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=ASGITransport(app=fake)),
+    )
+    return RecipeGenerator(client=client, scheduler=scheduler, **generator_options), received
+
+
+def _completion(content: dict) -> dict:
+    import json
+
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": json.dumps(content)},
+        }],
+    }
+
+
+def _test_scheduler(**overrides):
+    from services.generation_scheduler import CircuitBreaker, GenerationScheduler
+    from services.llm_recipe_generator import is_retryable_error, retry_after_seconds
+
+    options = dict(
+        max_inflight=2, requests_per_minute=0, tokens_per_minute=0, max_retries=3,
+        retry_base_seconds=0.001, retry_max_seconds=0.01, breaker=CircuitBreaker(5, 60),
+        is_retryable=is_retryable_error, retry_after=retry_after_seconds,
+    )
+    options.update(overrides)
+    return GenerationScheduler(**options)
+
+
+@pytest.mark.asyncio
+async def test_generator_retries_rate_limits_from_provider(sample_recipe_data):
+    rate_limited = (429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}})
+    scheduler = _test_scheduler()
+    generator, received = _fake_openai_generator(
+        [rate_limited, rate_limited, (200, _completion(sample_recipe_data))], scheduler
+    )
+
+    recipe = await generator.generate_recipe("margarita")
+
+    assert recipe.title == sample_recipe_data["title"]
+    assert len(received) == 3
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.stats()["circuit"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast_while_provider_is_down(test_client):
+    from services.generation_scheduler import CircuitBreaker, GenerationUnavailableError
+
+    scheduler = _test_scheduler(breaker=CircuitBreaker(2, 60))
+    generator, received = _fake_openai_generator([(503, {"error": {"message": "Overloaded"}})], scheduler)
+
+    with pytest.raises(GenerationUnavailableError):
+        await generator.generate_recipe("margarita")
+    assert len(received) == 2
+    assert scheduler.stats()["circuit"] == "open"
+
+    with patch('api.routes.get_recipe_generator', return_value=generator):
+        response = await test_client.get("/recipe?query=negroni")
+
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) > 0
+    assert len(received) == 2
+    assert scheduler.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_bounds_inflight_calls():
+    import asyncio
+
+    scheduler = _test_scheduler(max_inflight=2)
+    running, peak = 0, 0
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    results = await asyncio.gather(*(scheduler.call(call) for _ in range(6)))
+
+    assert results == ["ok"] * 6
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_generator_falls_back_to_primary_tier_when_fast_model_fails(sample_recipe_data):
+    from services.model_tiers import get_tier_stats
+
+    generator, received = _fake_openai_generator(
+        [(200, _completion({"title": "MARGARITA"})), (200, _completion(sample_recipe_data))],
+        _test_scheduler(),
+        models=["fallback-fast", "fallback-primary"],
+        tier_timeout=5,
+    )
+
+    recipe = await generator.generate_recipe("margarita")
+
+    assert recipe.history == sample_recipe_data["history"]
+    assert [request["model"] for request in received] == ["fallback-fast", "fallback-primary"]
+    assert get_tier_stats("fallback-fast").failures == 1
+    assert get_tier_stats("fallback-primary").wins == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_and_slow_call_is_cancelled(sample_recipe_data):
+    from services.model_tiers import get_tier_stats
+
+    generator, received = _fake_openai_generator(
+        [(200, _completion(sample_recipe_data), 5), (200, _completion(sample_recipe_data))],
+        _test_scheduler(),
+        models=["hedged-model"],
+        hedge_after="0.05",
+    )
+
+    recipe = await generator.generate_recipe("margarita")
+
+    assert recipe.title == sample_recipe_data["title"]
+    assert len(received) == 2
+    stats = get_tier_stats("hedged-model").stats()
+    assert (stats["calls"], stats["hedges"], stats["wins"], stats["cancelled"]) == (2, 1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_generation_deadline_raises_timeout(sample_recipe_data):
+    from services.generation_scheduler import GenerationTimeoutError
+
+    generator, _ = _fake_openai_generator(
+        [(200, _completion(sample_recipe_data), 5)],
+        _test_scheduler(),
+        models=["deadline-model"],
+        deadline=0.05,
+    )
+
+    with pytest.raises(GenerationTimeoutError):
+        await generator.generate_recipe("margarita")
+
+
+@pytest.mark.asyncio
+async def test_stream_deadline_bounds_a_stalled_stream():
+    import asyncio
+    from types import SimpleNamespace
+    from services.generation_scheduler import GenerationTimeoutError
+    from services.llm_recipe_generator import RecipeGenerator
+
+    class StalledStream:
+        """Sends one chunk, then nothing; each read is well within httpx's timeout on its own."""
+        closed = False
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if not hasattr(self, "sent"):
+                self.sent = True
+                return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content='{"title": "SLOW'))])
+            await asyncio.sleep(10)
+
+        async def close(self):
+            self.closed = True
+
+    stream = StalledStream()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=AsyncMock(return_value=stream))))
+    generator = RecipeGenerator(client=client, scheduler=_test_scheduler(), deadline=0.1)
+
+    async def consume():
+        return [event async for event in generator.stream_recipe("margarita")]
+
+    with pytest.raises(GenerationTimeoutError):
+        await asyncio.wait_for(consume(), 2)
+    assert stream.closed
+
+
+@pytest.mark.asyncio
+async def test_respond_async_returns_job_and_long_poll_gets_recipe(test_client, db_session):
+    import asyncio
+
+    generated = RecipeResponse(
+        title="PALOMA",
+        ingredients=[Ingredient(name="2 oz (60 ml) Tequila", oz=2.0, ml=60)],
+        method=["Build: Build over ice."],
+    )
+
+    async def slow_generate(query):
+        await asyncio.sleep(0.05)
+        return generated
+
+    with patch('api.routes.get_recipe_generator') as mock_get_generator:
+        mock_get_generator.return_value.generate_recipe = AsyncMock(side_effect=slow_generate)
+
+        first = await test_client.get("/recipe?query=paloma cocktail", headers={"Prefer": "respond-async"})
+        second = await test_client.get("/recipe?query=Paloma  Cocktail", headers={"Prefer": "respond-async"})
+        job_id = first.json()["job_id"]
+        polled = await test_client.get(f"/recipe/jobs/{job_id}?wait=5")
+
+        mock_get_generator.return_value.generate_recipe.assert_awaited_once()
+
+    assert first.status_code == second.status_code == 202
+    assert first.headers["location"] == f"/recipe/jobs/{job_id}"
+    assert first.json()["status"] == "pending"
+    assert second.json()["job_id"] == job_id
+
+    assert polled.status_code == 200
+    assert polled.json()["status"] == "succeeded"
+    assert polled.json()["recipe"]["title"] == "PALOMA"
+
+    hit = await test_client.get("/recipe?query=paloma cocktail", headers={"Prefer": "respond-async"})
+    assert hit.status_code == 200
+    assert (await test_client.get("/recipe/jobs/missing")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_generation_jobs_resume_after_restart(db_session):
+    from models.generation_job import GenerationJob
+    from services.generation_jobs import GenerationJobs
+
+    db_session.add(GenerationJob(id="interrupted", query_key="sidecar", query="sidecar", status="running"))
+    await db_session.commit()
+
+    async def run(query, cache_key):
+        return b'{"title":"SIDECAR"}'
+
+    jobs = GenerationJobs(TestSessionLocal, TestSessionLocal)
+    assert await jobs.resume(run) == 1
+    job = await jobs.wait("interrupted", timeout=5)
+
+    assert job.status == "succeeded"
+    assert job.response_json == '{"title":"SIDECAR"}'
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_from_two_workers_create_one_job(tmp_path):
+    import asyncio
+    from contextlib import asynccontextmanager
+    from db.base import make_engine
+    from models.generation_job import GenerationJob
+    from services.generation_jobs import GenerationJobs
+
+    # Two workers, each with its own connections to one database file
+    url = f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}"
+    engines = [make_engine(url), make_engine(url)]
+    async with engines[0].begin() as conn:
+        await conn.run_sync(GenerationJob.__table__.create)
+    # Each worker's first write opens only once both are about to write
+    barrier = asyncio.Barrier(2)
+
+    def racing(sessions):
+        started = False
+
+        @asynccontextmanager
+        async def session():
+            nonlocal started
+            if not started:
+                started = True
+                await barrier.wait()
+            async with sessions() as db:
+                yield db
+        return session
+
+    workers = []
+    for engine in engines:
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        workers.append(GenerationJobs(racing(sessions), sessions, poll_seconds=0.01))
+    assert workers[0].owner != workers[1].owner
+    release = asyncio.Event()
+    runs = []
+
+    async def run(query, cache_key):
+        runs.append(query)
+        await release.wait()
+        return b'{"title":"PALOMA"}'
+
+    submitted = await asyncio.gather(*(worker.submit("paloma", "paloma", run) for worker in workers))
+    assert sorted(created for _, created in submitted) == [False, True]
+    assert submitted[0][0] == submitted[1][0]
+    release.set()
+    job = await workers[1].wait(submitted[0][0], timeout=5)
+    assert job.status == "succeeded" and runs == ["paloma"]
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_superseded_generation_job_answers_with_the_job_that_replaced_it(db_session):
+    import asyncio
+    import time
+    from models.generation_job import GenerationJob
+    from services.generation_jobs import GenerationJobs
+
+    db_session.add(GenerationJob(id="orphaned", query_key="sidecar", query="sidecar", status="running",
+                                 owner="dead worker", lease_expires_at=time.time() - 1))
+    await db_session.commit()
+    release = asyncio.Event()
+
+    async def run(query, cache_key):
+        await release.wait()
+        return b'{"title":"SIDECAR"}'
+
+    jobs = GenerationJobs(TestSessionLocal, TestSessionLocal)
+    # This worker is already generating the query when it finds the orphaned job
+    jobs._active["sidecar"] = "current"
+    assert await jobs.resume(run) == 0
+    jobs._active.clear()
+    db_session.add(GenerationJob(id="current", query_key="sidecar", query="Sidecar", status="running"))
+    await db_session.commit()
+
+    polled = asyncio.ensure_future(jobs.wait("orphaned", timeout=5))
+    await asyncio.sleep(0.05)
+    assert not polled.done()
+    await jobs._update("current", status="succeeded", response_json='{"title":"SIDECAR"}')
+    job = await asyncio.wait_for(polled, 5)
+    assert (job.id, job.status, job.response_json) == ("current", "succeeded", '{"title":"SIDECAR"}')
+
+
+@pytest.mark.asyncio
+async def test_generation_jobs_are_claimed_once_across_workers(tmp_path):
+    import asyncio
+    import time
+    from db.base import make_engine
+    from models.generation_job import GenerationJob
+    from services.generation_jobs import GenerationJobs
+
+    # Two workers, each with its own connections to one database file
+    url = f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}"
+    engines = [make_engine(url), make_engine(url)]
+    async with engines[0].begin() as conn:
+        await conn.run_sync(GenerationJob.__table__.create)
+    sessions = [async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False) for engine in engines]
+    async with sessions[0]() as db:
+        db.add_all([
+            GenerationJob(id="orphaned", query_key="sidecar", query="sidecar", status="running",
+                          owner="dead worker", lease_expires_at=time.time() - 1),
+            GenerationJob(id="elsewhere", query_key="gimlet", query="gimlet", status="running",
+                          owner="live worker", lease_expires_at=time.time() + 60),
+        ])
+        await db.commit()
+
+    release = asyncio.Event()
+    runs = []
+
+    async def run(query, cache_key):
+        runs.append(query)
+        await release.wait()
+        return b'{"title":"' + query.upper().encode() + b'"}'
+
+    first = GenerationJobs(sessions[0], sessions[0], poll_seconds=0.01)
+    second = GenerationJobs(sessions[1], sessions[1], poll_seconds=0.01)
+    assert await first.resume(run) == 1  # only the job whose worker died
+    assert await second.resume(run) == 0
+
+    job_id, created = await first.submit("paloma", "paloma", run)
+    assert created
+    assert await second.submit("Paloma", "paloma", run) == (job_id, False)
+
+    # The second worker's long poll sees the first worker finish the job
+    polled = asyncio.ensure_future(second.wait(job_id, timeout=5))
+    await asyncio.sleep(0.05)
+    release.set()
+    job = await asyncio.wait_for(polled, 5)
+    assert (job.status, job.response_json) == ("succeeded", '{"title":"PALOMA"}')
+    assert (await first.wait("orphaned", timeout=5)).status == "succeeded"
+    assert sorted(runs) == ["paloma", "sidecar"]
+    assert (await second.get("elsewhere")).status == "running"
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_negative_cache_replays_rejections_and_failed_generations(test_client):
+    from services.llm_recipe_generator import RecipeGenerationError
+    from services.query_validator import validate_cocktail_wine_query
+
+    with patch('api.routes.validate_cocktail_wine_query', wraps=validate_cocktail_wine_query) as validator:
+        first = await test_client.get("/recipe?query=chicken soup")
+        second = await test_client.get("/recipe?query=chicken soup")
+    assert first.status_code == second.status_code == 400
+    assert second.json()["detail"] == first.json()["detail"]
+    validator.assert_called_once()
+
+    with patch('api.routes.get_recipe_generator') as mock_get_generator:
+        generate = mock_get_generator.return_value.generate_recipe = AsyncMock(
+            side_effect=RecipeGenerationError("Model returned invalid JSON")
+        )
+        first = await test_client.get("/recipe?query=paloma cocktail")
+        second = await test_client.get("/recipe?query=Paloma  Cocktail")
+        batch = await test_client.post("/recipe/batch", json={"queries": ["paloma cocktail"]})
+        assert generate.await_count == 1
+
+        purged = await test_client.delete("/admin/negative-cache?query=paloma cocktail")
+        await test_client.get("/recipe?query=paloma cocktail")
+        assert generate.await_count == 2
+
+    assert first.status_code == second.status_code == 400
+    assert second.json()["detail"] == "Model returned invalid JSON"
+    assert batch.json()["results"][0]["status"] == 400
+    assert purged.json() == {"purged": 1}
+
+    stats = (await test_client.get("/admin/stats")).json()["negative_cache"]
+    assert stats["rejections"]["hits"] == 1
+    assert stats["failures"]["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_stages_lookups_and_token_usage(test_client, sample_recipe_data):
+    from services.metrics import get_metrics
+
+    metrics = get_metrics()
+    completion = dict(_completion(sample_recipe_data), usage={
+        "prompt_tokens": 900, "completion_tokens": 350, "total_tokens": 1250,
+    })
+    generator, _ = _fake_openai_generator(
+        [(200, completion)], _test_scheduler(), models=["metrics-model"]
+    )
+    misses = metrics.db_lookups.value("miss")
+    successes = metrics.generations.value("success")
+    persisted = metrics.stage_seconds.count("persist")
+
+    with patch('api.routes.get_recipe_generator', return_value=generator):
+        generated = await test_client.get("/recipe?query=bramble cocktail")
+        cached = await test_client.get("/recipe?query=bramble cocktail")
+
+    assert generated.status_code == cached.status_code == 200
+    assert metrics.db_lookups.value("miss") == misses + 1
+    assert metrics.generations.value("success") == successes + 1
+    assert metrics.stage_seconds.count("persist") == persisted + 1
+    assert metrics.llm_tokens.value("metrics-model", "prompt") == 900
+    assert metrics.llm_tokens.value("metrics-model", "completion") == 350
+
+    response = await test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    for stage in ("validate", "cache", "db", "llm", "parse", "persist"):
+        assert f'recipe_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}}' in body
+    assert 'llm_tokens_total{model="metrics-model",kind="prompt"} 900' in body
+    assert "recipe_cache_hits_total" in body
+
+
+def test_histogram_renders_cumulative_buckets():
+    from services.metrics import Histogram
+
+    histogram = Histogram("test_seconds", "Test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "db")
+
+    assert list(histogram.samples()) == [
+        'test_seconds_bucket{stage="db",le="0.1"} 2',
+        'test_seconds_bucket{stage="db",le="1.0"} 3',
+        'test_seconds_bucket{stage="db",le="+Inf"} 4',
+        'test_seconds_sum{stage="db"} 3.65',
+        'test_seconds_count{stage="db"} 4',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_paraphrased_query_is_served_by_semantic_match(test_client, db_session, sample_recipe_data):
+    await create_recipe(
+        db_session, {**sample_recipe_data, "title": "MEZCAL MARGARITA", "search_query": "mezcal margarita"}
+    )
+
+    with patch('api.routes.get_recipe_generator') as mock_get_generator:
+        mock_get_generator.return_value.generate_recipe = AsyncMock(side_effect=AssertionError("not generated"))
+        response = await test_client.get("/recipe?query=mezcal version of a margarita")
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "MEZCAL MARGARITA"
+
+
+@pytest.mark.asyncio
+async def test_variant_with_another_spirit_is_not_served_by_semantic_match(test_client, db_session, sample_recipe_data):
+    await create_recipe(db_session, {**sample_recipe_data, "title": "OLD FASHIONED", "search_query": "old fashioned"})
+    generated = RecipeResponse(
+        title="RUM OLD FASHIONED",
+        ingredients=[Ingredient(name="2 oz (60 ml) Aged Rum", oz=2.0, ml=60)],
+        method=["Stir: Stir with ice."],
+    )
+
+    with patch('api.routes.get_recipe_generator') as mock_get_generator:
+        mock_get_generator.return_value.generate_recipe = AsyncMock(return_value=generated)
+        response = await test_client.get("/recipe?query=Rum Old Fashioned")
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "RUM OLD FASHIONED"
+
+
+def test_semantic_index_ranks_paraphrases_above_other_drinks():
+    from services.semantic_index import SemanticIndex
+
+    index = SemanticIndex(dimensions=256, threshold=0.78)
+    index.add_many([("old fashioned", 1), ("whiskey sour", 2), ("martini", 3), ("margarita", 4)])
+    index.add("old fashioned", 99)
+
+    assert index.match("classic old fashioned")[:2] == (1, "old fashioned")
+    assert index.match("espresso martini") is None
+    # Close vectors, but another spirit
+    assert index.search("rum old fashioned", k=1)[0][2] >= 0.78
+    assert index.match("rum old fashioned") is None
+    assert index.match("smoky old fashioned") is None
+    assert index.stats()["refused"] == 1
+    # find runs off the event loop and leaves the counters to record
+    lookups = index.stats()["lookups"]
+    assert index.find("rum old fashioned") == (None, True)
+    assert index.stats()["lookups"] == lookups
+    index.add("rum old fashioned", 5)
+    assert index.match("old fashioned with rum")[:2] == (5, "rum old fashioned")
+    top = index.search("whiskey smash", k=2)
+    assert [recipe_id for recipe_id, _, _ in top][0] == 2
+    assert len(top) == 2 and top[0][2] >= top[1][2]
+    assert len(index) == 5
+
+
+def test_similarity_index_scores_shared_ingredients_exactly():
+    from services.similarity_index import SimilarityIndex
+
+    def ingredients(*names):
+        return [{"name": f"1 oz (30 ml) {name}"} for name in names]
+
+    index = SimilarityIndex(profile_weight=0)
+    index.add(1, ingredients("Gin", "Lime Juice", "Simple Syrup"), None)
+    index.add(2, ingredients("Gin", "Campari"), None)
+    # Many recipes sharing nothing with the first; none may score above zero
+    index.add_many((recipe_id, ingredients(f"Liqueur {recipe_id}"), None) for recipe_id in range(3, 200))
+
+    top = index.similar(1, k=3)
+    assert top[0][0] == 2
+    assert top[0][1] == pytest.approx(1 / 6 ** 0.5)
+    assert [score for _, score in top[1:]] == [0, 0]
+
+    # Stored again with new ingredients
+    index.add(2, ingredients("Gin", "Lime Juice", "Simple Syrup"), None)
+    assert index.similar(1, k=1)[0] == (2, pytest.approx(1.0))
+    assert index.stats()["ingredients"] == 201
+
+
+@pytest.mark.asyncio
+async def test_similar_ranks_stored_recipes_by_ingredients_and_profile(test_client, db_session, sample_recipe_data):
+    await create_recipe(db_session, sample_recipe_data)
+    await create_recipe(db_session, {
+        **sample_recipe_data, "title": "TOMMY'S MARGARITA", "search_query": "tommy's margarita",
+        "ingredients": [
+            {"name": "2 oz (60 ml) Tequila", "oz": 2, "ml": 60},
+            {"name": "1 oz (30 ml) Fresh Lime Juice", "oz": 1, "ml": 30},
+            {"name": "0.5 oz (15 ml) Agave Syrup", "oz": 0.5, "ml": 15},
+        ],
+    })
+    await create_recipe(db_session, {
+        **sample_recipe_data, "title": "NEGRONI", "search_query": "negroni",
+        "ingredients": [
+            {"name": "1 oz (30 ml) Gin", "oz": 1, "ml": 30},
+            {"name": "1 oz (30 ml) Campari", "oz": 1, "ml": 30},
+            {"name": "1 oz (30 ml) Sweet Vermouth", "oz": 1, "ml": 30},
+        ],
+        "tasting_profile": {"alcohol": 4, "bitter": 4, "sour": 0, "sweet": 2},
+    })
+
+    with patch('api.routes.get_recipe_generator') as mock_get_generator:
+        mock_get_generator.return_value.generate_recipe = AsyncMock(side_effect=AssertionError("not generated"))
+        response = await test_client.get("/recipe/similar?query=margarita&k=2")
+        missing = await test_client.get("/recipe/similar?query=paper plane drink")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["title"] == "MARGARITA"
+    assert [item["title"] for item in data["similar"]] == ["TOMMY'S MARGARITA", "NEGRONI"]
+    assert data["similar"][0]["similarity"] > data["similar"][1]["similarity"]
+    assert data["similar"][0]["recipe"]["ingredients"][2]["name"] == "0.5 oz (15 ml) Agave Syrup"
+    assert missing.status_code == 404
+
+
+def test_ingredient_names_strip_amounts_and_split_alternatives():
+    from services.ingredients import ingredient_names
+
+    assert ingredient_names("1.75 oz (60 ml) Tequila") == ("tequila",)
+    assert ingredient_names("2 oz (60 ml) Bourbon or Rye Whisky") == ("bourbon", "rye whiskey")
+    assert ingredient_names("3 dashes Angostura Bitters") == ("angostura bitters",)
+    assert ingredient_names("0.75 oz (25 ml) Fresh Lemon Juice") == ("lemon juice",)
+    assert ingredient_names("Sugar for rim (optional)") == ("sugar",)
+
+
+@pytest.mark.asyncio
+async def test_search_by_ingredient_supports_all_any_and_pages(test_client, db_session, sample_recipe_data):
+    await create_recipe(db_session, sample_recipe_data)
+    await create_recipe(db_session, {
+        **sample_recipe_data, "title": "NAKED AND FAMOUS", "search_query": "naked and famous",
+        "ingredients": [
+            {"name": "0.75 oz (22 ml) Mezcal", "oz": 0.75, "ml": 22},
+            {"name": "0.75 oz (22 ml) Aperol", "oz": 0.75, "ml": 22},
+            {"name": "0.75 oz (22 ml) Fresh Lime Juice", "oz": 0.75, "ml": 22},
+        ],
+    })
+    await create_recipe(db_session, {
+        **sample_recipe_data, "title": "OAXACA OLD FASHIONED", "search_query": "oaxaca old fashioned",
+        "ingredients": [
+            {"name": "1.5 oz (45 ml) Reposado Tequila", "oz": 1.5, "ml": 45},
+            {"name": "0.5 oz (15 ml) Mezcal", "oz": 0.5, "ml": 15},
+            {"name": "2 dashes Angostura Bitters", "oz": 0, "ml": 0},
+        ],
+    })
+
+    both = await test_client.get("/recipe/by-ingredient?ingredient=Mezcal&ingredient=aperol")
+    assert both.status_code == 200
+    assert both.json()["total"] == 1
+    assert both.json()["results"][0]["title"] == "NAKED AND FAMOUS"
+
+    either = await test_client.get("/recipe/by-ingredient?ingredient=mezcal&ingredient=lime&match=any&limit=2")
+    data = either.json()
+    assert data["ingredients"] == ["mezcal", "lime"] and data["total"] == 3
+    assert [(r["title"], r["matched"]) for r in data["results"]] == [
+        ("NAKED AND FAMOUS", 2), ("MARGARITA", 1),
+    ]
+    next_page = await test_client.get("/recipe/by-ingredient?ingredient=mezcal&ingredient=lime&match=any&limit=2&offset=2")
+    assert [r["title"] for r in next_page.json()["results"]] == ["OAXACA OLD FASHIONED"]
+
+    tequila = await test_client.get("/recipe/by-ingredient?ingredient=tequila")
+    assert [r["title"] for r in tequila.json()["results"]] == ["MARGARITA", "OAXACA OLD FASHIONED"]
+    assert (await test_client.get("/recipe/by-ingredient?ingredient=2 oz")).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_recipe_sends_validators_and_answers_conditional_requests_with_304(
+    test_client, db_session, sample_recipe_data
+):
+    await create_recipe(db_session, sample_recipe_data)
+
+    first = await test_client.get("/recipe?query=margarita")
+    assert first.status_code == 200
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+    assert etag.startswith('"') and first.headers["cache-control"] == "public, max-age=3600"
+
+    # The second request is a cache hit and must carry the same validators
+    revalidated = await test_client.get("/recipe?query=margarita", headers={"If-None-Match": f'W/"x", {etag}'})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b"" and revalidated.headers["etag"] == etag
+
+    assert (await test_client.get("/recipe?query=margarita", headers={"If-Modified-Since": last_modified})).status_code == 304
+    assert (await test_client.get(
+        "/recipe?query=margarita", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}
+    )).status_code == 200
+    # If-None-Match takes precedence over If-Modified-Since
+    changed = await test_client.get(
+        "/recipe?query=margarita", headers={"If-None-Match": '"stale"', "If-Modified-Since": last_modified}
+    )
+    assert changed.status_code == 200 and changed.json()["title"] == "MARGARITA"
+
+    stream = await test_client.get("/recipe/stream?query=margarita", headers={"If-None-Match": etag})
+    assert stream.status_code == 304 and stream.headers["cache-control"] == "no-cache"
+
+
+@pytest.mark.asyncio
+async def test_large_recipes_are_compressed_once_per_coding(test_client, db_session, sample_recipe_data):
+    import gzip
+    from services.response_cache import get_recipe_cache
+
+    await create_recipe(db_session, {**sample_recipe_data, "history": "A long and murky history. " * 80})
+
+    responses = [
+        await test_client.get("/recipe?query=margarita", headers={"Accept-Encoding": "gzip"}) for _ in range(2)
+    ]
+    for response in responses:
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"].endswith('-gzip"')
+        assert response.json()["title"] == "MARGARITA"
+    cached = get_recipe_cache().get("margarita")
+    assert gzip.decompress(cached.encoded("gzip")) == cached
+
+    with patch("services.recipe_service.compress", side_effect=AssertionError("compressed again")):
+        again = await test_client.get("/recipe?query=margarita", headers={"Accept-Encoding": "gzip"})
+    assert again.status_code == 200
+    identity = await test_client.get("/recipe?query=margarita", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers and identity.json()["title"] == "MARGARITA"
+    # A copy held in either coding is revalidated
+    not_modified = await test_client.get(
+        "/recipe?query=margarita", headers={"Accept-Encoding": "identity", "If-None-Match": responses[0].headers["etag"]}
+    )
+    assert not_modified.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_static_assets_are_served_precompressed_from_memory(test_client):
+    ui = await test_client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert ui.status_code == 200 and "<html" in ui.text.lower()
+    assert ui.headers["content-encoding"] == "gzip" and ui.headers["cache-control"] == "no-cache"
+    assert (await test_client.get("/", headers={"If-None-Match": ui.headers["etag"]})).status_code == 304
+
+    asset = await test_client.get("/static/index.html", headers={"Accept-Encoding": "gzip"})
+    assert asset.headers["cache-control"] == "no-cache"
+    assert asset.text == ui.text
+    assert (await test_client.get("/static/index.html", headers={"If-None-Match": asset.headers["etag"]})).status_code == 304
+
+    head = await test_client.head("/static/index.html", headers={"Accept-Encoding": "gzip"})
+    assert head.status_code == 200 and head.content == b""
+    assert head.headers["etag"] == asset.headers["etag"]
+    assert head.headers["content-length"] == asset.headers["content-length"]
+    assert (await test_client.head("/")).status_code == 200
+    assert (await test_client.get("/static/../main.py")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_other_json_responses_are_compressed_above_threshold(test_client):
+    queries = [f"chicken recipe number {i}" for i in range(40)]
+    response = await test_client.post("/recipe/batch", json={"queries": queries}, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["results"]) == 40
+
+    small = await test_client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+@pytest.mark.asyncio
+async def test_generation_lease_is_renewed_while_generating(tmp_path):
+    import asyncio
+    from db.base import make_engine
+    from models.generation_lease import GenerationLease
+    from services.generation_leases import GenerationLeases
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'leases.db'}"
+    engines = [make_engine(url), make_engine(url)]
+    async with engines[0].begin() as conn:
+        await conn.run_sync(GenerationLease.__table__.create)
+    workers = []
+    for engine in engines:
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        workers.append(GenerationLeases(sessions, sessions, lease_seconds=0.3, poll_seconds=0.01))
+    calls = []
+
+    async def generate():
+        # Outlasts the lease several times over, as a saturated scheduler would
+        calls.append(1)
+        await asyncio.sleep(1)
+        return b'{"title":"PALOMA"}'
+
+    first = asyncio.ensure_future(workers[0].run("paloma", generate, lambda body: body))
+    await asyncio.sleep(0.6)
+    assert await workers[1].run("paloma", generate, lambda body: body) == b'{"title":"PALOMA"}'
+    assert await first == b'{"title":"PALOMA"}'
+    assert len(calls) == 1 and workers[1].stats()["waited"] == 1
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_generation_lease_makes_other_workers_wait_for_its_result(
+    test_client, sample_recipe_data, monkeypatch, tmp_path
+):
+    import asyncio
+    from db.base import make_engine
+    from models.generation_lease import GenerationLease
+    from services.generation_leases import GenerationLeases, get_generation_leases
+
+    # Two workers, each with its own connections to one database file
+    url = f"sqlite+aiosqlite:///{tmp_path / 'leases.db'}"
+    engines = [make_engine(url), make_engine(url)]
+    async with engines[0].begin() as conn:
+        await conn.run_sync(GenerationLease.__table__.create)
+    sessions = [async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False) for engine in engines]
+    leases = get_generation_leases()
+    monkeypatch.setattr(leases, "session_factory", sessions[0])
+    monkeypatch.setattr(leases, "read_session_factory", sessions[0])
+    monkeypatch.setattr(leases, "poll_seconds", 0.01)
+    waited = leases.stats()["waited"]
+    other_worker = GenerationLeases(sessions[1], sessions[1])
+    recipe = RecipeResponse(**{k: v for k, v in sample_recipe_data.items() if k != "search_query"})
+    release = asyncio.Event()
+
+    async def generate_elsewhere():
+        await release.wait()
+        return recipe
+
+    with patch('api.routes.get_recipe_generator') as mock_get_generator:
+        generate = mock_get_generator.return_value.generate_recipe = AsyncMock()
+        elsewhere = asyncio.ensure_future(
+            other_worker.run("margarita", generate_elsewhere, lambda r: r.model_dump_json().encode())
+        )
+        while not other_worker.claimed:
+            await asyncio.sleep(0.01)
+        request = asyncio.ensure_future(test_client.get("/recipe?query=Margarita"))
+        await asyncio.sleep(0.05)
+        assert not request.done()
+
+        release.set()
+        response = await request
+        assert await elsewhere == recipe
+        generate.assert_not_called()
+
+    for engine in engines:
+        await engine.dispose()
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "MARGARITA"
+    assert leases.stats()["waited"] == waited + 1
+    cached = await test_client.get("/recipe?query=margarita")
+    assert cached.content == response.content
+
+
+@pytest.mark.asyncio
+async def test_expired_generation_lease_is_taken_over_and_failure_is_shared(test_client, db_session):
+    import time
+    from models.generation_lease import GenerationLease
+    from services.generation_leases import GenerationLeases, SharedGenerationError
+    from services.generation_scheduler import GenerationUnavailableError
+    from services.recipe_service import normalize_for_search
+
+    cache_key = normalize_for_search("paloma cocktail")
+
+    # Left behind by a worker that died mid-generation
+    db_session.add(GenerationLease(key=cache_key, owner="dead-worker", expires_at=time.time() - 1))
+    await db_session.commit()
+
+    with patch('api.routes.get_recipe_generator') as mock_get_generator:
+        generate = mock_get_generator.return_value.generate_recipe = AsyncMock(
+            side_effect=GenerationUnavailableError("Provider is rate limiting", retry_after=5)
+        )
+        response = await test_client.get("/recipe?query=paloma cocktail")
+        generate.assert_awaited_once()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+    other_worker = GenerationLeases(TestSessionLocal, TestSessionLocal)
+    produce = AsyncMock()
+    with pytest.raises(SharedGenerationError) as shared:
+        await other_worker.run(cache_key, produce, bytes)
+    produce.assert_not_called()
+    assert (shared.value.status_code, shared.value.detail) == (503, "Provider is rate limiting")
+    assert shared.value.headers == {"Retry-After": "5"}